@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
-import sys, subprocess, pathlib
+import sys, os, subprocess, pathlib, traceback
+from concurrent.futures import ThreadPoolExecutor
 import wx
 
-from graphBuilder import processResult
-from graphUI import ShowUI
+import graphBuilder
+from graphBuilder import processResults, batchSummary
+from graphUI import ShowUI, GRAPH_WILDCARD
+from prologWorker import PrologWorker, PrologPool, QueryCancelled, parseQueries, evaluate, loadSummary, prologScript, poolSize
+from resultCache import ResultCache, theoryHash
+from fileWatcher import FileWatcher
+from consoleBuffer import ConsoleBuffer, trimEnd
+from stageTimer import StageTimer
 
 # ---------------------------------- Globals --------------------------------- #
 #Local path
@@ -11,6 +18,16 @@ path = str( pathlib.Path(__file__).parent.absolute() )
 
 #Globals
 window = None
+worker = None
+pool = None
+cache = None
+
+#Runs the queries in the background. One at a time, the rest wait in queue
+executor = ThreadPoolExecutor(max_workers=1)
+
+#Milliseconds between two updates of the console and max characters it keeps (older lines are removed)
+consoleInterval = 50
+consoleMaxChars = 1000000
 
 # ---------------------------------------------------------------------------- #
 #                                User Interface                                #
@@ -89,8 +106,20 @@ class PanelData(wx.Panel):
 
         self.query_data = wx.TextCtrl(self)
 
+        self.watch_check = wx.CheckBox(self, label="Watch mode: Run again when the .pl file changes")
+        self.pinned_title = wx.StaticText(self, label="Pinned Queries")
+        self.pinned_description = wx.StaticText(self, label="One query per line. Run again with the query in watch mode")
+        self.pinned_description.SetForegroundColour("Grey")
+        self.pinned_data = wx.TextCtrl(self, size=(-1,50), style=wx.TE_MULTILINE|wx.HSCROLL)
+
+        self.batch_title = wx.StaticText(self, label="Batch Queries")
+        self.batch_description = wx.StaticText(self, label="One query per line. Runs with the Run Batch button")
+        self.batch_description.SetForegroundColour("Grey")
+        self.batch_data = wx.TextCtrl(self, size=(-1,80), style=wx.TE_MULTILINE|wx.HSCROLL)
+
         #Bind widgets to events
         self.Bind(wx.EVT_BUTTON, self.OnBrowseClick, self.file_button)
+        self.Bind(wx.EVT_CHECKBOX, self.OnWatchClick, self.watch_check)
 
 
         #Create the GUI sections and assign the widgets
@@ -108,6 +137,13 @@ class PanelData(wx.Panel):
         vBox.Add(self.query_title,0,flag=wx.ALL,border=5)
         vBox.Add(self.query_description,0,flag=wx.ALL,border=5)
         vBox.Add(self.query_data,proportion=1,flag=wx.EXPAND|wx.ALL,border=5)
+        vBox.Add(self.watch_check,0,flag=wx.ALL,border=5)
+        vBox.Add(self.pinned_title,0,flag=wx.ALL,border=5)
+        vBox.Add(self.pinned_description,0,flag=wx.ALL,border=5)
+        vBox.Add(self.pinned_data,proportion=1,flag=wx.EXPAND|wx.ALL,border=5)
+        vBox.Add(self.batch_title,0,flag=wx.ALL,border=5)
+        vBox.Add(self.batch_description,0,flag=wx.ALL,border=5)
+        vBox.Add(self.batch_data,proportion=1,flag=wx.EXPAND|wx.ALL,border=5)
 
         vBox.AddSpacer(20)
         
@@ -126,6 +162,9 @@ class PanelData(wx.Panel):
             file = self.dirname.replace("\\","/")+'/'+self.filename
             self.file_path.SetValue(file)
         dlg.Destroy()
+
+    def OnWatchClick(self,event):
+        self.GetParent().buttonPanel.SetWatch(self.watch_check.GetValue())
  
 class PanelConsole(wx.Panel):
     def __init__(self, parent):
@@ -165,10 +204,9 @@ class PanelConsole(wx.Panel):
         self.SetSizerAndFit(mainSizer)
         
         #Redirect output and errors to this console
-        redir = RedirectText(self.log)
-        redirError = RedirectTextError(self.log)
-        sys.stdout = redir
-        sys.stderr = redirError
+        self.sink = ConsoleSink(self.log, consoleInterval, consoleMaxChars)
+        sys.stdout = RedirectText(self.sink)
+        sys.stderr = RedirectTextError(self.sink)
 
     def OnClearClick(self,event):
         self.log.Clear()
@@ -185,15 +223,41 @@ class PanelButtons(wx.Panel):
         
         #Create all the required widgets
         self.run_button = wx.Button(self,label="Run")
+        self.batch_button = wx.Button(self,label="Run Batch")
+        self.cancel_button = wx.Button(self,label="Cancel")
+        self.cancel_button.Disable()
+        self.open_button = wx.Button(self,label="Open Graph")
         buttonSizer = wx.BoxSizer(orient=wx.HORIZONTAL)
         buttonSizer.AddStretchSpacer(prop=1)
         buttonSizer.Add(self.run_button,flag=wx.LEFT,border=8)
+        buttonSizer.Add(self.batch_button,flag=wx.LEFT,border=8)
+        buttonSizer.Add(self.cancel_button,flag=wx.LEFT,border=8)
+        buttonSizer.Add(self.open_button,flag=wx.LEFT,border=8)
         buttonSizer.AddStretchSpacer(prop=1)
 
+        self.progress = wx.Gauge(self, range=100, size=(-1,8))
+        self.progress_text = wx.StaticText(self, label="")
+        self.progress_text.SetFont(wx.Font(wx.FontInfo(8)))
+        self.progress_text.SetForegroundColour("Grey")
+
+        #Pulses the progress bar while queries are running
+        self.pending = []
+        self.timer = wx.Timer(self)
+
+        #Watch mode. The queries run again when the .pl file changes
+        self.watcher = None
+        self.watchFuture = None
+
         self.Bind(wx.EVT_BUTTON, self.OnRunClick,self.run_button)
+        self.Bind(wx.EVT_BUTTON, self.OnBatchClick,self.batch_button)
+        self.Bind(wx.EVT_BUTTON, self.OnCancelClick,self.cancel_button)
+        self.Bind(wx.EVT_BUTTON, self.OnOpenClick,self.open_button)
+        self.Bind(wx.EVT_TIMER, self.OnTimer,self.timer)
 
         #Create the GUI sections and assign the widgets
         #VBOX (START BUTTON - BOTTOM SECTION)
+        vbox.Add(self.progress,flag=wx.EXPAND|wx.LEFT|wx.RIGHT,border=10)
+        vbox.Add(self.progress_text,flag=wx.ALIGN_CENTER_HORIZONTAL|wx.TOP,border=2)
         vbox.Add(buttonSizer,proportion=1,flag=wx.EXPAND|wx.ALL,border=10)
 
         #Add to mainSizer
@@ -210,7 +274,202 @@ class PanelButtons(wx.Panel):
         if (filename == ""): 
             print("Select a .pl file")
         else:
-            runProlog(filename,query)
+            self.RunQuery(filename,query)
+
+    def OnBatchClick(self,event):
+
+        #Get Values from fields
+        queries = parseQueries(self.GetParent().dataPanel.batch_data.GetValue())
+        filename = self.GetParent().dataPanel.file_path.GetValue()
+
+        if (filename == ""):
+            print("Select a .pl file")
+        elif (not queries):
+            print("Write the batch queries, one per line")
+        else:
+            future = executor.submit(runBatch,filename,queries)
+            self.pending.append(future)
+            self.UpdateProgress()
+            future.add_done_callback(lambda f: wx.CallAfter(self.OnBatchDone,f))
+
+    def OnBatchDone(self,future):
+        #Runs in the main thread when a batch finishes
+        if (not self): return #The window was closed
+        self.pending.remove(future)
+        self.UpdateProgress()
+        if (future.cancelled()): return
+        try:
+            future.result()
+        except QueryCancelled:
+            print("Batch was cancelled",file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+
+    def OnCancelClick(self,event):
+        #Kills the running query or batch, and the queued queries and batches don't start
+        for future in self.pending: future.cancel()
+        if (worker is not None): worker.cancel()
+        if (pool is not None): pool.cancel()
+
+    def OnOpenClick(self,event):
+        #Opens a graph saved from the Graph UI. No query is run
+        dlg = wx.FileDialog(self, "Open saved graph", "", "", GRAPH_WILDCARD, wx.FD_OPEN|wx.FD_FILE_MUST_EXIST)
+        if dlg.ShowModal() == wx.ID_OK:
+            future = executor.submit(graphBuilder.loadGraph,dlg.GetPath())
+            self.pending.append(future)
+            self.UpdateProgress()
+            future.add_done_callback(lambda f: wx.CallAfter(self.OnOpenDone,f))
+        dlg.Destroy()
+
+    def OnOpenDone(self,future):
+        #Runs in the main thread when a saved graph is loaded
+        if (not self): return #The window was closed
+        self.pending.remove(future)
+        self.UpdateProgress()
+        if (future.cancelled()): return
+        try:
+            DG, query, holds, isFact, positions = future.result()
+        except (OSError, ValueError) as e:
+            print("Error: Could not open the graph.",e,file=sys.stderr)
+            return
+        ShowUI(DG,query,holds,isFact,"Gorgias Graph",parent=window,positions=positions)
+
+    def OnTimer(self,event):
+        self.progress.Pulse()
+
+    def SetWatch(self,enabled):
+        """
+        Starts or stops watch mode. The .pl file and the files it loads are watched and 
+        the query and the pinned queries run again when they change
+
+        Args:
+            enabled (bool): Start or stop watching
+        """        
+        if (self.watcher is not None):
+            self.watcher.stop()
+            self.watcher = None
+            print("Stopped watching")
+        if (not enabled): return
+        
+        dataPanel = self.GetParent().dataPanel
+        filename = dataPanel.file_path.GetValue()
+        if (filename == ""):
+            print("Select a .pl file")
+            dataPanel.watch_check.SetValue(False)
+            return
+        graphBuilder.loadConfig()
+        config = graphBuilder.config
+        self.watcher = FileWatcher(filename, lambda files: wx.CallAfter(self.OnFileChanged,files),
+                                   config.getfloat('WatchInterval'), config.getfloat('WatchDebounce'))
+        self.watcher.start()
+        print("Watching "+filename)
+
+    def OnFileChanged(self,files):
+        #Runs in the main thread when the watched files changed (debounced)
+        if (not self or self.watcher is None): return #The window was closed or watch mode stopped
+        dataPanel = self.GetParent().dataPanel
+        query = dataPanel.query_data.GetValue()
+        queries = [query] if (query != "" and not query.isspace()) else []
+        queries += [pinned for pinned in parseQueries(dataPanel.pinned_data.GetValue()) if pinned not in queries]
+        if (not queries): return
+        print("Changed: "+", ".join(os.path.basename(filename) for filename in files))
+        
+        #A watch run that is still waiting in the queue is replaced by the new one
+        if (self.watchFuture is not None): self.watchFuture.cancel()
+        future = executor.submit(runWatch,self.watcher.file,queries)
+        self.watchFuture = future
+        self.pending.append(future)
+        self.UpdateProgress()
+        future.add_done_callback(lambda f: wx.CallAfter(self.OnWatchDone,f))
+
+    def OnWatchDone(self,future):
+        #Runs in the main thread when a watch run finishes
+        if (not self): return #The window was closed
+        self.pending.remove(future)
+        self.UpdateProgress()
+        if (future.cancelled()): return
+        try:
+            rows = future.result()
+        except QueryCancelled:
+            print("Watch run was cancelled",file=sys.stderr)
+            return
+        except Exception:
+            traceback.print_exc()
+            return
+        if (len(rows) > 1):
+            print(batchSummary([(query, results[-1] if results else None) for query, results, timer in rows])+"\n")
+        
+        #The open windows are updated in place. With one window only the first query is shown
+        for index, (query, results, timer) in enumerate(rows):
+            if (index > 0 and not graphBuilder.config.getboolean('multiWindow')): break
+            shown = next((result for result in reversed(results) if result is not None), None) if results else None
+            if (shown is None): continue
+            DG, holds, isFact = shown
+            ShowUI(DG,query,holds,isFact,"Gorgias Graph",parent=window,results=results,update=True,timer=timer)
+
+    def RunQuery(self,filename,query):
+        """
+        Queues a query to run in the background. The Graph UI opens when it finishes
+
+        Args:
+            filename (str): The path to the .pl file
+            query (str): The query to run
+        """        
+        #Times the query from here to the drawn graph
+        timer = StageTimer(query,filename)
+        future = executor.submit(runProlog,filename,query,timer=timer)
+        self.pending.append(future)
+        self.UpdateProgress()
+        future.add_done_callback(lambda f: wx.CallAfter(self.OnQueryDone,query,f,timer))
+
+    def OnQueryDone(self,query,future,timer=None):
+        #Runs in the main thread when a background query finishes
+        if (not self): return #The window was closed
+        self.pending.remove(future)
+        self.UpdateProgress()
+        if (future.cancelled()): return
+        try:
+            results = future.result()
+        except QueryCancelled:
+            print("Query "+query+" was cancelled",file=sys.stderr)
+            return
+        except Exception:
+            traceback.print_exc()
+            return
+        if (results is None or len(results) == 0): return
+        #Show the last result that could be translated. The Graph UI can page to the others
+        shown = next((result for result in reversed(results) if result is not None), None)
+        if (shown is None):
+            print("Error: The result of "+query+" could not be translated",file=sys.stderr)
+            self.progress_text.SetLabel("The result of "+query+" could not be translated")
+            self.Layout()
+            return
+        DG, holds, isFact = shown
+        ShowUI(DG,query,holds,isFact,"Gorgias Graph",parent=window,results=results,timer=timer)
+
+    def UpdateProgress(self):
+        """
+        Updates the progress bar and the Cancel button with the number of running queries
+        """        
+        if (self.pending):
+            if (not self.timer.IsRunning()): self.timer.Start(100)
+            self.cancel_button.Enable()
+            self.progress_text.SetLabel("Running... "+str(len(self.pending)-1)+" queued" 
+                                        if len(self.pending) > 1 else "Running...")
+        else:
+            self.timer.Stop()
+            self.progress.SetValue(0)
+            self.cancel_button.Disable()
+            self.progress_text.SetLabel("")
+        self.Layout()
+
+    def CancelAll(self):
+        """
+        Cancels the queued queries and kills the running one
+        """        
+        for future in self.pending: future.cancel()
+        if (worker is not None): worker.cancel()
+        if (pool is not None): pool.close()
         
 
 # Main GUI
@@ -251,28 +510,86 @@ class MainFrame ( wx.Frame ):
         self.SetMinSize((400,600))
         
     def OnClose(self, event):
+        self.buttonPanel.timer.Stop()
+        self.buttonPanel.SetWatch(False)
+        self.buttonPanel.CancelAll()
         self.Destroy()
 
         
         
 
 
-class RedirectText(object):
-    def __init__(self,aWxTextCtrl):
+class ConsoleSink(object):
+    """
+    Collects the output of all threads and appends it to the console in batches, at most once 
+    every interval milliseconds, so printing many lines doesn't redraw the console for each one.
+    The console keeps only the last maxChars characters
+    """
+
+    def __init__(self, aWxTextCtrl, interval=50, maxChars=1000000):
+        """
+        Args:
+            aWxTextCtrl (wx.TextCtrl): The console
+            interval (int, optional): Milliseconds between two updates of the console. Defaults to 50.
+            maxChars (int, optional): The max number of characters of the console. Defaults to 1000000.
+        """
         self.out = aWxTextCtrl
+        self.interval = interval
+        self.maxChars = maxChars
+        #The text waiting for the next update
+        self.buffer = ConsoleBuffer(maxChars)
+
+    def write(self, string, error=False):
+        """
+        Queues a text for the console. Can be called from any thread
+
+        Args:
+            string (str): The text
+            error (bool, optional): Show it in red. Defaults to False.
+        """
+        if (self.buffer.write(string, error)): wx.CallAfter(wx.CallLater, self.interval, self.flush)
+
+    def flush(self):
+        """
+        Appends the queued text to the console. Runs in the main thread
+        """
+        pending = self.buffer.take()
+        if (not self.out): return #The window was closed
+        
+        self.out.Freeze()
+        try:
+            for error, text in pending:
+                if (error):
+                    defaultStyle = self.out.GetDefaultStyle()
+                    self.out.SetDefaultStyle(wx.TextAttr(wx.RED))
+                    self.out.AppendText(text)
+                    self.out.SetDefaultStyle(defaultStyle)
+                else:
+                    self.out.AppendText(text)
+            
+            #Remove the oldest lines
+            end = trimEnd(self.out.GetLastPosition(), self.maxChars, self.out.GetRange)
+            if (end > 0):
+                self.out.Remove(0, end)
+                self.out.ShowPosition(self.out.GetLastPosition())
+        finally:
+            self.out.Thaw()
+
+
+class RedirectText(object):
+    def __init__(self,sink):
+        self.sink = sink
 
     def write(self,string):
-        self.out.AppendText(string)
+        #Queries print from a background thread. The sink updates the console in the main thread
+        self.sink.write(string)
 
-class RedirectTextError(object):
-    def __init__(self,aWxTextCtrl):
-        self.out = aWxTextCtrl
+    def flush(self):
+        pass
 
+class RedirectTextError(RedirectText):
     def write(self,string):
-        defaultStyle = self.out.GetDefaultStyle()
-        self.out.SetDefaultStyle(wx.TextAttr(wx.RED))
-        self.out.AppendText(string)
-        self.out.SetDefaultStyle(defaultStyle)
+        self.sink.write(string,error=True)
         
 # ---------------------------------------------------------------------------- #
 #                                   Functions                                  #
@@ -291,38 +608,78 @@ def main():
 
 
 
-def runProlog(file,query):
+def runProlog(file,query,verbose=True,timer=None):
     """
-    Creates a prolog.py subprocess that communicates with SWI-Prolog and gets back the result, 
-    process it and opens the Graph UI
+    Sends the query to the prolog.py worker process that communicates with SWI-Prolog and gets back the result 
+    and processes it. The worker is started on the first query and keeps the .pl file loaded.
+    It is called from a background thread so the Graph UI is opened by the caller
 
     Args:
         file (str): The path to the .pl file
         query (str): The query to run
+        verbose (bool, optional): Print the result to the console. Defaults to True.
+        timer (stageTimer.StageTimer, optional): Records the stages of the query. Defaults to a new timer.
+
+    Raises:
+        QueryCancelled: If the query was cancelled
+
+    Returns:
+        ResultList: The (DiGraph, holds, isFact) of every result or None if there is no result
     """    
+    global worker
+    if (timer is None): timer = StageTimer(query,file)
+    #Time spent in the queue of the executor
+    timer.add("wait",timer.total())
+    graphBuilder.loadConfig()
+    worker = getWorker()
     
-    #Create process
-    proc = subprocess.Popen([sys.executable or 'python', path+'/prolog.py', '-f' ,file.replace("\\","/"),'-q',query ] ,
-                            stdout=subprocess.PIPE ,stderr=subprocess.PIPE )
+    #Check the cache. The key changes when the .pl file (or a file it loads) changes
+    resultCache = getCache()
+    if (resultCache is not None):
+        with timer.stage("cache"):
+            theory = theoryHash(file.replace("\\","/"))
+            key = resultCache.key(file, query, script=worker.script, theory=theory)
+            out, results = resultCache.get(key)
+        if (results is not None and results.namedNodes == graphBuilder.config.getboolean('namedNodes')):
+            #Only the query and the parsing are skipped. The result is still printed and exported
+            with timer.stage("process"):
+                graphBuilder.outputResult(query,out,verbose)
+            if (verbose): print("Cached result of "+query+"\n")
+            return results
+        if (out is not None):
+            #Cached on disk. Only the parsing is needed
+            with timer.stage("process"):
+                results = processResults(query,out,verbose)
+            with timer.stage("parse"):
+                if (len(results) > 0): results[-1] #Translate the shown result here, in the background
+            resultCache.put(key,out,results)
+            return results
     
-    #Run process
+    #Run query
     try:
-        outs, errs = proc.communicate(timeout=15)
+        out, err = worker.query(file.replace("\\","/"), query, timeout=graphBuilder.config.getfloat('QueryTimeout'))
     except subprocess.TimeoutExpired:
         print("Error: Subprocess Timeout Expired",file=sys.stderr)
-        proc.kill()
-        #outs, errs = proc.communicate() #To flush the output. 
-        #Disabled because it is very rare to happen and doesn't work correctly
-        return
-    out, err = outs.decode('utf-8') , errs.decode('utf-8')
+        return None
+    if (verbose and worker.lastLoad is not None): print(loadSummary(file, worker.lastLoad))
+    #Stages in the worker process (spawn, startup, load, query, transfer)
+    for name, seconds in worker.lastTimings.items(): timer.add(name,seconds)
+    timer.addMemory("worker",worker.lastPeak)
     
     #Check the output of the process
     if(out != "" and not out.isspace()):
-        #Returned a result. Not empty. Procede to proccess and display GUI
-        DG, holds, isFact = processResult(query,out)
-        ShowUI(DG,query,holds,isFact,"Gorgias Graph",parent=window)
+        #Returned a result. Not empty. Procede to proccess it
+        with timer.stage("process"):
+            results = processResults(query,out,verbose)
+        with timer.stage("parse"):
+            if (len(results) > 0): results[-1] #Translate the shown result here, in the background
+        #Errors (e.g. a missing predicate) may change with the environment, so only clean outputs are cached.
+        #The output is only cached if the worker answered with the theory of the key, not an older one
+        if (resultCache is not None and (err is None or err == "" or err.isspace()) and worker.lastTheory == theory):
+            resultCache.put(key,out,results)
+        return results
         
-    elif(type(errs) is not None):
+    elif(err is not None):
         #Returned an error
         if(err == "" or err.isspace()): #Error is empty
             print("PROLOG response was empty. Check your input values.",file=sys.stderr)
@@ -330,6 +687,121 @@ def runProlog(file,query):
             print("Error",err,file=sys.stderr)
 
     else: print("An Undefined error occurred",file=sys.stderr)
+    return None
+
+
+def runWatch(file,queries):
+    """
+    Runs the queries of watch mode after the .pl file changed. The worker reloads the changed files first,
+    also the files loaded by the .pl file. Only the first query prints its result
+
+    Args:
+        file (str): The path to the .pl file
+        queries (list): The query and the pinned queries
+
+    Raises:
+        QueryCancelled: If the run was cancelled
+
+    Returns:
+        list: A list of (query, results, timer) tuples. results is the ResultList of the query or None 
+            and timer the stageTimer.StageTimer of the query
+    """
+    global worker
+    graphBuilder.loadConfig()
+    worker = getWorker()
+    
+    try:
+        err = worker.consult(file.replace("\\","/"), timeout=graphBuilder.config.getfloat('QueryTimeout'), reload=True)
+    except subprocess.TimeoutExpired:
+        print("Error: Subprocess Timeout Expired",file=sys.stderr)
+        return []
+    if (err is not None and err != "" and not err.isspace()): print("Error",err,file=sys.stderr)
+    if (worker.lastLoad is not None): print(loadSummary(file, worker.lastLoad))
+    #The reload is timed as part of the first query
+    reload = dict(worker.lastTimings)
+    
+    rows = []
+    for index, query in enumerate(queries):
+        timer = StageTimer(query,file)
+        if (index == 0):
+            for name, seconds in reload.items(): timer.add(name,seconds)
+        rows.append((query, runProlog(file,query,verbose=(index == 0),timer=timer), timer))
+    return rows
+
+
+def getWorker():
+    """
+    Creates the worker, or recreates it if PrologScript changed
+
+    Returns:
+        PrologWorker: The worker
+    """
+    global worker
+    script = prologScript(graphBuilder.config)
+    if (worker is not None and worker.script != script):
+        worker.kill()
+        worker = None
+    if (worker is None): worker = PrologWorker(script)
+    return worker
+
+
+def getCache():
+    """
+    Creates the result cache with the sizes of settings.ini, or recreates it if they changed
+
+    Returns:
+        ResultCache: The cache or None if it's disabled
+    """
+    global cache
+    config = graphBuilder.config
+    if (not config.getboolean('ResultCache')):
+        cache = None
+        return None
+    
+    sizes = (config.getint('CacheEntries'), config.getint('CacheMemoryMB')*1024*1024, config.getint('CacheDiskMB')*1024*1024)
+    if (cache is None or (cache.memoryEntries, cache.memoryBytes, cache.diskBytes) != sizes):
+        cache = ResultCache(path+'/cache' if sizes[2] > 0 else None, *sizes)
+    return cache
+
+
+def runBatch(file,queries):
+    """
+    Runs many queries against the same .pl file. The queries are spread over a pool of 
+    prolog.py workers (PoolWorkers in settings.ini), each with the file consulted once, and the results
+    are parsed in parallel. Prints a summary table with the result of every query
+
+    Args:
+        file (str): The path to the .pl file
+        queries (list): The queries to run
+
+    Raises:
+        QueryCancelled: If the batch was cancelled
+
+    Returns:
+        list: A list of (query, result) tuples. result is the (DiGraph, holds, isFact) or None
+    """    
+    graphBuilder.loadConfig()
+    size = graphBuilder.config.getint('PoolWorkers')
+    
+    script = prologScript(graphBuilder.config)
+    
+    #Create the pool or resize it if the settings changed
+    global pool
+    if (pool is not None and (pool.size != poolSize(size) or pool.script != script)):
+        pool.close()
+        pool = None
+    if (pool is None): pool = PrologPool(size,script)
+
+    rows = []
+    for query, result, err in evaluate(pool, file.replace("\\","/"), queries, 
+                                       timeout=graphBuilder.config.getfloat('QueryTimeout'),
+                                       export=graphBuilder.exportResult):
+        if (result is None):
+            print("Error in "+query+": "+(err.strip() if err and not err.isspace() else "PROLOG response was empty"),
+                  file=sys.stderr)
+        rows.append((query, result))
+    print(batchSummary(rows)+"\n")
+    return rows
 
 
 if __name__ == "__main__":
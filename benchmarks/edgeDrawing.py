@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import sys, time, pathlib
+from argparse import ArgumentParser
+
+import wx
+from wx.lib.floatcanvas import FloatCanvas
+from wx.lib.floatcanvas.FCObjects import ArrowLine
+import networkx as nx
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+from graphLayout import tidy_pos
+from graphObjects import EdgeSet
+
+# ---------------------------------------------------------------------------- #
+#                            Edge drawing benchmark                            #
+# ---------------------------------------------------------------------------- #
+# Compares the redraw time of one ArrowLine object per edge (the old Graph UI)
+# with a single EdgeSet. It needs wxPython and a display (xvfb-run on a headless
+# machine). UNVERIFIED: it hasn't been run yet, so there are no measured times and
+# the speedup of EdgeSet is not confirmed. Usage:
+#   python benchmarks/edgeDrawing.py [--sizes 1000 10000 50000] [--repeat 5]
+#   xvfb-run python benchmarks/edgeDrawing.py
+
+
+def tree(edges, children=3):
+    """
+    Args:
+        edges (int): The number of edges
+        children (int, optional): The children of every node. Defaults to 3.
+
+    Returns:
+        networkx.DiGraph: A tree with the edges going from child to parent, like the graphs of graphBuilder
+    """
+    DG = nx.DiGraph()
+    DG.add_node(0)
+    DG.add_edges_from((i, (i-1)//children) for i in range(1, edges+1))
+    return DG
+
+
+def segments(DG):
+    """
+    Returns:
+        list: The ((x1, y1), (x2, y2)) of every edge with the tidy layout
+    """
+    positions = tidy_pos(DG)
+    return [(positions[u], positions[v]) for u, v in DG.edges]
+
+
+def timeDraw(canvas, objects, repeat):
+    """
+    Args:
+        canvas (FloatCanvas.FloatCanvas): The canvas
+        objects (list): The objects to draw
+        repeat (int): The number of redraws
+
+    Returns:
+        float: The seconds of the fastest full redraw
+    """
+    canvas.ClearAll()
+    canvas.AddObjects(objects)
+    canvas.ZoomToBB()
+    best = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        canvas.Draw(Force=True)
+        wx.SafeYield()
+        best = min(best, time.perf_counter()-start)
+    return best
+
+
+def main():
+    parser = ArgumentParser(description="Redraw time of ArrowLine objects vs one EdgeSet")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = wx.App(False)
+    frame = wx.Frame(None, title="Edge drawing benchmark", size=(1280, 720))
+    canvas = FloatCanvas.FloatCanvas(frame, BackgroundColor="White")
+    frame.Show()
+    wx.SafeYield()
+
+    print("%8s | %14s | %14s | %8s" % ("Edges", "ArrowLine (ms)", "EdgeSet (ms)", "Speedup"))
+    print("-"*9+"+"+"-"*16+"+"+"-"*16+"+"+"-"*9)
+    for size in args.sizes:
+        edges = segments(tree(size))
+        #Same look as the Graph UI. Every arrow head is drawn
+        arrows = [ArrowLine(edge, LineWidth=4, ArrowHeadSize=40, ArrowHeadAngle=12) for edge in edges]
+        edgeSet = [EdgeSet(edges, LineWidth=4, ArrowHeadSize=40, ArrowHeadAngle=12, ArrowMinPixels=0)]
+
+        old = timeDraw(canvas, arrows, args.repeat)
+        new = timeDraw(canvas, edgeSet, args.repeat)
+        print("%8d | %14.1f | %14.1f | %7.1fx" % (size, old*1000, new*1000, old/new))
+
+    frame.Destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+import sys, random
+from argparse import ArgumentParser
+
+# ---------------------------------------------------------------------------- #
+#                       Synthetic Gorgias output generator                     #
+# ---------------------------------------------------------------------------- #
+# Writes the text that prolog.py prints for extended_prove_with_tree, with the
+# layout graphBuilder.ResultParser reads: a RESULT line, a root line and 3 lines
+# per node, indented by the depth of the node. Usage:
+#   python benchmarks/gorgiasOutput.py --nodes 10000 [--branching 3] [--words 8] > output.txt
+#   python benchmarks/gorgiasOutput.py --depth 5 --branching 2 --results 3
+
+#Words of the descriptions
+WORDS = ["bird", "penguin", "fly", "tweety", "wing", "broken", "abnormal", "prefer", "rule", "default",
+         "nest", "swim", "feather", "egg", "tree", "north", "south", "winter", "summer", "holds"]
+
+
+def children(nodes=None, depth=3, branching=2):
+    """
+    Builds the shape of a proof tree. The nodes are numbered breadth first, node 0 is the root
+
+    Args:
+        nodes (int, optional): The number of nodes. If given, the depth grows until they fit. Defaults to None.
+        depth (int, optional): The depth of a full tree. Used if nodes isn't given. Defaults to 3.
+        branching (int, optional): The children of every node. Defaults to 2.
+
+    Returns:
+        list: The children of every node
+    """
+    if (nodes is None):
+        nodes = sum(branching**level for level in range(depth+1))
+    kids = [[] for i in range(nodes)]
+    for i in range(1, nodes):
+        kids[(i-1)//branching].append(i)
+    return kids
+
+
+def description(rng, words):
+    """
+    Args:
+        rng (random.Random): The random generator
+        words (int): The number of words
+
+    Returns:
+        str: Random words of the vocabulary
+    """
+    return " ".join(rng.choice(WORDS) for i in range(words))
+
+
+def result(query, kids, words=6, rng=None):
+    """
+    Args:
+        query (str): The query
+        kids (list): The children of every node (see children)
+        words (int, optional): The words of every description line. Defaults to 6.
+        rng (random.Random, optional): The random generator. Defaults to random.Random(0).
+
+    Returns:
+        list: The lines of one result. The odd levels attack their parent, the even levels defend it
+    """
+    rng = rng if rng is not None else random.Random(0)
+    lines = ["RESULT: "+query+" holds.", "r0(c): "+query+" "+description(rng, words)]
+    #Depth first, like Prolog prints the tree
+    stack = [(child, 1) for child in reversed(kids[0])]
+    while stack:
+        node, level = stack.pop()
+        indent = " "*(3*level-1)+"|"
+        if (level % 2 == 1):
+            first = "nr%d(c): attacks with %s neg(p%d(c))." % (node, description(rng, words), node)
+        else:
+            first = "r%d(c): defends with %s p%d(c)." % (node, description(rng, words), node)
+        lines.append(indent+first)
+        lines.append(indent+"   "+description(rng, words))
+        lines.append(indent+"   "+description(rng, words))
+        stack.extend((child, level+1) for child in reversed(kids[node]))
+    return lines
+
+
+def generate(query="fly(tweety)", nodes=None, depth=3, branching=2, words=6, results=1, seed=0):
+    """
+    Generates the output of a query, as prolog.py prints it
+
+    Args:
+        query (str, optional): The query. Defaults to "fly(tweety)".
+        nodes (int, optional): The nodes of every result. Defaults to a full tree of the depth.
+        depth (int, optional): The depth of a full tree. Used if nodes isn't given. Defaults to 3.
+        branching (int, optional): The children of every node. Defaults to 2.
+        words (int, optional): The words of every description line. Defaults to 6.
+        results (int, optional): The number of results. Defaults to 1.
+        seed (int, optional): The seed of the descriptions. Defaults to 0.
+
+    Returns:
+        str: The output
+    """
+    rng = random.Random(seed)
+    kids = children(nodes, depth, branching)
+    lines = []
+    for i in range(results):
+        lines += result(query, kids, words, rng)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = ArgumentParser(description="Writes synthetic extended_prove_with_tree output")
+    parser.add_argument("-q", "--query", default="fly(tweety)")
+    parser.add_argument("--nodes", type=int, default=None, help="Nodes of every result (overrides --depth)")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--branching", type=int, default=2)
+    parser.add_argument("--words", type=int, default=6, help="Words of every description line")
+    parser.add_argument("--results", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.stdout.write(generate(args.query, args.nodes, args.depth, args.branching, args.words, args.results, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+import gc, sys, os, json, time, pathlib, platform
+from argparse import ArgumentParser
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+import graphBuilder
+from graphBuilder import resultFormatter, formatLines, translator
+from graphLayout import hierarchy_pos, tree_pos, tidy_pos
+
+from gorgiasOutput import generate
+
+# ---------------------------------------------------------------------------- #
+#                              Hot path benchmarks                             #
+# ---------------------------------------------------------------------------- #
+# Times the stages a query goes through, from the printed result to the canvas,
+# on synthetic results (gorgiasOutput.py) of 10 to 100k nodes, and compares them
+# with the saved baselines. Every time is divided by the time of a calibration loop
+# measured around it, so a slower or busier moment of the same machine doesn't
+# look like a regression. The median of a few samples is saved and compared, and a
+# regression is measured again before it's reported.
+# Baselines of another machine (or Python) are not compared, save your own first.
+# FloatCanvasFrame.SetData needs wxPython and a display, use xvfb-run on a headless
+# machine. It has no saved baseline yet, so save one with xvfb-run before checking.
+# With --check a benchmark that can't run or has no baseline fails the check (exit 2),
+# leave it out with --only to check the others. Usage:
+#   python benchmarks/hotPaths.py [--sizes 10 1000] [--only translator] [--repeat 5]
+#   python benchmarks/hotPaths.py --save       Saves the times as the new baselines
+#   python benchmarks/hotPaths.py --check      Exits with 1 if a time regressed
+#   xvfb-run python benchmarks/hotPaths.py --only SetData --save
+
+#Local path
+path = str( pathlib.Path(__file__).parent.absolute() )
+
+#Nodes of the results
+SIZES = [10, 100, 1000, 10000, 100000]
+
+#A time is a regression if it's this many times its baseline (both relative to the calibration)
+THRESHOLD = 1.5
+
+#Samples of every benchmark. The median one is used
+SAMPLES = 3
+
+#Measurements of a regression before it's reported
+RETRIES = 2
+
+#The query of the results
+QUERY = "fly(tweety)"
+
+
+def measure(function, repeat=7, minTime=0.3):
+    """
+    Times a function like timeit: In loops of at least minTime seconds, without the garbage collector
+
+    Args:
+        function (function): Called without arguments
+        repeat (int, optional): The number of measurements. Defaults to 7.
+        minTime (float, optional): Fast functions are called in a loop for at least this many seconds. Defaults to 0.3.
+
+    Returns:
+        float: The seconds of the fastest call
+    """
+    collect = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            start = time.perf_counter()
+            for i in range(loops): function()
+            elapsed = time.perf_counter()-start
+            if (elapsed >= minTime or loops >= 1000000): break
+            loops *= 10 if elapsed < minTime/10 else 2
+        best = elapsed/loops
+        for i in range(repeat-1):
+            start = time.perf_counter()
+            for i in range(loops): function()
+            best = min(best, (time.perf_counter()-start)/loops)
+    finally:
+        if (collect): gc.enable()
+    return best
+
+
+def calibration():
+    """
+    A fixed pure Python workload (strings, lists and dicts, like the parser and the layouts).
+    The benchmarks are compared relative to its time
+    """
+    nodes = {}
+    for i in range(5000):
+        line = "  |r%d(c): defends with p%d(c)." % (i, i)
+        nodes[line.partition(":")[0].lstrip(" |")] = line.split(" ")
+    return len(nodes)
+
+
+def measureRelative(function, repeat=7, minTime=0.3):
+    """
+    Times a function and the calibration loop right before and after it
+
+    Returns:
+        tuple: The ms of the function and the mean ms of the calibration
+    """
+    before = measure(calibration, repeat, minTime/3)
+    ms = measure(function, repeat, minTime)
+    after = measure(calibration, repeat, minTime/3)
+    return ms*1000, (before+after)/2*1000
+
+
+def measureSamples(function, samples=3, repeat=7, minTime=0.3):
+    """
+    Returns:
+        tuple: The ms of the function and of the calibration of the sample with the median relative time
+    """
+    times = sorted((measureRelative(function, repeat, minTime) for i in range(samples)), key=lambda time: time[0]/time[1])
+    return times[len(times)//2]
+
+
+def machine():
+    """
+    Returns:
+        dict: What the times depend on besides the code
+    """
+    return {"python":platform.python_version(), "implementation":platform.python_implementation(),
+            "system":platform.system(), "processor":platform.processor() or platform.machine(),
+            "cpus":os.cpu_count()}
+
+
+# ------------------------------- Benchmarks -------------------------------- #
+# Every benchmark gets the text and the graph of a result and returns the
+# function to time
+
+
+def benchResultFormatter(text, DG):
+    return lambda: resultFormatter(text)
+
+
+def benchFormatLines(text, DG):
+    lines = text.splitlines()
+    return lambda: list(formatLines(lines))
+
+
+def benchTranslator(text, DG):
+    lines = list(formatLines(text.splitlines()))
+    graphBuilder.query = QUERY
+    return lambda: translator(lines, verbose=False)
+
+
+def benchHierarchyPos(text, DG):
+    #hierarchy_pos needs the edges from the parent to the children
+    reversedDG = DG.reverse(copy=True)
+    root = next(iter(DG))
+    return lambda: hierarchy_pos(reversedDG, root)
+
+
+def benchTreePos(text, DG):
+    root = next(iter(DG))
+    return lambda: tree_pos(DG, root)
+
+
+def benchTidyPos(text, DG):
+    root = next(iter(DG))
+    return lambda: tidy_pos(DG, root)
+
+
+class CanvasBench(object):
+    """
+    A Graph UI window, created once. SetData creates the canvas objects of a graph.
+    Needs wxPython and a display, see the top of the file
+    """
+
+    def __init__(self):
+        import wx
+        import graphUI
+        self.wx = wx
+        self.graphUI = graphUI
+        self.app = wx.App(False)
+        graphUI.loadConfig()
+        self.frame = None
+
+    def __call__(self, text, DG):
+        graphUI = self.graphUI
+        #The layout is not part of the benchmark
+        graphUI.setGraph(DG, True, False, QUERY, tidy_pos(DG, next(iter(DG))))
+        graphUI.setResults(None, QUERY)
+        if (self.frame is None):
+            self.frame = graphUI.FloatCanvasFrame(None, title="Hot path benchmark", size=(1280,720))
+        frame = self.frame
+        def setData():
+            frame.Canvas.ClearAll()
+            frame.SetData()
+        return setData
+
+
+BENCHMARKS = {"resultFormatter":benchResultFormatter, "formatLines":benchFormatLines, "translator":benchTranslator,
+              "hierarchy_pos":benchHierarchyPos, "tree_pos":benchTreePos, "tidy_pos":benchTidyPos,
+              "SetData":CanvasBench}
+
+
+# -------------------------------- Baselines -------------------------------- #
+
+
+def loadBaselines(filename):
+    """
+    Returns:
+        dict: The saved times (ms) of every benchmark and size. Empty if there are none
+    """
+    try:
+        with open(filename, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def saveBaselines(filename, times, calibrationTimes):
+    """
+    Saves the times as the baselines. On the same machine the benchmarks and sizes that weren't run
+    keep their baselines, the baselines of another machine are all replaced
+
+    Args:
+        filename (str): The path of the baselines
+        times (dict): The times (ms) of every benchmark and size
+        calibrationTimes (dict): The times (ms) of the calibration loop, measured with every benchmark and size
+    """
+    baselines = loadBaselines(filename)
+    #The old times are only kept if they can be compared with the new ones
+    results = baselines.get("results", {}) if baselines.get("machine") == machine() else {}
+    calibrations = baselines.get("calibrations", {}) if baselines.get("machine") == machine() else {}
+    for name, sizes in times.items():
+        results.setdefault(name, {}).update({str(size):round(ms, 4) for size, ms in sizes.items()})
+        calibrations.setdefault(name, {}).update({str(size):round(ms, 4) for size, ms in calibrationTimes[name].items()})
+    baselines = {"machine":machine(), "results":results, "calibrations":calibrations}
+    with open(filename+".tmp", "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(filename+".tmp", filename)
+
+
+def main():
+    parser = ArgumentParser(description="Times the hot paths of the program and compares them with the baselines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Nodes of the results")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="Samples of every benchmark, the median is used")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements of a sample, the fastest is used")
+    parser.add_argument("--minTime", type=float, default=0.3, help="Seconds of every measurement")
+    parser.add_argument("--branching", type=int, default=3)
+    parser.add_argument("--words", type=int, default=6, help="Words of every description line")
+    parser.add_argument("--baselines", default=path+"/baselines.json")
+    parser.add_argument("--save", action="store_true", help="Save the times as the new baselines")
+    parser.add_argument("--check", action="store_true", help="Exit with 1 if a time regressed")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--retries", type=int, default=RETRIES, help="Measurements of a regression before it's reported")
+    args = parser.parse_args()
+
+    graphBuilder.loadConfig()
+    saved = loadBaselines(args.baselines)
+    baselines = saved.get("results", {})
+    calibrations = saved.get("calibrations", {})
+    if (saved and saved.get("machine") != machine()):
+        print("The baselines are of another machine "+json.dumps(saved.get("machine"))+". Not comparing\n")
+        if (args.check and not args.save):
+            print("Save the baselines of this machine first (--save)")
+            sys.exit(2)
+        baselines = {}
+    results = {}
+    for size in args.sizes:
+        text = generate(QUERY, nodes=size, branching=args.branching, words=args.words)
+        #The graph of the text, as the Graph UI gets it
+        DG = graphBuilder.ResultList(QUERY, list(formatLines(text.splitlines())))[-1][0]
+        results[size] = text, DG
+
+    print("%-16s | %8s | %12s | %12s | %7s" % ("Benchmark", "Nodes", "Time (ms)", "Baseline", "Ratio"))
+    print("-"*17+"+"+"-"*10+"+"+"-"*14+"+"+"-"*14+"+"+"-"*8)
+    times = {}
+    calibrationTimes = {}
+    regressions = []
+    #The benchmarks (and sizes) that weren't compared with a baseline
+    uncovered = []
+    for name in args.only:
+        bench = BENCHMARKS[name]
+        if (isinstance(bench, type)):
+            try:
+                bench = bench()
+            except Exception as e:
+                #SetData needs wxPython and a display
+                print("%-16s | NOT RUN: %s" % (name, e))
+                uncovered.append((name, "not run: "+str(e)))
+                continue
+        for size in args.sizes:
+            function = bench(*results[size])
+            ms, calibrationMs = measureSamples(function, args.samples, args.repeat, args.minTime)
+            baseline = baselines.get(name, {}).get(str(size))
+            baselineCalibration = calibrations.get(name, {}).get(str(size))
+            if (baseline is None or baselineCalibration is None):
+                times.setdefault(name, {})[size] = ms
+                calibrationTimes.setdefault(name, {})[size] = calibrationMs
+                uncovered.append((name, "no baseline at %d nodes" % size))
+                print("%-16s | %8d | %12.3f | %12s | %7s" % (name, size, ms, "-", "-"))
+                continue
+            #Both relative to their calibration. A regression is measured again, the best one counts
+            ratio = (ms/calibrationMs)/(baseline/baselineCalibration)
+            for i in range(args.retries):
+                if (ratio <= args.threshold): break
+                retryMs, retryCalibration = measureSamples(function, args.samples, args.repeat, args.minTime)
+                if ((retryMs/retryCalibration)/(baseline/baselineCalibration) < ratio):
+                    ms, calibrationMs = retryMs, retryCalibration
+                    ratio = (ms/calibrationMs)/(baseline/baselineCalibration)
+            times.setdefault(name, {})[size] = ms
+            calibrationTimes.setdefault(name, {})[size] = calibrationMs
+            regressed = ratio > args.threshold
+            if (regressed): regressions.append((name, size, ratio))
+            print("%-16s | %8d | %12.3f | %12.3f | %6.2fx%s" % (name, size, ms, baseline, ratio, " REGRESSION" if regressed else ""))
+
+    if (args.save):
+        saveBaselines(args.baselines, times, calibrationTimes)
+        print("\nSaved the baselines to "+args.baselines)
+    if (regressions):
+        print("\n"+str(len(regressions))+" regressions over "+str(args.threshold)+"x the baseline:")
+        for name, size, ratio in regressions: print("  %s at %d nodes: %.2fx" % (name, size, ratio))
+        if (args.check): sys.exit(1)
+    if (uncovered and not args.save):
+        print("\nNot compared with a baseline:")
+        for name, reason in uncovered: print("  %s: %s" % (name, reason))
+        if (args.check):
+            print("Run them (xvfb-run for SetData) and save their baselines (--save), or leave them out (--only)")
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
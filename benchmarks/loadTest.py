@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+import sys, os, math, time, tempfile, importlib.util, pathlib, configparser
+from argparse import ArgumentParser
+
+#The modules of the program are in the parent folder
+root = str( pathlib.Path(__file__).parent.parent.absolute() )
+sys.path.insert(0, root)
+import settings
+import graphBuilder
+from graphLayout import layout_pos
+from prologWorker import PrologWorker
+from stageTimer import StageTimer, peakMemory
+
+from mockProlog import ENV_PREFIX, DEFAULTS
+
+# ---------------------------------------------------------------------------- #
+#                                   Load test                                  #
+# ---------------------------------------------------------------------------- #
+# Runs a sequence of queries through the pipeline of the GUI (runProlog, the
+# result processing and ShowUI) on the mock Prolog backend (mockProlog.py) and
+# reports the latency percentiles, the time of every stage and the memory growth.
+# Without wxPython (or with --headless) the graphs are laid out but not drawn.
+# The options of the mock are passed on, e.g.:
+#   python benchmarks/loadTest.py --queries 500 --distinct 50 --latency 0.02 --nodes 1000
+#   python benchmarks/loadTest.py --replay export/ --failRate 0.05 --set QueryTimeout=2 --timeoutRate 0.01
+#   xvfb-run python benchmarks/loadTest.py --queries 200
+
+#Local path
+path = str( pathlib.Path(__file__).parent.absolute() )
+
+#The latency percentiles of the report
+PERCENTILES = [50, 90, 95, 99]
+
+#The disk cache is off by default, so the outputs of the mock don't fill the cache folder
+OVERRIDES = {"CacheDiskMB":"0", "printRawResult":"no", "printCompactResult":"no", "Export":"no", "ExportRAW":"no"}
+
+
+def currentMemory():
+    """
+    Returns:
+        float: The memory (resident set size) of this process in MB. The peak if the current one isn't known
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1])*os.sysconf("SC_PAGE_SIZE")/(1024*1024)
+    except (OSError, ValueError, AttributeError):
+        return peakMemory()
+
+
+def percentile(values, p):
+    """
+    Args:
+        values (list): Sorted values
+        p (float): The percentile, 0 to 100
+
+    Returns:
+        float: The value of the percentile (nearest rank)
+    """
+    if (not values): return 0.0
+    return values[max(0, math.ceil(p*len(values)/100)-1)]
+
+
+def writeSettings(directory, overrides):
+    """
+    Writes a copy of settings.ini with the overrides and makes it the shared settings of the program
+
+    Args:
+        directory (str): The folder of the copy
+        overrides (dict): The values of the UserSettings to change
+    """
+    parser = configparser.ConfigParser()
+    parser.optionxform = str
+    parser.read(root+'/settings.ini')
+    for name, value in overrides.items(): parser['UserSettings'][name] = value
+    filename = os.path.join(directory, 'settings.ini')
+    with open(filename, 'w') as f:
+        parser.write(f)
+    settings.shared = settings.Settings(filename)
+
+
+def loadGUI():
+    """
+    Returns:
+        module: Gorgias-Visual.py, or None if wxPython isn't installed
+    """
+    try:
+        spec = importlib.util.spec_from_file_location("gorgiasVisual", root+'/Gorgias-Visual.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except ImportError:
+        return None
+
+
+class Pipeline(object):
+    """
+    Runs a query like the Run button of the GUI: runProlog in the background thread, then ShowUI
+    """
+
+    def __init__(self, gui, script):
+        """
+        Args:
+            gui (module): Gorgias-Visual.py
+            script (str): The path to the mock backend
+        """
+        import wx
+        self.wx = wx
+        self.app = wx.App(False)
+        self.gui = gui
+        gui.worker = PrologWorker(script)
+
+    def __call__(self, file, query, timer):
+        """
+        Returns:
+            bool: If the query returned a graph
+        """
+        results = self.gui.executor.submit(self.gui.runProlog, file, query, False, timer).result()
+        if (results is None or len(results) == 0 or results[-1] is None): return False
+        DG, holds, isFact = results[-1]
+        self.gui.ShowUI(DG, query, holds, isFact, "Load test", results=results, timer=timer)
+        #Paint the window before the next query
+        self.wx.SafeYield()
+        return True
+
+    def close(self):
+        self.gui.worker.kill()
+        for frame in self.wx.GetTopLevelWindows(): frame.Destroy()
+
+
+class HeadlessPipeline(object):
+    """
+    The stages of runProlog without the GUI: the worker, the result processing and the layout
+    """
+
+    def __init__(self, script):
+        self.worker = PrologWorker(script)
+
+    def __call__(self, file, query, timer):
+        config = graphBuilder.config
+        try:
+            out, err = self.worker.query(file, query, timeout=config.getfloat('QueryTimeout'))
+        except Exception as e:
+            print("Error:", e, file=sys.stderr)
+            return False
+        for name, seconds in self.worker.lastTimings.items(): timer.add(name, seconds)
+        timer.addMemory("worker", self.worker.lastPeak)
+        if (out == "" or out.isspace()): return False
+        with timer.stage("process"):
+            results = graphBuilder.processResults(query, out, verbose=False)
+        with timer.stage("parse"):
+            result = results[-1] if len(results) > 0 else None
+        if (result is None): return False
+        with timer.stage("layout"):
+            layout_pos(result[0], config)
+        return True
+
+    def close(self):
+        self.worker.kill()
+
+
+def main():
+    parser = ArgumentParser(description="Load test of the query pipeline on the mock Prolog backend")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct queries, repeated in turn (0: all distinct)")
+    parser.add_argument("--interval", type=float, default=0.0, help="Seconds between two queries")
+    parser.add_argument("--headless", action="store_true", help="Don't open the Graph UI")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Change a setting of settings.ini for the test, e.g. QueryTimeout=2")
+    for name, value in DEFAULTS.items():
+        parser.add_argument("--"+name, type=type(value), default=None, help="Option of the mock")
+    args = parser.parse_args()
+
+    #The workers of the mock get their options from the environment
+    for name in DEFAULTS:
+        if (getattr(args, name) is not None): os.environ[ENV_PREFIX+name.upper()] = str(getattr(args, name))
+
+    with tempfile.TemporaryDirectory() as directory:
+        overrides = dict(OVERRIDES)
+        for item in args.set:
+            name, sep, value = item.partition("=")
+            if (not sep): parser.error("--set needs NAME=VALUE: "+item)
+            overrides[name.strip()] = value.strip()
+        writeSettings(directory, overrides)
+        graphBuilder.loadConfig()
+
+        #The mock never reads the theory. A new file every run, so the cache of older runs isn't used
+        file = os.path.join(directory, "theory.pl").replace("\\", "/")
+        with open(file, "w") as f:
+            f.write("%% Load test %f\n" % time.time())
+
+        gui = None if args.headless else loadGUI()
+        if (gui is None and not args.headless): print("wxPython is not installed. Running headless\n")
+        pipeline = Pipeline(gui, path+'/mockProlog.py') if gui is not None else HeadlessPipeline(path+'/mockProlog.py')
+
+        distinct = args.distinct if args.distinct > 0 else args.queries
+        timers = []
+        latencies = []
+        failures = 0
+        memory = [currentMemory()]
+        start = time.perf_counter()
+        try:
+            for i in range(args.queries):
+                query = "fly(bird%d)" % (i % distinct)
+                timer = StageTimer(query, file)
+                if (not pipeline(file, query, timer)): failures += 1
+                latencies.append(timer.total())
+                timers.append(timer)
+                memory.append(currentMemory())
+                if (args.interval > 0): time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print("Stopped after "+str(len(timers))+" queries\n")
+        finally:
+            elapsed = time.perf_counter()-start
+            pipeline.close()
+
+    report(timers, latencies, failures, memory, elapsed)
+
+
+def report(timers, latencies, failures, memory, elapsed):
+    """
+    Prints the latency percentiles, the mean time of every stage and the memory growth
+
+    Args:
+        timers (list): The stageTimer.StageTimer of every query
+        latencies (list): The seconds of every query
+        failures (int): The queries without a graph
+        memory (list): The memory (MB) before the test and after every query
+        elapsed (float): The seconds of the test
+    """
+    if (not timers): return
+    latencies = sorted(latencies)
+    print("Queries     %d in %.1fs (%.1f/s), %d failed" % (len(timers), elapsed, len(timers)/elapsed, failures))
+    print("Latency     " + ", ".join("p%d %.1fms" % (p, percentile(latencies, p)*1000) for p in PERCENTILES)
+          + ", max %.1fms" % (latencies[-1]*1000))
+
+    stages = {}
+    for timer in timers:
+        for name, seconds in timer.stages.items(): stages.setdefault(name, []).append(seconds)
+    print("Stages      " + ", ".join("%s %.1fms" % (name, sum(values)/len(timers)*1000) for name, values in stages.items())
+          + " (mean per query)")
+
+    if (memory[0] is not None and memory[-1] is not None):
+        #The growth after the first tenth of the test, when the caches are warm
+        warm = memory[max(1, len(memory)//10)]
+        perQuery = (memory[-1]-warm)/max(1, len(memory)-1-max(1, len(memory)//10))
+        print("Memory      %.0fMB before, %.0fMB after, %+.1fMB in total, %+.3fMB per query after warm up"
+              % (memory[0], memory[-1], memory[-1]-memory[0], perQuery))
+    workers = [timer.memory["worker"] for timer in timers if "worker" in timer.memory]
+    if (workers): print("Worker      peak %.0fMB" % max(workers))
+
+
+if __name__ == "__main__":
+    main()
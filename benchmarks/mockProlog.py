@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import sys, os, gzip, json, time, zlib, random, pathlib
+from argparse import ArgumentParser
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+sys.path.insert(1, str( pathlib.Path(__file__).parent.absolute() ))
+from prologWorker import END_MARKER, QUERY_MARKER, parseQueries
+from stageTimer import peakMemory
+from resultCache import theoryHash
+
+from gorgiasOutput import children, result
+
+# ---------------------------------------------------------------------------- #
+#                              Mock Prolog backend                             #
+# ---------------------------------------------------------------------------- #
+# Stand-in for prolog.py that doesn't need SWI-Prolog. It has the same command
+# line (-f, -q, -r, -x, -b, --worker) and worker protocol, and prints recorded
+# outputs (--replay, e.g. exported outputRAW files) or synthetic ones
+# (gorgiasOutput.py) after a random latency. Some queries can fail or hang.
+# The .pl file is never read. Use it with PrologScript in settings.ini:
+#   PrologScript = benchmarks/mockProlog.py
+# The workers are started without options, so every option can also be set
+# with an environment variable, e.g. MOCK_PROLOG_LATENCY=0.2 for --latency 0.2
+
+#Prefix of the environment variables of the options
+ENV_PREFIX = "MOCK_PROLOG_"
+
+#The default of every option
+DEFAULTS = {"latency":0.05, "jitter":0.02, "startup":0.5, "load":0.1, "nodes":100, "branching":3, "words":6,
+            "results":1, "failRate":0.0, "timeoutRate":0.0, "hang":3600.0, "seed":0, "replay":""}
+
+
+def argumentParser():
+    """
+    Returns:
+        argparse.ArgumentParser: The options of prolog.py and of the mock
+    """
+    def default(name):
+        #MOCK_PROLOG_FAILRATE for failRate
+        value = os.environ.get(ENV_PREFIX+name.upper())
+        if (value is None): return DEFAULTS[name]
+        return type(DEFAULTS[name])(value)
+
+    parser = ArgumentParser(description="Mock of prolog.py that replays recorded or synthetic outputs")
+    #The options of prolog.py
+    parser.add_argument("-f", "--filename", required=False)
+    parser.add_argument("-q", "--query", required=False)
+    parser.add_argument("-r", "--resultVariable", required=False, default="A")
+    parser.add_argument("-x", "--queryFunction", required=False, default="extended_prove_with_tree")
+    parser.add_argument("-w", "--worker", action="store_true",
+                        help="Keep running and read JSON queries from stdin, one per line")
+    parser.add_argument("-b", "--queries-file", required=False, dest="queriesFile",
+                        help="Run every query of the file (one per line)")
+    #The options of the mock
+    parser.add_argument("--latency", type=float, default=default("latency"), help="Mean seconds of a query")
+    parser.add_argument("--jitter", type=float, default=default("jitter"), help="Standard deviation of the latency")
+    parser.add_argument("--startup", type=float, default=default("startup"), help="Seconds to start")
+    parser.add_argument("--load", type=float, default=default("load"), help="Seconds to consult a file")
+    parser.add_argument("--nodes", type=int, default=default("nodes"), help="Nodes of a synthetic result")
+    parser.add_argument("--branching", type=int, default=default("branching"))
+    parser.add_argument("--words", type=int, default=default("words"), help="Words of every description line")
+    parser.add_argument("--results", type=int, default=default("results"), help="Results of every query")
+    parser.add_argument("--failRate", type=float, default=default("failRate"), help="Fraction of queries that fail")
+    parser.add_argument("--timeoutRate", type=float, default=default("timeoutRate"),
+                        help="Fraction of queries that hang for --hang seconds")
+    parser.add_argument("--hang", type=float, default=default("hang"))
+    parser.add_argument("--seed", type=int, default=default("seed"))
+    parser.add_argument("--replay", default=default("replay"),
+                        help="A recorded output (.txt or .txt.gz) or a folder of them, used instead of synthetic ones")
+    return parser
+
+
+class MockBackend(object):
+    """
+    Answers the queries like SWI-Prolog would, with the outputs and delays of the options
+    """
+
+    def __init__(self, args):
+        """
+        Args:
+            args (argparse.Namespace): The options (see argumentParser)
+        """
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.replays = replayFiles(args.replay)
+        self.recorded = {}
+        self.branching = max(args.branching, 1)
+        self.kids = children(max(args.nodes, 1), branching=self.branching)
+        self.loaded = None
+        self.theory = None
+
+    def consult(self, filename, reload=False):
+        """
+        Like prolog.consultFile, the file is loaded again when it or a file it loads changed
+
+        Returns:
+            dict: The "mode" and "seconds" of the load, or None if the file was already loaded
+        """
+        digest = theoryHash(filename)
+        if (filename == self.loaded and digest == self.theory and not reload): return None
+        time.sleep(self.args.load)
+        mode = "make" if filename == self.loaded else "consult"
+        self.loaded, self.theory = filename, digest
+        return {"mode":mode, "seconds":self.args.load}
+
+    def query(self, q):
+        """
+        Waits for the latency of the query and returns its output
+
+        Args:
+            q (str): The query
+
+        Raises:
+            RuntimeError: If the query fails
+
+        Returns:
+            str: The printed output
+        """
+        args = self.args
+        roll = self.rng.random()
+        if (roll < args.failRate):
+            raise RuntimeError("Unknown procedure: mock_failure/1 in "+q)
+        if (roll < args.failRate+args.timeoutRate):
+            time.sleep(args.hang)
+        time.sleep(max(0.0, self.rng.gauss(args.latency, args.jitter)))
+
+        if (self.replays):
+            #The same query always gets the same recording
+            return self.recording(self.replays[zlib.crc32(q.encode()) % len(self.replays)])
+        #The descriptions depend on the query, so every query has its own output
+        rng = random.Random(zlib.crc32(q.encode()) ^ args.seed)
+        lines = []
+        for i in range(args.results):
+            lines += result(q, self.kids, args.words, rng)
+        return "\n".join(lines)+"\n"
+
+    def recording(self, filename):
+        """
+        Returns:
+            str: The content of a recorded output. Read once
+        """
+        if (filename not in self.recorded):
+            opener = gzip.open if filename.endswith(".gz") else open
+            with opener(filename, "rt", encoding="utf-8") as f:
+                self.recorded[filename] = f.read()
+        return self.recorded[filename]
+
+
+def replayFiles(replay):
+    """
+    Args:
+        replay (str): A recorded output or a folder of them. Empty for none
+
+    Returns:
+        list: The recorded outputs, sorted
+    """
+    if (not replay): return []
+    if (os.path.isdir(replay)):
+        return sorted(entry.path for entry in os.scandir(replay) if entry.name.endswith((".txt", ".txt.gz")))
+    return [replay]
+
+
+def runWorker(backend, started):
+    """
+    Serves the queries of stdin like prolog.runWorker
+    """
+    startup = time.perf_counter()-started
+    while True:
+        request = sys.stdin.readline()
+        if (request == ""): break #stdin closed
+        if (request.isspace()): continue
+
+        status = {"error":None}
+        timings = status["timings"] = {}
+        if (startup is not None):
+            timings["startup"], startup = startup, None
+        try:
+            request = json.loads(request)
+            load = backend.consult(request["filename"], request.get("reload",False))
+            if (load is not None):
+                status["load"] = load
+                timings["load"] = load["seconds"]
+            status["theory"] = backend.theory
+            start = time.perf_counter()
+            if ("query" in request):
+                sys.stdout.write(backend.query(request["query"]))
+                timings["query"] = time.perf_counter()-start
+        except Exception as e:
+            status["error"] = str(e)
+
+        sys.stdout.flush()
+        status["peakMB"] = peakMemory()
+        print("\n"+END_MARKER+json.dumps(status), flush=True)
+
+
+def main():
+    started = time.perf_counter()
+    parser = argumentParser()
+    args = parser.parse_args()
+    time.sleep(args.startup)
+    backend = MockBackend(args)
+
+    if (args.worker):
+        runWorker(backend, started)
+        return
+    if (args.filename is None):
+        parser.error("the following arguments are required: -f/--filename")
+    if (args.query is None and args.queriesFile is None):
+        parser.error("one of the arguments -q/--query -b/--queries-file is required")
+    backend.consult(args.filename)
+
+    if (args.queriesFile is not None):
+        with open(args.queriesFile) as f:
+            queries = parseQueries(f.read())
+    else:
+        queries = [args.query]
+
+    for q in queries:
+        #Batch mode. Every output starts with a QUERY_MARKER line
+        if (args.queriesFile is not None): print("\n"+QUERY_MARKER+q, flush=True)
+        try:
+            sys.stdout.write(backend.query(q))
+        except Exception as e:
+            print(e,file=sys.stderr)
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import threading
+
+
+class ConsoleBuffer(object):
+    """
+    The text that the threads wrote and the console hasn't shown yet. Consecutive writes of a stream
+    are joined, and the oldest text is dropped when there is more than the console keeps anyway
+    """
+
+    def __init__(self, maxChars=1000000):
+        """
+        Args:
+            maxChars (int, optional): The max number of characters of the console. Defaults to 1000000.
+        """
+        self.maxChars = maxChars
+        #The (isError, strings) waiting for the next update
+        self.pending = []
+        self.pendingSize = 0
+        self.scheduled = False
+        self.lock = threading.Lock()
+
+    def write(self, string, error=False):
+        """
+        Queues a text. Can be called from any thread
+
+        Args:
+            string (str): The text
+            error (bool, optional): The text is an error. Defaults to False.
+
+        Returns:
+            bool: True if it's the first text since the last take, so an update of the console should be scheduled
+        """
+        if (not string): return False
+        with self.lock:
+            if (self.pending and self.pending[-1][0] == error): self.pending[-1][1].append(string)
+            else: self.pending.append((error, [string]))
+            self.pendingSize += len(string)
+            #The console would drop the oldest text anyway
+            while (len(self.pending) > 1 and self.pendingSize > self.maxChars):
+                self.pendingSize -= sum(len(text) for text in self.pending.pop(0)[1])
+            schedule = not self.scheduled
+            self.scheduled = True
+        return schedule
+
+    def take(self):
+        """
+        Returns:
+            list: The (isError, text) of the queued texts, in the order they were written. The queue is emptied
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+            self.pendingSize = 0
+            self.scheduled = False
+        return [(error, ''.join(strings)) for error, strings in pending]
+
+
+def trimEnd(length, maxChars, getRange):
+    """
+    Where to cut the oldest text of a console that is too long. A tenth more than needed is cut,
+    so it's not done on every update, up to the end of the line if it's within 1000 characters
+
+    Args:
+        length (int): The number of characters of the console
+        maxChars (int): The max number of characters of the console
+        getRange (function): Returns the text between two positions, like wx.TextCtrl.GetRange
+
+    Returns:
+        int: The number of characters to remove from the start. 0 if the console isn't too long
+    """
+    if (length <= maxChars): return 0
+    end = length - maxChars + maxChars//10
+    lineEnd = getRange(end, min(end+1000, length)).find('\n')
+    return end+lineEnd+1 if lineEnd >= 0 else end
@@ -0,0 +1,85 @@
+import sys, os, time, threading
+
+from resultCache import theoryFiles
+
+
+class FileWatcher(object):
+    """
+    Watches a .pl file and the files it loads (consult/include/ensure_loaded) by polling their
+    modified time and size. The callback is called from the watcher thread once the files stop
+    changing for `debounce` seconds, so an editor that saves many times in a row triggers it once.
+    """
+
+    def __init__(self, file, callback, interval=0.5, debounce=0.3):
+        """
+        Args:
+            file (str): The path to the .pl file
+            callback (function): Called with the list of the changed files
+            interval (float, optional): Seconds between two checks of the files. Defaults to 0.5.
+            debounce (float, optional): Seconds without changes before the callback is called. Defaults to 0.3.
+        """
+        self.file = file
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Starts watching. The files as they are now are not reported
+        """
+        #Every thread has its own event, so a thread of an earlier start that is still waiting stops too
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(self.stopped,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops watching. Can be called from any thread, also from the callback
+        """
+        self.stopped.set()
+
+    def isAlive(self):
+        """
+        Returns:
+            bool: If the watcher thread is running
+        """
+        return self.thread is not None and self.thread.is_alive() and not self.stopped.is_set()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: The (mtime, size) of every file of the theory. None for the files that can't be read
+        """
+        files = {}
+        for filename in theoryFiles(self.file):
+            try:
+                stat = os.stat(filename)
+                files[filename] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                files[filename] = None
+        return files
+
+    def run(self, stopped):
+        """
+        Args:
+            stopped (threading.Event): Set when this thread must stop
+        """
+        known = self.snapshot()
+        changed = set()
+        lastChange = None
+        while not stopped.wait(self.interval if lastChange is None else min(self.interval, self.debounce)):
+            current = self.snapshot()
+            if (current != known):
+                changed.update(filename for filename in set(known) | set(current)
+                               if known.get(filename) != current.get(filename))
+                known = current
+                lastChange = time.monotonic()
+            elif (lastChange is not None and time.monotonic()-lastChange >= self.debounce):
+                #The files didn't change for a while. The save is finished
+                files, changed, lastChange = sorted(changed), set(), None
+                try:
+                    self.callback(files)
+                except Exception as e:
+                    print("Error in file watcher:",e,file=sys.stderr)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+import sys, json, pathlib
+from argparse import ArgumentParser
+from xml.sax.saxutils import escape
+
+import graphBuilder
+from graphBuilder import processResult, batchSummary
+from graphLayout import layout_pos
+from prologWorker import PrologWorker, PrologPool, parseQueries, evaluate, loadSummary, prologScript
+
+# ---------------------------------- Globals --------------------------------- #
+#Local path
+path = str( pathlib.Path(__file__).parent.absolute() )
+
+#Pixels per world unit of the svg output
+svgScale = 100
+
+# ---------------------------------------------------------------------------- #
+#                                Headless CLI                                  #
+# ---------------------------------------------------------------------------- #
+# Produces the graphs without wxPython. Usage:
+#   python gorgiasCLI.py run -f theory.pl -q "fly(tweety)" --format json|dot|svg [-o file]
+#   python gorgiasCLI.py batch -f theory.pl -b queries.txt
+
+
+def main():
+    parser = ArgumentParser(description="Gorgias-Visual without a display")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run = commands.add_parser("run", help="Run a query and print its graph")
+    run.add_argument("-f", "--filename", required=True)
+    run.add_argument("-q", "--query", required=True)
+    run.add_argument("--format", choices=["json","dot","svg"], default="json")
+    run.add_argument("-o", "--output", required=False, help="Write the graph to a file instead of stdout")
+
+    batch = commands.add_parser("batch", help="Run the queries of a file and print a summary table")
+    batch.add_argument("-f", "--filename", required=True)
+    batch.add_argument("-b", "--queries-file", required=True, dest="queriesFile")
+    batch.add_argument("--format", choices=["table","json"], default="table")
+
+    args = parser.parse_args()
+    graphBuilder.loadConfig()
+    if (args.command == "run"):
+        sys.exit(runCommand(args))
+    else:
+        sys.exit(batchCommand(args))
+
+
+def runCommand(args):
+    """
+    Runs a query and writes its graph
+
+    Args:
+        args (argparse.Namespace): The arguments of the run command
+
+    Returns:
+        int: The exit code
+    """
+    worker = PrologWorker(prologScript(graphBuilder.config))
+    try:
+        out, err = worker.query(args.filename, args.query, timeout=graphBuilder.config.getfloat('QueryTimeout'))
+    except Exception as e:
+        print("Error:",e,file=sys.stderr)
+        return 1
+    finally:
+        worker.kill()
+    #The timing goes to stderr, stdout may be the graph
+    if (worker.lastLoad is not None): print(loadSummary(args.filename, worker.lastLoad), file=sys.stderr)
+
+    if (out == "" or out.isspace()):
+        print("Error",err if err and not err.isspace() else "PROLOG response was empty. Check your input values.",
+              file=sys.stderr)
+        return 1
+    result = processResult(args.query,out,verbose=False)
+    if (result is None): return 1
+
+    DG, holds, isFact = result
+    if (args.format == "json"): text = graphToJSON(DG,args.query,holds,isFact)
+    elif (args.format == "dot"): text = graphToDot(DG,args.query,holds,isFact)
+    else: text = graphToSVG(DG,args.query,holds,isFact)
+
+    if (args.output):
+        with open(args.output,"w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+def batchCommand(args):
+    """
+    Runs the queries of a file on a pool of workers and prints the result of each one
+
+    Args:
+        args (argparse.Namespace): The arguments of the batch command
+
+    Returns:
+        int: The exit code. 1 if any query failed
+    """
+    with open(args.queriesFile) as f:
+        queries = parseQueries(f.read())
+
+    pool = PrologPool(graphBuilder.config.getint('PoolWorkers'),prologScript(graphBuilder.config))
+    try:
+        rows = evaluate(pool,args.filename,queries,timeout=graphBuilder.config.getfloat('QueryTimeout'),
+                        export=graphBuilder.exportResult)
+    finally:
+        pool.close()
+
+    if (args.format == "json"):
+        print(json.dumps([{"query":query,
+                           "holds":result[1] if result else None,
+                           "isFact":result[2] if result else None,
+                           "error":None if result else err.strip()} for query, result, err in rows], indent=1))
+    else:
+        print(batchSummary([(query, result) for query, result, err in rows]))
+    return 0 if all(result is not None for query, result, err in rows) else 1
+
+
+# ---------------------------------------------------------------------------- #
+#                                   Formats                                    #
+# ---------------------------------------------------------------------------- #
+
+
+def layout(DG):
+    """
+    Args:
+        DG (networkx.DiGraph): The graph
+
+    Returns:
+        dict: The node positions, with the settings of the Graph UI
+    """
+    return layout_pos(DG, graphBuilder.config)
+
+
+def graphToJSON(DG, query, holds, isFact):
+    """
+    Args:
+        DG (networkx.DiGraph): The graph
+        query (str): The query
+        holds (bool): If the argument holds
+        isFact (bool): If the argument is a fact
+
+    Returns:
+        str: The graph with its node positions as JSON
+    """
+    positions = layout(DG)
+    return json.dumps({"query":query, "holds":holds, "isFact":isFact,
+                       "nodes":[{"id":node, "description":DG.nodes[node].get("description",""),
+                                 "x":positions[node][0], "y":positions[node][1]} for node in DG.nodes],
+                       "edges":[{"source":u, "target":v} for u, v in DG.edges]}, indent=1)
+
+
+def graphToDot(DG, query, holds, isFact):
+    """
+    Args:
+        DG (networkx.DiGraph): The graph
+        query (str): The query
+        holds (bool): If the argument holds
+        isFact (bool): If the argument is a fact
+
+    Returns:
+        str: The graph in the Graphviz dot language
+    """
+    def quote(text):
+        return '"'+str(text).replace('\\','\\\\').replace('"','\\"').replace('\n','\\n')+'"'
+
+    config = graphBuilder.config
+    root = next(iter(DG.nodes))
+    lines = ["digraph "+quote(query)+" {",
+             "  rankdir="+("BT" if config.getboolean('TreeGrowDirectionDown') else "TB")+";",
+             "  node [style=filled, fillcolor="+quote(config.get('NormalNodeColor'))+"];"]
+    for node in DG.nodes:
+        attributes = "tooltip="+quote(DG.nodes[node].get("description",""))
+        if (node == root):
+            attributes += ", fillcolor="+quote(config.get('AcceptNodeColor') if holds else config.get('RejectNodeColor'))
+        lines.append("  "+quote(node)+" ["+attributes+"];")
+    for u, v in DG.edges:
+        lines.append("  "+quote(u)+" -> "+quote(v)+";")
+    lines.append("}")
+    return '\n'.join(lines)
+
+
+def graphToSVG(DG, query, holds, isFact):
+    """
+    Args:
+        DG (networkx.DiGraph): The graph
+        query (str): The query
+        holds (bool): If the argument holds
+        isFact (bool): If the argument is a fact
+
+    Returns:
+        str: The graph as an SVG image, drawn like the Graph UI
+    """
+    config = graphBuilder.config
+    nodeSize = config.getint('NodeSize')
+    margin = nodeSize
+    positions = layout(DG)
+
+    #World to pixel coordinates (y grows down in svg)
+    xs = [pos[0] for pos in positions.values()]
+    ys = [pos[1] for pos in positions.values()]
+    minX, maxY = min(xs), max(ys)
+    def pixel(node):
+        return (positions[node][0]-minX)*svgScale+margin, (maxY-positions[node][1])*svgScale+margin+40
+    width = (max(xs)-minX)*svgScale+margin*2
+    height = (maxY-min(ys))*svgScale+margin*2+40
+
+    if (isFact): title = "Argument "+query+" is a Fact"
+    elif (holds): title = "Argument "+query+" Holds"
+    else: title = "Argument "+query+" does not Hold"
+
+    root = next(iter(DG.nodes))
+    svg = ['<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d">' % (width, height),
+           '<defs><marker id="arrow" markerWidth="10" markerHeight="10" refX="10" refY="5" orient="auto">'
+           '<path d="M0,0 L10,5 L0,10 z"/></marker></defs>',
+           '<rect width="100%%" height="100%%" fill="%s"/>' % config.get('BackgroundColor'),
+           '<text x="%d" y="24" text-anchor="middle" font-size="%d" font-weight="bold">%s</text>'
+           % (width/2, config.getint('TitleTextSize'), escape(title))]
+    for u, v in DG.edges:
+        (x1, y1), (x2, y2) = pixel(u), pixel(v)
+        #Stop the line at the border of the target node
+        dx, dy = x2-x1, y2-y1
+        length = max((dx*dx+dy*dy)**0.5, 1)
+        x2, y2 = x2-dx/length*nodeSize/2, y2-dy/length*nodeSize/2
+        svg.append('<line x1="%.1f" y1="%.1f" x2="%.1f" y2="%.1f" stroke="black" stroke-width="%d" '
+                   'marker-end="url(#arrow)"/>' % (x1, y1, x2, y2, config.getint('ArrowLineSize')))
+    for node in DG.nodes:
+        x, y = pixel(node)
+        if (node == root): color = config.get('AcceptNodeColor') if holds else config.get('RejectNodeColor')
+        else: color = config.get('NormalNodeColor')
+        svg.append('<g><title>%s</title><circle cx="%.1f" cy="%.1f" r="%d" fill="%s"/>'
+                   '<text x="%.1f" y="%.1f" text-anchor="middle" dominant-baseline="central" '
+                   'font-size="%d" font-weight="bold" fill="%s">%s</text></g>'
+                   % (escape(DG.nodes[node].get("description","")), x, y, nodeSize/2, color,
+                      x, y, config.getint('NodeTextSize'), config.get('NodeTextColor'), escape(str(node))))
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,161 @@
-
-import pathlib, traceback, configparser
+import sys, os, zlib, pathlib, traceback, json, gzip
 import networkx as nx
 
+import settings
+from resultExport import ResultExporter
+
+#Format name and version in the header of the saved graphs
+GRAPH_FORMAT = "gorgias-visual-graph"
+GRAPH_VERSION = 1
+
 #Globals
 path = str( pathlib.Path(__file__).parent.absolute() )
 query = ""
 config = None
+#Writes the exported results in the background, and the settings it was created with
+exporter = None
+exporterOptions = None
 argumentIsFact = False
 argumentHolds  = False
 DG = nx.DiGraph()
 
 
-def processResult(q,result):
+def processResult(q,result,verbose=True):
     """
     Processes the results from SWI-Prolog and returns the Directed Graph, if the argument holds and if it's a fact.
+    When there are multiple results the last one is returned. Use processResults to get all of them
 
     Args:
         q (str): The query
         result (str): The result of the query Swi-Prolog returned
+        verbose (bool, optional): Print the result to the console (if enabled in the settings). Defaults to True.
 
     Returns:
         nx.Digraph: The Directed Graph of the result
         bool: If the argument holds
         bool: If the argument is a fact
     """
+    results = processResults(q,result,verbose)
+    if (len(results) == 0): return None
+
+    global DG, argumentHolds, argumentIsFact
+    last = results[-1]
+    if (last is not None): DG, argumentHolds, argumentIsFact = last
+    return last
+
+
+def processResults(q,result,verbose=True):
+    """
+    Processes the results from SWI-Prolog and returns all of them. Each result is translated to a graph 
+    only when it's accessed
+
+    Args:
+        q (str): The query
+        result (str): The result of the query Swi-Prolog returned
+        verbose (bool, optional): Print the result to the console (if enabled in the settings). Defaults to True.
+
+    Returns:
+        ResultList: The lazy list of the (DiGraph, holds, isFact) of every result
+    """
     loadConfig()
-    printRawResult = config.getboolean('printRawResult')
-    printCompactResult = config.getboolean('printCompactResult')
-    exportRaw = config.getboolean('ExportRAW')
-    export = config.getboolean('Export')
     
     global query
     query = q
-    
-    result = result.strip()
-    if(printRawResult): print(result+'\n')
-
-    # Export the RAW result in a text file
-    if (exportRaw):
-        with open(path+"/outputRAW.txt","w+") as f:
-            f.write(result)
-            f.close
 
     #Format results to remove excess spaces and convert it to a list for calculations
-    resultListFormatted = resultFormatter(result)
+    resultListFormatted = list(formatLines(result.splitlines()))
+    outputResult(q,result,verbose,resultListFormatted)
     
-    #Convert formatted result back to string for printing and saving to file
-    resultStringFormatted = '\n'.join(resultListFormatted)
-    if(printCompactResult): print(resultStringFormatted+'\n')
-
-    # Export the formated result in a text file
-    if (export):
-        with open(path+"/output.txt","w+") as f:
-            f.write(resultStringFormatted)
-            f.close
+    results = ResultList(q,resultListFormatted,config.getboolean('namedNodes'))
+    if (verbose):
+        if (len(results) > 1):
+            print ("--------"+str(len(results))+" results. Showing Last--------\n")
+        else:
+            print ("---------------------------------------------\n")
+    return results
     
-    #Build Graph and return
-    if (translator(resultListFormatted)):
-        return DG, argumentHolds, argumentIsFact
+
+def outputResult(q,result,verbose=True,lines=None):
+    """
+    Prints the raw and the compact result (printRawResult and printCompactResult in the settings) and exports them.
+    Also used for the cached results, which are not processed again
+
+    Args:
+        q (str): The query
+        result (str): The result of the query Swi-Prolog returned
+        verbose (bool, optional): Print the result to the console (if enabled in the settings). Defaults to True.
+        lines (list, optional): The formatted lines of the result. Formatted when needed if not given.
+    """
+    if (config is None): loadConfig()
+    if (verbose and config.getboolean('printRawResult')): print(result.strip()+'\n')
+    #Convert formatted result back to string for printing
+    if (verbose and config.getboolean('printCompactResult')):
+        if (lines is None): lines = list(formatLines(result.splitlines()))
+        print('\n'.join(lines)+'\n')
+
+    #Export the RAW and the formated result in text files, in the background
+    exportResult(q,result,lines)
+
+
+def exportResult(q,result,lines=None):
+    """
+    Queues the export of a result to text files (Export and ExportRAW in the settings).
+    The files are written by a background thread
+
+    Args:
+        q (str): The query
+        result (str): The result of the query Swi-Prolog returned
+        lines (list, optional): The formatted lines of the result. Formatted in the background if not given.
+    """
+    if (config is None): loadConfig()
+    exportRaw = config.getboolean('ExportRAW')
+    export = config.getboolean('Export')
+    if (not exportRaw and not export): return
     
+    writer = getExporter()
+    if (exportRaw): writer.export("outputRAW",lambda: result.strip(),q)
+    if (export):
+        if (lines is None): writer.export("output",lambda: '\n'.join(formatLines(result.splitlines())),q)
+        else: writer.export("output",lambda: '\n'.join(lines),q)
+
+
+def getExporter():
+    """
+    Creates the exporter with the settings, or recreates it if they changed
+
+    Returns:
+        ResultExporter: The exporter
+    """
+    global exporter, exporterOptions
+    options = (config.get('ExportFolder', fallback='').strip() or path, 
+               config.getboolean('ExportTimestamped', fallback=False), 
+               config.get('ExportCompression', fallback='none'), 
+               config.getint('ExportKeepFiles', fallback=0), 
+               config.getfloat('ExportKeepDays', fallback=0))
+    if (exporter is None or exporterOptions != options):
+        if (exporter is not None): exporter.close()
+        exporter = ResultExporter(*options)
+        exporterOptions = options
+    return exporter
+
+
+def parseResult(q,result):
+    """
+    Processes the results from SWI-Prolog without printing or exporting them.
+    Used by the parallel batch to parse the results in the threads of the pool, so it doesn't change the globals
+
+    Args:
+        q (str): The query
+        result (str): The result of the query Swi-Prolog returned
+
+    Returns:
+        tuple: The (DiGraph, holds, isFact) of the result or None if the translation failed
+    """
+    if (config is None): loadConfig()
+
+    results = ResultList(q,list(formatLines(result.splitlines())),config.getboolean('namedNodes'))
+    return results[-1] if len(results) > 0 else None
+
 
 def resultFormatter(result):
     """
@@ -82,156 +179,398 @@ def resultFormatter(result):
     return list3
 
 
-def translator(textList):
+def formatLines(lines):
     """
-    Translates the text result of the SWI-Prolog query to a networkx DiGraph
+    Streaming version of resultFormatter(result.strip()). Formats the lines one at a time
 
     Args:
-        textList (list): A list of strings
+        lines (iterable): The lines of the result, without line endings
+
+    Yields:
+        str: The formatted lines
+    """    
+    held = None #The last line is held back because it must be right stripped
+    blanks = 0  #Empty lines are kept only if a non empty line follows
+    for item in lines:
+        if (item == ""):
+            if (held is not None): blanks += 1
+            continue
+        if item.isspace(): continue
+        if (item.find("RESULT:") != -1): #sometimes the RESULT: line has unwanted spaces on its left
+            item = item.lstrip()
+        elif (held is None):
+            item = item.lstrip() #the result is stripped
+        if (held is not None):
+            yield held
+            for i in range(blanks): yield ""
+        held = item
+        blanks = 0
+    if (held is not None):
+        yield held.rstrip()
+
+
+def translator(textList,verbose=True):
+    """
+    Translates the text result of the SWI-Prolog query to a networkx DiGraph.
+    The lines are parsed in a single pass, so textList can be any iterable (e.g. formatLines)
+
+    Args:
+        textList (iterable): The formatted lines
+        verbose (bool, optional): Print the result separator. Defaults to True.
 
     Returns:
         bool: Translation successful
     """  
-    namedNodes = config.getboolean('namedNodes')
-    # -------------------------- 0 Find how many results ------------------------- #
-    results = 0
-    startLine = 0
-    for line in range(len(textList)) :
-        if (textList[line].find("RESULT") != -1): 
-            startLine = line
-            results = results + 1
-    
-    #Set line for section 3
-    if (results > 1):
-        print ("--------Multiple results. Taking Last--------\n")
-        line = startLine + 2
-    else:
-        print ("---------------------------------------------\n")
-        line = 2  #line 3-1=2
-    
-      
-    # --------------------------------- 1 Result --------------------------------- #
-    global argumentHolds
-    if textList[startLine].endswith('holds.'):
-        argumentHolds = True
-    else:
-        argumentHolds = False
-    
-    # ---------------------------------- 2 Root ---------------------------------- #
-    global DG
-    DG = nx.DiGraph() #To Clear data. clear() is not working correctly
-
-    #Check if its a fact
-    global argumentIsFact
-    if (textList[startLine+1].rstrip().endswith("by")):
-        argumentIsFact = True
-        #Add root and return
-        DG.add_nodes_from([(query,{"description":textList[startLine+1].lstrip().rstrip()})])
-        return True
+    parser = ResultParser(query,config.getboolean('namedNodes'))
+    for line in textList:
+        parser.feed(line)
+    result = parser.close()
+
+    if (parser.results > 1):
+        if (verbose): print ("--------Multiple results. Taking Last--------\n")
     else:
-        argumentIsFact = False
-    
-    #Check if holds and directly supported by fact
-    if (argumentHolds and len(textList[startLine:]) == 3 ):
-        argumentIsFact = False
-        DG.add_nodes_from([(query, {"description":textList[startLine+1].split('|',1)[-1].lstrip().rstrip()+"\n" 
-                                   + textList[startLine+2].split('|',1)[-1].lstrip().rstrip()})])
-        return True
+        if (verbose): print ("---------------------------------------------\n")
 
-    
-    
-    #Add root
-    root = textList[startLine + 1].split(':',1)[0].split('(',1)[0].lstrip()
-    DG.add_nodes_from([(query if namedNodes else root,{"description":textList[startLine + 1].lstrip().rstrip()})])
-    
-    
-    
-    # ---------------------------------- 3 Nodes --------------------------------- #
-    
-    nodeList = [query if namedNodes else root]
-    nodeDepth = 0
-    indexDict = {0:0} # At depth 0 index "|" is at 0
+    if (result is None): return False
+    global DG, argumentHolds, argumentIsFact
+    DG, argumentHolds, argumentIsFact = result
+    return True
 
-    try:
-        listlength = len(textList)
-        while (line <  listlength):
-            nextIndex = textList[line].find("|")
-            if (nextIndex == -1): break
-            
+
+class ResultParser(object):
+    """
+    Single-pass parser of the formatted SWI-Prolog result. The lines are fed one at a time and
+    the nodes/edges are added to the DiGraph as soon as they are complete. 
+    When there are multiple results the last one is kept
+
+    The result has the form:
+        RESULT: <query> holds.                      Result line
+        <root rule>: <description>                  Root line
+          |<rule>: <description> <conclusion>.      3 lines per node. The column of "|" is the depth
+          |<description>
+          |<description>
+    """    
+
+    def __init__(self, q, namedNodes=False):
+        """
+        Args:
+            q (str): The query
+            namedNodes (bool, optional): Use rule names instead of rule labels. Defaults to False.
+        """        
+        self.query = q
+        self.namedNodes = namedNodes
+        self.results = 0 #Number of RESULT lines
+        self.block = None
+
+    def feed(self, line):
+        """
+        Args:
+            line (str): The next formatted line
+        """        
+        if ("RESULT" in line):
+            self.results += 1
+            self.block = _ResultBlock(self.query, self.namedNodes, line)
+        elif (self.block is None):
+            #No RESULT line before. The first line is used as the result line
+            self.block = _ResultBlock(self.query, self.namedNodes, line)
+        else:
+            self.block.feed(line)
+
+    def close(self):
+        """
+        Returns:
+            tuple: The (DiGraph, holds, isFact) of the last result or None if the translation failed
+        """        
+        if (self.block is None): return None
+        return self.block.close()
+
+
+class ResultList(object):
+    """
+    Lazy list of all the results in the output of a query. The lines are scanned once for the RESULT lines
+    and each result is translated to a DiGraph on its first access
+
+    Items are the (DiGraph, holds, isFact) of each result or None if its translation failed
+    """    
+
+    def __init__(self, q, lines, namedNodes=False):
+        """
+        Args:
+            q (str): The query
+            lines (list): The formatted lines of the output
+            namedNodes (bool, optional): Use rule names instead of rule labels. Defaults to False.
+        """        
+        self.query = q
+        self.lines = lines
+        self.namedNodes = namedNodes
+        self.starts = [index for index, line in enumerate(lines) if "RESULT" in line]
+        if (not self.starts and lines): self.starts = [0] #No RESULT line. The first line is used as the result line
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if (index < 0): index += len(self.starts)
+        if (index < 0 or index >= len(self.starts)): raise IndexError("result index out of range")
+        if (index not in self.cache):
+            start = self.starts[index]
+            end = self.starts[index+1] if index+1 < len(self.starts) else len(self.lines)
+            block = _ResultBlock(self.query, self.namedNodes, self.lines[start])
+            for i in range(start+1, end):
+                block.feed(self.lines[i])
+            self.cache[index] = block.close()
+        return self.cache[index]
+
+    def __iter__(self):
+        for index in range(len(self.starts)):
+            yield self[index]
+
+
+class _ResultBlock(object):
+    """
+    The parsing state of a single RESULT
+    """    
+
+    def __init__(self, q, namedNodes, resultLine):
+        self.query = q
+        self.namedNodes = namedNodes
+        self.lines = 1 #Number of lines in the block
+        self.holds = resultLine.endswith('holds.')
+        self.isFact = False
+        self.failed = False
+        self.done = False #Stop at the first line without "|"
+        self.stopped = False #isFact or failed or done
+        self.rootLine = None
+        self.group = [] #The lines of the current node
+        self.DG = nx.DiGraph()
+
+        self.nodeList = []
+        self.nodeDepth = 0
+        self.indexDict = {0:0} # At depth 0 index "|" is at 0
+
+    def feed(self, line):
+        self.lines += 1
+        if (self.lines == 2):
+            self.root(line)
+        elif (not self.stopped):
+            group = self.group
+            group.append(line)
+            if (len(group) == 3):
+                self.node(group)
+                self.group = []
+
+    def root(self, line):
+        self.rootLine = line
+        #Check if its a fact
+        if (line.rstrip().endswith("by")):
+            self.isFact = self.stopped = True
+            self.DG.add_nodes_from([(self.query,{"description":line.strip()})])
+            return
+        #Add root
+        root = line.split(':',1)[0].split('(',1)[0].lstrip()
+        self.nodeList.append(self.query if self.namedNodes else root)
+        self.DG.add_nodes_from([(self.nodeList[0],{"description":line.strip()})])
+
+    def node(self, group):
+        line = group[0]
+        try:
+            nextIndex = line.find("|")
+            if (nextIndex == -1):
+                self.done = self.stopped = True
+                return
+
+            indexDict = self.indexDict
+            nodeList = self.nodeList
+            nodeDepth = self.nodeDepth
 
             #Next Node is Left (No other child node)
             #go back until you find the previous node
             if (nextIndex < indexDict[nodeDepth]):
-                while ( textList[line][indexDict[nodeDepth]]  != "|" ):
+                while ( line[indexDict[nodeDepth]] != "|" ):
                     nodeDepth -= 1
                     nodeList.pop()
+                self.nodeDepth = nodeDepth
 
+            #Next Node is Right (attacking, child node): increase depth
+            #Next Node is at the same Position/Depth (both have the same parent, sibling node): replace the last node
+            if (nextIndex > indexDict[nodeDepth]):
+                nodeDepth = self.nodeDepth = nodeDepth + 1
+                indexDict[nodeDepth] = nextIndex
+                nodeList.append(None)
+            elif (nextIndex != indexDict[nodeDepth]):
+                return
+            
+            if (self.namedNodes):
+                words = line.rsplit(" ",2)
+                nodeTitle = "not "+words[-1][:-1] if words[-2]=="not" else words[-1][:-1]
+            else:
+                nodeTitle = line.partition(':')[0].partition('(')[0].lstrip()[1:]
+            nodeList[nodeDepth] = nodeTitle
 
+            #Add to graph. The description has up to 3 lines
+            DG = self.DG
+            if (nodeTitle not in DG):
+                DG.add_node(nodeTitle, description='\n'.join([item.split('|',1)[-1].strip() for item in group]))
+            DG.add_edge(nodeTitle, nodeList[nodeDepth-1])
+        except Exception:
+            traceback.print_exc()
+            self.failed = self.stopped = True
 
-            #Next Node is Right (attacking, child node)
-            if (nextIndex > indexDict[nodeDepth]):
-                #increase depth
-                nodeDepth += 1
-                indexDict[nodeDepth]=nextIndex
-
-                #add new depth node
-                if (namedNodes):
-                    nodeTitle = ("not "+textList[line].split(" ")[-1][:-1] if textList[line].split(" ")[-2]=="not" 
-                                 else textList[line].split(" ")[-1][:-1])
-                else:
-                    nodeTitle = textList[line].split(':',1)[0].split('(',1)[0].lstrip()[1:]
-                nodeList.append(nodeTitle)
-                
-                #Create Description
-                nodeDescription = ""
-                i = 0
-                while (True):
-                    #Break when 1) end of list 2) more than 3 lines of description 
-                    # 3) no "|" in the string so not a description line
-                    if (line+i >= listlength or i == 3 or (not textList[line].find("|") == nextIndex)): break 
-                    nodeDescription = nodeDescription + textList[line+i].split('|',1)[-1].lstrip().rstrip()+"\n"
-                    i = i + 1
-                nodeDescription = nodeDescription[0:-1] # remove last /n
-                
-                #Add to graph
-                if (nodeList[nodeDepth] not in DG.nodes): 
-                    DG.add_nodes_from([ ( nodeList[nodeDepth], {"description":nodeDescription} ) ])
-                DG.add_edge(nodeList[nodeDepth], nodeList[nodeDepth-1])
-
-            #Next Node is at the same Position/Depth (both have the same parent, sibling node)
-            elif (nextIndex == indexDict[nodeDepth]):
-                #nodeDepth doesn't change
-
-                #replace the last node
-                if (namedNodes):
-                    nodeTitle = ("not "+textList[line].split(" ")[-1][:-1] if textList[line].split(" ")[-2]=="not" 
-                                 else textList[line].split(" ")[-1][:-1])
-                else:
-                    nodeTitle = textList[line].split(':',1)[0].split('(',1)[0].lstrip()[1:]
-                nodeList[nodeDepth] = nodeTitle
-                
-                #Create Description
-                nodeDescription = ""
-                i = 0
-                while (True):
-                    #Break when 1) end of list 2) more than 3 lines of description 
-                    # 3) no "|" in the string so not a description line
-                    if (line+i >= listlength or i == 3 or (not textList[line].find("|") == nextIndex)): break 
-                    nodeDescription = nodeDescription + textList[line+i].split('|',1)[-1].lstrip().rstrip()+"\n"
-                    i = i + 1
-                nodeDescription = nodeDescription[0:-1] # remove last /n
-                
-                #Add to graph 
-                if (nodeList[nodeDepth] not in DG.nodes): 
-                    DG.add_nodes_from([ ( nodeList[nodeDepth], {"description":nodeDescription} ) ])
-                DG.add_edge(nodeList[nodeDepth], nodeList[nodeDepth-1])
-
-            line += 3   
+    def close(self):
+        """
+        Returns:
+            tuple: The (DiGraph, holds, isFact) or None if the translation failed
+        """        
+        if (self.rootLine is None):
+            print("Result has no root line",file=sys.stderr)
+            return None
+        if (self.isFact): return self.DG, self.holds, True
+
+        #Check if holds and directly supported by fact
+        if (self.holds and self.lines == 3):
+            DG = nx.DiGraph()
+            DG.add_nodes_from([(self.query, {"description":self.rootLine.split('|',1)[-1].strip()+"\n" 
+                                            + self.group[0].split('|',1)[-1].strip()})])
+            return DG, True, False
+
+        #Last node may have less than 3 lines
+        if (self.group and not self.stopped): self.node(self.group)
+        if (self.failed): return None
+        return self.DG, self.holds, False
+
+
+def resultName(result):
+    """
+    Args:
+        result (tuple): The (DiGraph, holds, isFact) returned by processResult or None
+
+    Returns:
+        str: A short description of the result
+    """    
+    if (result is None): return "Error"
+    DG, holds, isFact = result
+    if (isFact): return "Fact"
+    return "Holds" if holds else "Does not hold"
+
+
+def batchSummary(rows):
+    """
+    Creates a text table with the result of every query of a batch
+
+    Args:
+        rows (list): A list of (query, result) tuples. result is the return value of processResult
+
+    Returns:
+        str: The table
+    """    
+    names = [(query, resultName(result)) for query, result in rows]
+    width = max([len("Query")] + [len(query) for query, name in names])
+    lines = ["Query".ljust(width)+" | Result", "-"*width+"-+-"+"-"*13]
+    for query, name in names:
+        lines.append(query.ljust(width)+" | "+name)
+    counts = {}
+    for query, name in names: counts[name] = counts.get(name, 0) + 1
+    lines.append("-"*width+"-+-"+"-"*13)
+    lines.append(", ".join(str(counts[name])+" "+name for name in ["Holds","Does not hold","Fact","Error"] if name in counts))
+    return '\n'.join(lines)
+
+
+def saveGraph(filename, DG, q, holds, isFact, positions=None):
+    """
+    Saves a graph in a compact JSON lines format. The file is gzipped if its name ends with .gz.
+    The file is replaced only when it's complete
     
-        return True
-    except Exception:
-        traceback.print_exc()
-        return False
+    Line 1 is a header with the query, the flags and the number of nodes and edges.
+    Then there is one [name, description, x, y] line per node (x, y are null without positions)
+    and one [source, target] line per edge, with the indices of the nodes.
+
+    Args:
+        filename (str): The path of the file
+        DG (networkx.DiGraph): The graph
+        q (str): The query
+        holds (bool): If the argument holds
+        isFact (bool): If the argument is a fact
+        positions (dict, optional): The (x, y) of every node, as computed by the layout. Defaults to None.
+    """
+    index = {node:i for i, node in enumerate(DG.nodes)}
+    header = {"format":GRAPH_FORMAT, "version":GRAPH_VERSION, "query":q, "holds":holds, "isFact":isFact,
+              "nodes":len(index), "edges":DG.number_of_edges(), "positions":positions is not None}
+    
+    compact = json.JSONEncoder(separators=(',',':'), ensure_ascii=False).encode
+    opener = gzip.open if filename.endswith(".gz") else open
+    try:
+        with opener(filename+".tmp", "wt", encoding="utf-8") as f:
+            f.write(compact(header)+"\n")
+            for node, data in DG.nodes(data=True):
+                x, y = positions[node] if positions is not None else (None, None)
+                f.write(compact([node, data.get("description",""), x, y])+"\n")
+            for u, v in DG.edges:
+                f.write(compact([index[u], index[v]])+"\n")
+        os.replace(filename+".tmp", filename)
+    except BaseException:
+        try:
+            os.remove(filename+".tmp")
+        except OSError: pass
+        raise
+
+
+def loadGraph(filename):
+    """
+    Loads a graph saved by saveGraph. Neither SWI-Prolog nor the layout are needed
+
+    Args:
+        filename (str): The path of the file
+
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If the file is not a saved graph or it's damaged (e.g. truncated)
+
+    Returns:
+        nx.Digraph: The Directed Graph
+        str: The query
+        bool: If the argument holds
+        bool: If the argument is a fact
+        dict: The (x, y) of every node or None if the positions were not saved
+    """
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, "rt", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except (ValueError, EOFError, zlib.error, gzip.BadGzipFile):
+            raise ValueError(filename+" is not a saved graph")
+        if (not isinstance(header, dict) or header.get("format") != GRAPH_FORMAT):
+            raise ValueError(filename+" is not a saved graph")
+        version = header.get("version", 0)
+        if (not isinstance(version, int) or isinstance(version, bool)):
+            raise ValueError(filename+" is damaged (version "+repr(version)+")")
+        if (version > GRAPH_VERSION):
+            raise ValueError(filename+" was saved by a newer version of Gorgias-Visual")
+        
+        try:
+            loadedDG = nx.DiGraph()
+            names = []
+            positions = {} if header["positions"] else None
+            for i in range(header["nodes"]):
+                node, description, x, y = json.loads(f.readline())
+                loadedDG.add_node(node, description=description)
+                names.append(node)
+                if (positions is not None): positions[node] = (x, y)
+            if (loadedDG.number_of_nodes() != header["nodes"]): raise ValueError("duplicate nodes")
+            
+            edges = 0
+            for line in f:
+                u, v = json.loads(line)
+                if (not (0 <= u < len(names) and 0 <= v < len(names))): raise IndexError("edge index out of range")
+                loadedDG.add_edge(names[u], names[v])
+                edges += 1
+            if (edges != header["edges"]):
+                raise ValueError("%d of %d edges" % (edges, header["edges"]))
+            result = loadedDG, header["query"], header["holds"], header["isFact"], positions
+        except (KeyError, IndexError, TypeError, ValueError, EOFError, zlib.error, gzip.BadGzipFile) as e:
+            raise ValueError(filename+" is damaged or truncated ("+(str(e) or type(e).__name__)+")")
+    
+    return result
 
 
 def info(DG):
@@ -248,12 +587,7 @@ def info(DG):
 
 def loadConfig():
     """
-    Loads the config from the disk to the global variable config
+    Sets the global variable config to the shared settings. settings.ini is only parsed again if it changed
     """    
-    try:
-        global config
-        config = configparser.ConfigParser()
-        config.read(path+'/settings.ini')
-        config = config['UserSettings']   
-    except Exception:
-        traceback.print_exc()
+    global config
+    config = settings.load()
@@ -0,0 +1,435 @@
+import random
+import networkx as nx
+
+# ---------------------------------------------------------------------------- #
+#                                    Layout                                    #
+# ---------------------------------------------------------------------------- #
+# Node positions of the graphs. It doesn't depend on wx so it can be used without a display
+
+
+def layout_pos(DG, config, root=None):
+    """
+    Calculates the node positions of a tree DiGraph (edges from child to parent) with the layout of the settings
+
+    Args:
+        DG (networkx.DiGraph): The Directed Graph from networkx
+        config (configparser.SectionProxy): The settings. TreeLayout selects tidy_pos or tree_pos (even)
+        root (str, optional): The root of the tree Graph. Defaults to the node without a parent.
+
+    Raises:
+        TypeError: If the graph is not a tree
+
+    Returns:
+        dict: The dict of node positions
+    """
+    if (config.get('TreeLayout', fallback='even').strip().lower() == 'tidy'):
+        return tidy_pos(DG, root,
+                        node_dist=config.getfloat('HorizontalNodeDist'),
+                        vert_gap=config.getfloat('VerticalNodeDist'),
+                        downDirection=config.getboolean('TreeGrowDirectionDown'))
+    return tree_pos(DG, root,
+                    width=config.getfloat('TreeWidth'),
+                    vert_gap=config.getfloat('VerticalNodeDist'),
+                    downDirection=config.getboolean('TreeGrowDirectionDown'))
+
+
+def tree_pos(DG, root=None, width=1.0, vert_gap=1.0, root_y=0.0, root_x=0.0, downDirection=True):
+    """
+    Calculates the node positions of a tree DiGraph whose edges point from the children to the parent,
+    like the graphs of graphBuilder. It's iterative and linear, so deep trees don't hit the recursion limit
+    and the graph is not reversed/copied. The positions are the same as hierarchy_pos(DG.reverse())
+
+    Args:
+        DG (networkx.DiGraph): The Directed Graph from networkx. Edges go from child to parent
+        root (str, optional): The root of the tree Graph. Defaults to the node without a parent.
+        width (float, optional): The amount of space the Graph will take horizontally. Defaults to 1.0.
+        vert_gap (float, optional): The vertical spaceing of the levels of the tree. Defaults to 1.0.
+        root_y (float, optional): vertical location of root. Defaults to 0.
+        root_x (float, optional): horizontal location of root. Defaults to 0.
+        downDirection (bool, optional): The Direction of the tree. Defaults to True.
+
+    Raises:
+        TypeError: If the graph is not a tree
+
+    Returns:
+        dict: The dict of node positions
+    """
+    children, roots = _children(DG)
+    if root is None:
+        if (len(roots) != 1): raise TypeError('cannot use tree_pos on a graph that is not a tree')
+        root = roots[0]
+
+    pos = _tree_pos(children.__getitem__, root, width, vert_gap, root_y, root_x, downDirection)
+    #Cycles or parts that are not connected to the root are not reached
+    if (len(pos) != len(children)): raise TypeError('cannot use tree_pos on a graph that is not a tree')
+    return pos
+
+
+def tidy_pos(DG, root=None, node_dist=1.0, vert_gap=1.0, root_y=0.0, root_x=0.0, downDirection=True):
+    """
+    Calculates compact node positions of a tree DiGraph (edges from child to parent) with the
+    Buchheim-Walker "tidy tree" algorithm. Every level is as narrow as possible without overlaps:
+    neighbouring nodes are at least node_dist apart, parents are centered over their children and
+    equal subtrees are drawn the same. Iterative and linear
+
+    Args:
+        DG (networkx.DiGraph): The Directed Graph from networkx. Edges go from child to parent
+        root (str, optional): The root of the tree Graph. Defaults to the node without a parent.
+        node_dist (float, optional): The minimum horizontal distance of two nodes. Defaults to 1.0.
+        vert_gap (float, optional): The vertical spaceing of the levels of the tree. Defaults to 1.0.
+        root_y (float, optional): vertical location of root. Defaults to 0.
+        root_x (float, optional): horizontal location of root. Defaults to 0.
+        downDirection (bool, optional): The Direction of the tree. Defaults to True.
+
+    Raises:
+        TypeError: If the graph is not a tree
+
+    Returns:
+        dict: The dict of node positions
+    """
+    children, roots = _children(DG)
+    if root is None:
+        if (len(roots) != 1): raise TypeError('cannot use tidy_pos on a graph that is not a tree')
+        root = roots[0]
+
+    # ----------------------- Number the nodes depth first ----------------------- #
+    #The tree is stored in lists indexed by the order of the nodes (parents before children)
+    nodes = []
+    index = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node in index: raise TypeError('cannot use tidy_pos on a graph that is not a tree')
+        index[node] = len(nodes)
+        nodes.append(node)
+        stack.extend(reversed(children[node]))
+    if (len(nodes) != len(children)): raise TypeError('cannot use tidy_pos on a graph that is not a tree')
+
+    n = len(nodes)
+    kids = [[index[child] for child in children[node]] for node in nodes]
+    parent = [-1]*n
+    number = [0]*n #Position among the siblings
+    for v in range(n):
+        for i, w in enumerate(kids[v]):
+            parent[w] = v
+            number[w] = i
+
+    x = [0.0]*n
+    mod = [0.0]*n
+    change = [0.0]*n
+    shift = [0.0]*n
+    thread = [-1]*n
+    ancestor = list(range(n))
+    defaultAncestor = [kid[0] if kid else -1 for kid in kids]
+
+    def left(v):
+        return thread[v] if thread[v] != -1 else (kids[v][0] if kids[v] else -1)
+
+    def right(v):
+        return thread[v] if thread[v] != -1 else (kids[v][-1] if kids[v] else -1)
+
+    def apportion(v):
+        #Pushes the subtree of v right until its left contour clears the subtrees of its left siblings
+        p = parent[v]
+        if (number[v] == 0): return
+        vir = vor = v
+        vil = kids[p][number[v]-1]
+        vol = kids[p][0]
+        sir = sor = mod[v]
+        sil = mod[vil]
+        sol = mod[vol]
+        while right(vil) != -1 and left(vir) != -1:
+            vil = right(vil)
+            vir = left(vir)
+            vol = left(vol)
+            vor = right(vor)
+            ancestor[vor] = v
+            distance = (x[vil]+sil) - (x[vir]+sir) + node_dist
+            if (distance > 0):
+                wl = ancestor[vil] if parent[ancestor[vil]] == p else defaultAncestor[p]
+                subtrees = number[v] - number[wl]
+                change[v] -= distance/subtrees
+                shift[v] += distance
+                change[wl] += distance/subtrees
+                x[v] += distance
+                mod[v] += distance
+                sir += distance
+                sor += distance
+            sil += mod[vil]
+            sir += mod[vir]
+            sol += mod[vol]
+            sor += mod[vor]
+        if (right(vil) != -1 and right(vor) == -1):
+            thread[vor] = right(vil)
+            mod[vor] += sil - sor
+        else:
+            if (left(vir) != -1 and left(vol) == -1):
+                thread[vol] = left(vir)
+                mod[vol] += sir - sol
+            defaultAncestor[p] = v
+
+    # -------------------------------- First walk -------------------------------- #
+    #Children before parents and left siblings before right ones (reverse of the depth first order)
+    for v in _postorder(kids):
+        if (not kids[v]):
+            x[v] = x[kids[parent[v]][number[v]-1]] + node_dist if number[v] > 0 else 0.0
+        else:
+            #Execute the shifts of the children
+            totalShift = totalChange = 0.0
+            for w in reversed(kids[v]):
+                x[w] += totalShift
+                mod[w] += totalShift
+                totalChange += change[w]
+                totalShift += shift[w] + totalChange
+            midpoint = (x[kids[v][0]] + x[kids[v][-1]]) / 2
+            if (number[v] > 0):
+                x[v] = x[kids[parent[v]][number[v]-1]] + node_dist
+                mod[v] = x[v] - midpoint
+            else:
+                x[v] = midpoint
+        if (v != 0): apportion(v)
+
+    # -------------------------------- Second walk ------------------------------- #
+    #Add the modifiers of the ancestors. Parents come before children in the numbering
+    gap = -vert_gap if downDirection else vert_gap
+    modSum = [0.0]*n
+    y = [0.0]*n
+    for v in range(1, n):
+        p = parent[v]
+        modSum[v] = modSum[p] + mod[p]
+        y[v] = y[p] + gap
+    offset = root_x - x[0]
+    return {nodes[v]:(x[v]+modSum[v]+offset, root_y+y[v]) for v in range(n)}
+
+
+def hierarchy_pos(G, root=None, width=1.0, vert_gap=1.0, root_y=0.0, root_x=0.0, downDirection=True):
+    """
+    Calculates the node positions of a tree Graph whose edges point from the parent to the children.
+    Use tree_pos for the graphs of graphBuilder, it doesn't need the reversed graph
+
+    Args:
+        G (networkx.DiGraph): The Directed Graph from networkx
+        root (str, optional): The root of the tree Graph. Defaults to None.
+        width (float, optional): The amount of space the Graph will take horizontally. Defaults to 1.0.
+        vert_gap (float, optional): The vertical spaceing of the levels of the tree. Defaults to 1.0.
+        root_y (float, optional): vertical location of root. Defaults to 0.
+        root_x (float, optional): horizontal location of root. Defaults to 0.
+        downDirection (bool, optional): The Direction of the tree. Defaults to True.
+
+    Raises:
+        TypeError: If the graph is not a tree
+
+    Returns:
+        dict: The dict of node positions
+    """
+
+    #Checks if the graph is actually a tree
+    if not nx.is_tree(G):
+        raise TypeError('cannot use hierarchy_pos on a graph that is not a tree')
+
+    #Finds root if not provided
+    if root is None:
+        if isinstance(G, nx.DiGraph):
+            root = next(iter(nx.topological_sort(G)))  #allows back compatibility with nx version 1.11
+        else:
+            root = random.choice(list(G.nodes))
+
+    if isinstance(G, nx.DiGraph):
+        children = G.neighbors
+    else:
+        #Orient the undirected tree from the root
+        parents = {root:None}
+        for parent, child in nx.bfs_edges(G, root): parents[child] = parent
+        def children(node):
+            return [child for child in G.neighbors(node) if child != parents[node]]
+    return _tree_pos(children, root, width, vert_gap, root_y, root_x, downDirection)
+
+
+def _children(DG):
+    """
+    Args:
+        DG (networkx.DiGraph): The Directed Graph from networkx. Edges go from child to parent
+
+    Raises:
+        TypeError: If a node has more than one parent
+
+    Returns:
+        dict: The children of every node, in the order of the nodes (like the neighbors of DG.reverse())
+        list: The nodes without a parent
+    """
+    children = {node:[] for node in DG}
+    roots = []
+    for node, parents in DG.adjacency():
+        if (len(parents) == 0): roots.append(node)
+        elif (len(parents) > 1): raise TypeError('cannot lay out a graph that is not a tree')
+        for parent in parents: children[parent].append(node)
+    return children, roots
+
+
+def _postorder(kids):
+    """
+    Args:
+        kids (list): The children of every node. Node 0 is the root
+
+    Returns:
+        list: The nodes with the children before their parent and the left siblings before the right ones
+    """
+    order = []
+    stack = [0]
+    while stack:
+        v = stack.pop()
+        order.append(v)
+        stack.extend(kids[v])
+    order.reverse()
+    return order
+
+
+def _tree_pos(children, root, width, vert_gap, root_y, root_x, downDirection):
+    """
+    Places the children of every node evenly in the width of their parent.
+    The nodes are visited depth first, in the same order as the old recursive implementation
+
+    Args:
+        children (function): Returns the children of a node
+
+    Returns:
+        dict: The dict of node positions
+    """
+    pos = {}
+    gap = -vert_gap if downDirection else vert_gap
+    stack = [(root, root_x, root_y, width)]
+    while stack:
+        node, x, y, nodeWidth = stack.pop()
+        if node in pos: raise TypeError('cannot use tree_pos on a graph that is not a tree')
+        pos[node] = (x, y)
+        nodeChildren = list(children(node))
+        if len(nodeChildren) != 0:
+            dx = nodeWidth/len(nodeChildren)
+            next_x = x - nodeWidth/2 - dx/2
+            placed = []
+            for child in nodeChildren:
+                next_x += dx
+                placed.append((child, next_x, y+gap, dx))
+            #Reversed so the first child is visited first
+            stack.extend(reversed(placed))
+    return pos
+
+
+def graph_diff(oldPositions, oldDescriptions, oldEdges, positions, descriptions, edges):
+    """
+    Compares a drawn graph with a new graph, so only what changed is drawn again
+
+    Args:
+        oldPositions (dict): The (x, y) of every node of the drawn graph
+        oldDescriptions (dict): The attributes of every node of the drawn graph (e.g. DiGraph.nodes)
+        oldEdges (iterable): The (u, v) edges of the drawn graph
+        positions (dict): The (x, y) of every node of the new graph
+        descriptions (dict): The attributes of every node of the new graph
+        edges (iterable): The (u, v) edges of the new graph
+
+    Returns:
+        list: The new nodes and the nodes that moved, in the order of the new positions
+        set: The removed nodes
+        set: The nodes whose description changed
+        set: The added edges
+        set: The removed edges
+    """
+    moved = [node for node in positions 
+             if node not in oldPositions or tuple(oldPositions[node]) != tuple(positions[node])]
+    removed = {node for node in oldPositions if node not in positions}
+    changed = {node for node in positions if node in oldDescriptions and 
+               oldDescriptions[node].get('description') != descriptions[node].get('description')}
+    oldEdges, edges = set(oldEdges), set(edges)
+    return moved, removed, changed, edges-oldEdges, oldEdges-edges
+
+
+class NodeIndex(object):
+    """
+    Uniform grid over the positions of the nodes, to find the node under the cursor without
+    checking every node. It's built once per layout
+    """
+
+    def __init__(self, points, cellSize=None):
+        """
+        Args:
+            points (list): The (x, y) of every node
+            cellSize (float, optional): The size of the grid cells in world units. 
+                Defaults to the size that puts about one node in every cell.
+        """
+        self.points = [(float(x), float(y)) for x, y in points]
+        if (cellSize is None):
+            cellSize = 1.0
+            if (len(self.points) > 1):
+                xs = [x for x, y in self.points]
+                ys = [y for x, y in self.points]
+                width, height = max(xs)-min(xs), max(ys)-min(ys)
+                area = max(width, 1e-9) * max(height, 1e-9)
+                cellSize = max((area/len(self.points))**0.5, max(width, height)/len(self.points), 1e-9)
+        self.cellSize = cellSize
+
+        self.cells = {}
+        for index, (x, y) in enumerate(self.points):
+            self.cells.setdefault(self.cell(x, y), []).append(index)
+        if (self.cells):
+            self.minCell = (min(cx for cx, cy in self.cells), min(cy for cx, cy in self.cells))
+            self.maxCell = (max(cx for cx, cy in self.cells), max(cy for cx, cy in self.cells))
+
+    def cell(self, x, y):
+        """
+        Returns:
+            tuple: The grid cell of a point
+        """
+        return (int(x//self.cellSize), int(y//self.cellSize))
+
+    def nearest(self, xy, maxDistance=None):
+        """
+        Finds the closest node to a point. The grid is searched in rings around the point
+        until no closer node can exist
+
+        Args:
+            xy (tuple): The (x, y) world coordinates of the point
+            maxDistance (float, optional): Ignore nodes further than this. Defaults to None.
+
+        Returns:
+            int: The index of the closest node or None if there is none
+        """
+        if (not self.cells): return None
+        x, y = float(xy[0]), float(xy[1])
+        cx, cy = self.cell(x, y)
+
+        #Rings that can hold the nodes: from the nearest to the furthest border of the grid, up to the max distance
+        firstRing = max(self.minCell[0]-cx, cx-self.maxCell[0], self.minCell[1]-cy, cy-self.maxCell[1], 0)
+        lastRing = max(abs(cx-self.minCell[0]), abs(cx-self.maxCell[0]), abs(cy-self.minCell[1]), abs(cy-self.maxCell[1]))
+        if (maxDistance is not None): lastRing = min(lastRing, int(maxDistance//self.cellSize)+1)
+
+        best = None
+        bestDistance = maxDistance*maxDistance if maxDistance is not None else float("inf")
+        for ring in range(firstRing, lastRing+1):
+            for cell in self._ring(cx, cy, ring):
+                for index in self.cells.get(cell, ()):
+                    px, py = self.points[index]
+                    distance = (px-x)*(px-x) + (py-y)*(py-y)
+                    if (distance < bestDistance or (distance == bestDistance and best is not None and index < best)):
+                        best, bestDistance = index, distance
+            #The nodes of the next rings are at least ring*cellSize away
+            if (best is not None and bestDistance <= (ring*self.cellSize)**2): break
+        return best
+
+    def _ring(self, cx, cy, ring):
+        """
+        Returns:
+            iterator: The cells of the grid at a Chebyshev distance of ring from (cx, cy)
+        """
+        if (ring == 0):
+            yield (cx, cy)
+            return
+        #Only the parts of the ring inside the grid, so a point far from the nodes doesn't visit empty cells
+        (minX, minY), (maxX, maxY) = self.minCell, self.maxCell
+        xs = range(max(cx-ring, minX), min(cx+ring, maxX)+1)
+        ys = range(max(cy-ring+1, minY), min(cy+ring-1, maxY)+1)
+        for y in (cy-ring, cy+ring):
+            if (minY <= y <= maxY):
+                for x in xs: yield (x, y)
+        for x in (cx-ring, cx+ring):
+            if (minX <= x <= maxX):
+                for y in ys: yield (x, y)
@@ -0,0 +1,220 @@
+import wx
+from wx.lib.floatcanvas.FCObjects import *
+
+# ---------------------------------------------------------------------------- #
+#                               Canvas Objects                                 #
+# ---------------------------------------------------------------------------- #
+# FloatCanvas objects that draw a whole graph with a few DC calls.
+# They only draw what is inside the window (the dc) and drop details
+# (labels, arrow heads) that would be too small to read at the current zoom
+
+
+def _visibleSegments(Points, width, height, margin):
+    """
+    Args:
+        Points (numpy.ndarray): Nx4 array of (x1, y1, x2, y2) segments in pixels
+        width (int): The width of the dc
+        height (int): The height of the dc
+        margin (int): Extra pixels around the dc
+
+    Returns:
+        numpy.ndarray: The mask of the segments that cross the dc
+    """
+    x1, y1, x2, y2 = Points[:,0], Points[:,1], Points[:,2], Points[:,3]
+    return ((N.maximum(x1, x2) >= -margin) & (N.minimum(x1, x2) <= width+margin) &
+            (N.maximum(y1, y2) >= -margin) & (N.minimum(y1, y2) <= height+margin))
+
+
+class EdgeSet(LineOnlyMixin, DrawObject):
+    """
+    Draws all the edges of a graph as arrows. The segments are kept in a NumPy array, the lines are drawn with one
+    DrawLineList call and the filled arrow heads (like ArrowLine) with one DrawPolygonList call.
+    Arrow heads are skipped on edges shorter than ArrowMinPixels on screen
+    """
+
+    def __init__(self, Segments, LineColor="Black", LineStyle="Solid", LineWidth=1,
+                 ArrowHeadSize=8, ArrowHeadAngle=30, ArrowMinPixels=0, InForeground=False):
+        """
+        Args:
+            Segments (list): The ((x1, y1), (x2, y2)) world coordinates of every edge. The arrow points to (x2, y2)
+            LineColor (str, optional): The color of the lines. Defaults to "Black".
+            LineStyle (str, optional): The style of the lines. Defaults to "Solid".
+            LineWidth (int, optional): The width of the lines. Defaults to 1.
+            ArrowHeadSize (int, optional): The size of the arrow heads in pixels. Defaults to 8.
+            ArrowHeadAngle (int, optional): The angle of the arrow heads in degrees. Defaults to 30.
+            ArrowMinPixels (int, optional): The on screen length an edge needs for its arrow head. Defaults to 0.
+            InForeground (bool, optional): Draw in the foreground. Defaults to False.
+        """
+        DrawObject.__init__(self, InForeground)
+
+        self.ArrowHeadSize = ArrowHeadSize
+        self.ArrowHeadAngle = float(ArrowHeadAngle)
+        self.ArrowMinPixels = ArrowMinPixels
+        self.SetSegments(Segments)
+
+        self.LineColor = LineColor
+        self.LineStyle = LineStyle
+        self.LineWidth = LineWidth
+        self.SetPen(LineColor, LineStyle, LineWidth)
+        self.SetBrush(LineColor, "Solid")
+
+        self.HitLineWidth = max(LineWidth, self.MinHitLineWidth)
+
+    def SetSegments(self, Segments):
+        """
+        Args:
+            Segments (list): The ((x1, y1), (x2, y2)) world coordinates of every edge. The arrow points to (x2, y2)
+        """
+        self.Points = N.array(Segments, N.float64).reshape((-1, 4))
+        self.CalcArrowPoints()
+        self.CalcBoundingBox()
+
+    def CalcArrowPoints(self):
+        """
+        Calculates the pixel offsets of the arrow heads from the end of every edge (like ArrowLine).
+        The heads have a fixed size on screen so they don't change with the zoom
+        """
+        phi = self.ArrowHeadAngle * N.pi / 360
+        theta = N.arctan2(self.Points[:,1]-self.Points[:,3], self.Points[:,0]-self.Points[:,2])
+        #The two wings of every head. The y is flipped because pixel coordinates grow down
+        self.ArrowPoints = N.stack((N.cos(theta-phi), -N.sin(theta-phi),
+                                    N.cos(theta+phi), -N.sin(theta+phi)), axis=1) * self.ArrowHeadSize
+
+    def CalcBoundingBox(self):
+        if (len(self.Points) == 0):
+            self.BoundingBox = BBox.NullBBox()
+        else:
+            self.BoundingBox = BBox.fromPoints(self.Points.reshape((-1, 2)))
+        if self._Canvas:
+            self._Canvas.BoundingBoxDirty = True
+
+    def _Draw(self, dc, WorldToPixel, ScaleWorldToPixel, HTdc=None):
+        if (len(self.Points) == 0): return
+        width, height = dc.GetSize()
+        Points = WorldToPixel(self.Points.reshape((-1, 2))).reshape((-1, 4))
+        visible = _visibleSegments(Points, width, height, self.ArrowHeadSize)
+
+        #Level of detail. Arrow heads only on edges long enough to show them
+        length = N.hypot(Points[:,2]-Points[:,0], Points[:,3]-Points[:,1])
+        detailed = visible & (length >= self.ArrowMinPixels)
+
+        lines = Points[visible]
+        heads = self.ArrowHeads(Points[detailed], self.ArrowPoints[detailed])
+        dc.SetPen(self.Pen)
+        dc.SetBrush(self.Brush)
+        if (len(lines) != 0): dc.DrawLineList(lines)
+        if (len(heads) != 0): dc.DrawPolygonList(heads)
+        if HTdc and self.HitAble:
+            HTdc.SetPen(self.HitPen)
+            HTdc.SetBrush(self.HitBrush)
+            if (len(lines) != 0): HTdc.DrawLineList(lines)
+            if (len(heads) != 0): HTdc.DrawPolygonList(heads)
+
+    @staticmethod
+    def ArrowHeads(Points, ArrowPoints):
+        """
+        Args:
+            Points (numpy.ndarray): Nx4 array of the edges in pixels
+            ArrowPoints (numpy.ndarray): Nx4 array of the offsets of the two wings of every head
+
+        Returns:
+            numpy.ndarray: Nx3x2 array with the triangle (tip and two wings) of every arrow head
+        """
+        tips = Points[:,2:4]
+        heads = N.empty((len(Points), 3, 2))
+        heads[:,0,:] = tips
+        heads[:,1,:] = tips + ArrowPoints[:,0:2]
+        heads[:,2,:] = tips + ArrowPoints[:,2:4]
+        return N.round(heads).astype(N.int32)
+
+
+class LabelSet(DrawObject):
+    """
+    Draws the labels of all nodes, centered on their points, with a single DrawTextList call.
+    At most one label is drawn in every MinPixels x MinPixels square of the screen,
+    so labels of nodes that are too close together are skipped
+    """
+
+    def __init__(self, Strings, Points, Size=14, Color="Black", Family=wx.FONTFAMILY_MODERN,
+                 Style=wx.FONTSTYLE_NORMAL, Weight=wx.FONTWEIGHT_NORMAL, MinPixels=0, InForeground=False):
+        """
+        Args:
+            Strings (list): The label of every point
+            Points (list): The (x, y) world coordinates of the labels
+            Size (int, optional): The font size. Defaults to 14.
+            Color (str, optional): The text color. Defaults to "Black".
+            Family (wx.FontFamily, optional): The font family. Defaults to wx.FONTFAMILY_MODERN.
+            Style (wx.FontStyle, optional): The font style. Defaults to wx.FONTSTYLE_NORMAL.
+            Weight (wx.FontWeight, optional): The font weight. Defaults to wx.FONTWEIGHT_NORMAL.
+            MinPixels (int, optional): The on screen distance labels need to be drawn. Defaults to 0.
+            InForeground (bool, optional): Draw in the foreground. Defaults to False.
+        """
+        DrawObject.__init__(self, InForeground)
+
+        self.Color = Color
+        self.MinPixels = MinPixels
+        #Same font as a FloatCanvas Text
+        self.Font = wx.Font(Size, Family, Style, Weight, False, '')
+        #The font doesn't scale, so the size of every text is measured once
+        self.TextExtents = {}
+        self.SetLabels(Strings, Points)
+
+    def SetLabels(self, Strings, Points):
+        """
+        Args:
+            Strings (list): The label of every point
+            Points (list): The (x, y) world coordinates of the labels
+        """
+        self.Strings = [str(string) for string in Strings]
+        self.Points = N.array(Points, N.float64).reshape((-1, 2))
+        self.Extents = None
+        self.CalcBoundingBox()
+
+    def CalcBoundingBox(self):
+        if (len(self.Points) == 0):
+            self.BoundingBox = BBox.NullBBox()
+        else:
+            self.BoundingBox = BBox.fromPoints(self.Points)
+        if self._Canvas:
+            self._Canvas.BoundingBoxDirty = True
+
+    def _Draw(self, dc, WorldToPixel, ScaleWorldToPixel, HTdc=None):
+        if (len(self.Points) == 0): return
+        dc.SetFont(self.Font)
+        if self.Extents is None:
+            for string in self.Strings:
+                if string not in self.TextExtents: self.TextExtents[string] = tuple(dc.GetTextExtent(string))
+            self.Extents = N.array([self.TextExtents[string] for string in self.Strings], N.float64).reshape((-1, 2))
+
+        width, height = dc.GetSize()
+        Points = WorldToPixel(self.Points)
+        TopLeft = Points - self.Extents/2
+        visible = N.nonzero((TopLeft[:,0] <= width) & (TopLeft[:,1] <= height) &
+                            (TopLeft[:,0]+self.Extents[:,0] >= 0) & (TopLeft[:,1]+self.Extents[:,1] >= 0))[0]
+
+        #Level of detail. Keep the first label of every cell (parents come before their children)
+        if (self.MinPixels > 0 and len(visible) != 0):
+            cells = (Points[visible] // self.MinPixels).astype(N.int64)
+            keys = cells[:,0] * (height//self.MinPixels + 3) + cells[:,1]
+            first = N.unique(keys, return_index=True)[1]
+            visible = visible[N.sort(first)]
+
+        if (len(visible) == 0): return
+        dc.SetTextForeground(self.Color)
+        dc.SetBackgroundMode(wx.TRANSPARENT)
+        dc.DrawTextList([self.Strings[index] for index in visible], N.round(TopLeft[visible]).astype(N.int32))
+
+
+class NodeSet(PointSet):
+    """
+    PointSet that only draws (and hit tests) the points inside the window
+    """
+
+    def _Draw(self, dc, WorldToPixel, ScaleWorldToPixel, HTdc=None):
+        width, height = dc.GetSize()
+        Points = WorldToPixel(self.Points)
+        radius = self.Diameter
+        visible = ((Points[:,0] >= -radius) & (Points[:,0] <= width+radius) &
+                   (Points[:,1] >= -radius) & (Points[:,1] <= height+radius))
+        if (not visible.all()): Points = Points[visible]
+        PointSet._Draw(self, dc, lambda Coordinates: Points, ScaleWorldToPixel, HTdc)
@@ -4,14 +4,25 @@ from wx.lib.floatcanvas.FCObjects import *
 from wx.lib.floatcanvas.Utilities.BBox import asBBox
 
 import networkx as nx
-import random
-import configparser
 import pathlib
+import sys
+
+import graphBuilder
+import settings
+from graphLayout import layout_pos, graph_diff, NodeIndex
+from graphObjects import EdgeSet, LabelSet, NodeSet
+from stageTimer import StageTimer, peakMemory
 
 # ---------------------------------- Globals --------------------------------- #
 #Local path
 path = str( pathlib.Path(__file__).parent.absolute() )
 
+#Milliseconds between checks of settings.ini for changes
+settingsInterval = 1000
+
+#Settings that change the positions of the nodes
+LAYOUT_SETTINGS = {'treelayout', 'treewidth', 'horizontalnodedist', 'verticalnodedist', 'treegrowdirectiondown'}
+
 #Globals
 CanvasFrame = None
 holds = None
@@ -23,6 +34,16 @@ descriptions={}
 edges={}
 resultTitle="resultTitle"
 
+#The (DiGraph, query, holds, isFact) of the graph that is drawn
+graph=None
+
+#File types of the saved graphs
+GRAPH_WILDCARD = "Gorgias graph (*.jsonl.gz;*.jsonl)|*.jsonl.gz;*.jsonl|All files (*.*)|*.*"
+
+#All the results of the query (graphBuilder.ResultList) and the one shown
+results=None
+resultQuery=""
+
 class DescriptionFrame(wx.Frame):
     """
     Custom Node Description Window
@@ -80,29 +101,7 @@ class FloatCanvasFrame(wx.Frame):
         self.SetMinSize((400,400))
         self.Layout()
         # -------------------------- Set values from config -------------------------- #
-        
-        self.compactHoverDesc = config.getboolean("CompactHoverDescriptions")
-        self.zoomSpeed = config.getfloat("ZoomSpeed")
-        
-        self.nodeSize = config.getint('NodeSize')
-        self.nodeTextSize = config.getint('NodeTextSize')
-        self.selectionRingSize = config.getint('SelectionRingSize')
-        
-        self.arrowSize = config.getint('ArrowSize')
-        self.arrowLineSize = config.getint('ArrowLineSize')
-        self.arrowAngle = config.getint('ArrowAngle')
-        
-        self.titleTextSize = config.getint('TitleTextSize')
-        self.hoverTextSize = config.getint('HoverTextSize')
-        
-        # ----------------------------- Add Colors to DB ----------------------------- #
-        wx.TheColourDatabase.AddColour("background",wx.Colour(config.get('BackgroundColor')))
-        wx.TheColourDatabase.AddColour("node",wx.Colour(config.get('NormalNodeColor')))
-        wx.TheColourDatabase.AddColour("acceptNode",wx.Colour(config.get('AcceptNodeColor')))
-        wx.TheColourDatabase.AddColour("rejectNode",wx.Colour(config.get('RejectNodeColor')))
-        wx.TheColourDatabase.AddColour("nodeText",wx.Colour(config.get('NodeTextColor')))
-        wx.TheColourDatabase.AddColour("selectedNodeRing",wx.Colour(config.get('SelectionRingColor')))
-        wx.TheColourDatabase.AddColour("hoverNodeRing",wx.Colour(config.get('HoverRingColor')))
+        self.LoadStyle()
         
         # ------------------------------- Add the Title ------------------------------ #
         self.titleText = wx.StaticText(self, 
@@ -111,6 +110,22 @@ class FloatCanvasFrame(wx.Frame):
         self.titleText.SetFont(wx.Font(wx.FontInfo(self.titleTextSize).Bold()))
         frameSizer.Add(self.titleText, 0, flag=wx.EXPAND)
         
+        # ------------------------- Add the result navigation ------------------------ #
+        #The result buttons are only shown when the query has more than one result
+        self.navigationSizer = wx.BoxSizer(orient=wx.HORIZONTAL)
+        self.prevButton = wx.Button(self, label="< Previous")
+        self.nextButton = wx.Button(self, label="Next >")
+        self.resultText = wx.StaticText(self, label="", style = wx.ALIGN_CENTRE_HORIZONTAL)
+        self.saveButton = wx.Button(self, label="Save Graph")
+        self.prevButton.Bind(wx.EVT_BUTTON, self.OnPrevResult)
+        self.nextButton.Bind(wx.EVT_BUTTON, self.OnNextResult)
+        self.saveButton.Bind(wx.EVT_BUTTON, self.OnSaveClick)
+        self.navigationSizer.Add(self.prevButton, 0)
+        self.navigationSizer.Add(self.resultText, 1, flag=wx.ALIGN_CENTER_VERTICAL)
+        self.navigationSizer.Add(self.nextButton, 0)
+        self.navigationSizer.Add(self.saveButton, 0, flag=wx.LEFT, border=8)
+        frameSizer.Add(self.navigationSizer, 0, flag=wx.EXPAND)
+        
         # ------------------------------ Add the Canvas ------------------------------ #
         self.Canvas = FloatCanvas.FloatCanvas(self, size = (100,100), BackgroundColor = "background")
         frameSizer.Add(self.Canvas, 1, flag=wx.EXPAND)
@@ -123,11 +138,28 @@ class FloatCanvasFrame(wx.Frame):
         self.Canvas.Bind(FloatCanvas.EVT_MOTION, self.OnMouseMotion)
         self.Canvas.Bind(FloatCanvas.EVT_MOUSEWHEEL, self.OnMouseWheel)
         
+        #Hover updates are coalesced to the refresh rate of the display
+        self.hoverCoords = (0,0)
+        self.hoverPending = False
+        display = wx.Display.GetFromWindow(self)
+        refresh = wx.Display(display if display != wx.NOT_FOUND else 0).GetCurrentMode().refresh
+        self.hoverInterval = max(int(1000/refresh),1) if refresh > 0 else 16
+        
+        #Draws the graph again when settings.ini changes
+        self.settingsListener = lambda settings, changed: wx.CallAfter(self.Restyle,changed)
+        config.subscribe(self.settingsListener)
+        self.settingsTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnSettingsTimer, self.settingsTimer)
+        self.settingsTimer.Start(settingsInterval)
+        
         # -------------------------------- Status Bar -------------------------------- #
         self.CreateStatusBar()
-        self.StatusBar.SetFieldsCount(2)
+        #Coordinates, hovered node, timing of the query
+        self.StatusBar.SetFieldsCount(3)
+        self.StatusBar.SetStatusWidths([-1,-1,-3])
         
         # --------------------------------- Set Data --------------------------------- #
+        self.SetResults()
         self.SetData()
         
         # -------------------------------- Show Window ------------------------------- #
@@ -135,64 +167,105 @@ class FloatCanvasFrame(wx.Frame):
         self.Canvas.ZoomToBB()
         self.Canvas.Zoom(0.8)
         
-        # ---------------------------- Bind Canvas events ---------------------------- #
-        #Bind events for node selection/hover
-        #Must be done after the canvas is shown
-        self.NodeObjects.Bind(FloatCanvas.EVT_FC_ENTER_OBJECT, self.OnOverPoints)
-        self.NodeObjects.Bind(FloatCanvas.EVT_FC_LEAVE_OBJECT, self.OnLeavePoints)
-        self.NodeObjects.Bind(FloatCanvas.EVT_FC_LEFT_DOWN, self.OnClickPoints)
         
 
     # ---------------------------------------------------------------------------- #
     #                                Data Functions                                #
     # ---------------------------------------------------------------------------- #
 
+    def LoadStyle(self):
+        """
+        Reads the sizes and colors of the graph from the settings
+        """
+        self.compactHoverDesc = config.getboolean("CompactHoverDescriptions")
+        self.zoomSpeed = config.getfloat("ZoomSpeed")
+        
+        self.nodeSize = config.getint('NodeSize')
+        self.nodeTextSize = config.getint('NodeTextSize')
+        self.selectionRingSize = config.getint('SelectionRingSize')
+        
+        self.arrowSize = config.getint('ArrowSize')
+        self.arrowLineSize = config.getint('ArrowLineSize')
+        self.arrowAngle = config.getint('ArrowAngle')
+        
+        #Level of detail. Smaller on screen distances hide the arrow heads/labels
+        self.arrowMinPixels = config.getint('ArrowMinPixels')
+        self.labelMinPixels = config.getint('LabelMinPixels')
+        
+        self.titleTextSize = config.getint('TitleTextSize')
+        self.hoverTextSize = config.getint('HoverTextSize')
+        
+        # ----------------------------- Add Colors to DB ----------------------------- #
+        wx.TheColourDatabase.AddColour("background",wx.Colour(config.get('BackgroundColor')))
+        wx.TheColourDatabase.AddColour("node",wx.Colour(config.get('NormalNodeColor')))
+        wx.TheColourDatabase.AddColour("acceptNode",wx.Colour(config.get('AcceptNodeColor')))
+        wx.TheColourDatabase.AddColour("rejectNode",wx.Colour(config.get('RejectNodeColor')))
+        wx.TheColourDatabase.AddColour("nodeText",wx.Colour(config.get('NodeTextColor')))
+        wx.TheColourDatabase.AddColour("selectedNodeRing",wx.Colour(config.get('SelectionRingColor')))
+        wx.TheColourDatabase.AddColour("hoverNodeRing",wx.Colour(config.get('HoverRingColor')))
+
     def SetData(self):
-        # --------------------------- Add all arrows/edges --------------------------- #
-        for u,v in edges:
-            x , y = positions[u][0], positions[u][1]
-            dx , dy = positions[v][0], positions[v][1]
-            
-            arrowsObj = ArrowLine([(x, y), (dx, dy)], 
-                                  LineWidth=self.arrowLineSize, 
-                                  ArrowHeadSize=self.arrowSize, 
-                                  ArrowHeadAngle=self.arrowAngle, 
-                                  InForeground=True)
-            self.Canvas.AddObject(arrowsObj)
+        #Keep the graph for saving. The globals change when another window is opened
+        self.graph = graph
+        self.positions = positions
+        self.descriptions = descriptions
+        self.DrawGraph()
 
-        # --------------------------------- Add Nodes -------------------------------- #
+    def DrawGraph(self):
+        """
+        Adds the objects of the graph of the window to the canvas
+        """
+        DG, query, holds, isFact = self.graph
+        positions = self.positions
+        
+        #The graph is drawn in the background, which FloatCanvas keeps in a buffer.
+        #Only the hover elements are in the foreground, so hovering doesn't redraw the graph
         self.nodes=[]
         for node in positions:
             self.nodes.append(positions[node])
-        nodesObj = PointSet(tuple(self.nodes), 
-                            Diameter=self.nodeSize, 
-                            Color="node", 
-                            InForeground=True)
+        
+        # ------------------------------ Selection Ring ------------------------------ #
+        #Under the nodes and edges. Moved to the clicked node
+        self.selectedNode = None
+        self.selectionRing = Point(tuple(self.nodes[0]), 
+                                   Diameter=self.nodeSize+self.selectionRingSize, 
+                                   Color="selectedNodeRing")
+        self.selectionRing.Hide()
+        self.Canvas.AddObject(self.selectionRing)
+        
+        # --------------------------- Add all arrows/edges --------------------------- #
+        #One object for all edges. It only draws the edges on screen
+        self.edgesObj = EdgeSet([(positions[u], positions[v]) for u,v in DG.edges], 
+                                LineWidth=self.arrowLineSize, 
+                                ArrowHeadSize=self.arrowSize, 
+                                ArrowHeadAngle=self.arrowAngle, 
+                                ArrowMinPixels=self.arrowMinPixels)
+        self.Canvas.AddObject(self.edgesObj)
+
+        # --------------------------------- Add Nodes -------------------------------- #
+        nodesObj = NodeSet(tuple(self.nodes), 
+                           Diameter=self.nodeSize, 
+                           Color="node")
         self.NodeObjects = self.Canvas.AddObject(nodesObj)
+        #Node hover/selection. The mouse events look the nodes up in the index instead of the canvas hit test
+        self.nodeIndex = NodeIndex(self.nodes)
         
         # --------------------------- Add special root node -------------------------- #
         
-        rootNodeObj = Point(tuple(self.nodes[0]), 
-                            Diameter=self.nodeSize, 
-                            Color="acceptNode" if holds else "rejectNode", 
-                            InForeground=True)
-        self.Canvas.AddObject(rootNodeObj)
+        self.rootNodeObj = Point(tuple(self.nodes[0]), 
+                                 Diameter=self.nodeSize, 
+                                 Color="acceptNode" if holds else "rejectNode")
+        self.Canvas.AddObject(self.rootNodeObj)
 
         # ------------------------------ Add all labels ------------------------------ #
-        self.nodeLabels =[]
-        self.lastHighlight = -1
-        self.hoverName = ""
-        self.highlightedLabel = None
-        for node in positions:
-            nodeLabel = Text(node, 
-                             positions[node], 
-                             Size=self.nodeTextSize, 
-                             Position="cc", 
-                             Color="nodeText", 
-                             Weight=wx.FONTWEIGHT_BOLD, 
-                             InForeground=True)
-            self.nodeLabels.append(nodeLabel)
-            self.Canvas.AddObject(nodeLabel)
+        self.nodeNames = list(positions)
+        self.labelsObj = LabelSet(self.nodeNames, 
+                                  self.nodes, 
+                                  Size=self.nodeTextSize, 
+                                  Color="nodeText", 
+                                  Weight=wx.FONTWEIGHT_BOLD, 
+                                  MinPixels=self.labelMinPixels)
+        self.Canvas.AddObject(self.labelsObj)
             
         # -------------------------- Set Font for hover text ------------------------- #
         hoverFont = wx.Font(config.getint("HoverTextSize"), 
@@ -200,9 +273,29 @@ class FloatCanvasFrame(wx.Frame):
                             wx.FONTSTYLE_NORMAL, 
                             wx.FONTWEIGHT_NORMAL)
         wx.DC.SetFont(self.dc,hoverFont)
-        # ----------------------------- Hover Description ---------------------------- #
-        self.descriptions = descriptions
+        
+        # ------------------------------ Hover elements ------------------------------ #
+        #Created once and moved to the hovered node. The node is drawn again over the ring
+        self.lastHighlight = -1
+        self.hoverName = ""
         self.overPoints = False
+        self.hoverRing = Point(tuple(self.nodes[0]), 
+                               Diameter=self.nodeSize+self.selectionRingSize, 
+                               Color="hoverNodeRing", 
+                               InForeground=True)
+        self.hoverNode = Point(tuple(self.nodes[0]), 
+                               Diameter=self.nodeSize, 
+                               Color="node", 
+                               InForeground=True)
+        self.highlightedLabel = Text("", 
+                                     tuple(self.nodes[0]), 
+                                     Size=self.nodeTextSize, 
+                                     Position="cc", Color="background", BackgroundColor="nodeText", 
+                                     Weight=wx.FONTWEIGHT_BOLD, InForeground=True)
+        
+        # ----------------------------- Hover Description ---------------------------- #
+        #The text and size of the description of every hovered node (by name)
+        self.hoverTexts = {}
         width = config.getfloat('VerticalNodeDist')
         self.hoverDescription = Text("", 
                                      (0,0),
@@ -213,27 +306,38 @@ class FloatCanvasFrame(wx.Frame):
                                              (width,0), 
                                              FillColor="background", 
                                              InForeground=True)
-        self.hoverDescriptionBox.Hide()
-        self.Canvas.AddObject(self.hoverDescriptionBox)
-        self.Canvas.AddObject(self.hoverDescription)
+        
+        #Drawn in this order. The description is on top
+        for hoverObj in (self.hoverRing, self.hoverNode, self.highlightedLabel, 
+                         self.hoverDescriptionBox, self.hoverDescription):
+            hoverObj.Hide()
+            self.Canvas.AddObject(hoverObj)
         
         
 
     def UpdateData(self):
-        # ------------------------------- Update Canvas ------------------------------ #
-        #Close old description windows
-        self.Canvas.DestroyChildren()
-        #Reset Canvas and Set Data
-        self.Canvas.ClearAll()
-
         #Reset variables for navigation
         self.mouseDown = False
         self.lastx = self.x = 0
         self.lasty = self.y = 0
         
-        #Update Title and Data
+        #Update Title
         self.titleText.SetLabel(resultTitle)
+        self.UpdateNavigation()
         self.Layout()
+        
+        #Another graph of the same query (e.g. after an edit of the theory) is patched and keeps the view.
+        #Other queries can have a root node of the same name (e.g. r1), they are drawn again
+        if (len(positions) != 0 and self.graph[1] == graph[1] and next(iter(positions)) == self.nodeNames[0]):
+            self.PatchData()
+            self.SetFocus()
+            return
+        
+        # ------------------------------- Update Canvas ------------------------------ #
+        #Close old description windows
+        self.Canvas.DestroyChildren()
+        #Reset Canvas and Set Data
+        self.Canvas.ClearAll()
         self.SetData()
         
         # -------------------------------- Show Window ------------------------------- #
@@ -241,80 +345,222 @@ class FloatCanvasFrame(wx.Frame):
         self.Canvas.ZoomToBB()
         self.Canvas.Zoom(0.8)
         
-        # ---------------------------- Bind Canvas events ---------------------------- #
-        #Bind events for node selection/hover
-        #Must be done after the canvas is shown
-        self.NodeObjects.Bind(FloatCanvas.EVT_FC_ENTER_OBJECT, self.OnOverPoints)
-        self.NodeObjects.Bind(FloatCanvas.EVT_FC_LEAVE_OBJECT, self.OnLeavePoints)
-        self.NodeObjects.Bind(FloatCanvas.EVT_FC_LEFT_DOWN, self.OnClickPoints)
         
 
+    def PatchData(self):
+        """
+        Changes the drawn graph to the new graph in place. Only the nodes and edges that were
+        added, removed or moved are updated, and the zoom and position of the view are kept
+        """
+        # ------------------------------ Diff the graphs ----------------------------- #
+        moved, removed, changed, addedEdges, removedEdges = graph_diff(self.positions, self.descriptions, 
+                                                                       self.graph[0].edges, 
+                                                                       positions, descriptions, edges)
+        self.graph = graph
+        self.positions = positions
+        self.descriptions = descriptions
+        if (debugPrint): print("Moved:",len(moved),"Removed:",len(removed),"Changed:",len(changed),
+                               "Edges:",len(addedEdges),"added,",len(removedEdges),"removed")
+        
+        # ------------------------------- Update Nodes ------------------------------- #
+        if (self.overPoints): self.OnLeaveNode()
+        nodesChanged = moved or removed or list(positions) != self.nodeNames
+        if (nodesChanged):
+            self.nodes = [positions[node] for node in positions]
+            self.nodeNames = list(positions)
+            self.NodeObjects.SetPoints(self.nodes)
+            self.nodeIndex = NodeIndex(self.nodes)
+            self.labelsObj.SetLabels(self.nodeNames, self.nodes)
+        self.rootNodeObj.SetPoint(tuple(self.nodes[0]))
+        self.rootNodeObj.SetColor("acceptNode" if holds else "rejectNode")
+        
+        # ------------------------------- Update Edges ------------------------------- #
+        if (nodesChanged or addedEdges or removedEdges):
+            self.edgesObj.SetSegments([(positions[u], positions[v]) for u,v in edges])
+        
+        # -------------------------- Update Selection/Hover -------------------------- #
+        if (self.selectedNode in positions):
+            self.selectionRing.SetPoint(tuple(positions[self.selectedNode]))
+        else:
+            self.selectedNode = None
+            self.selectionRing.Hide()
+        for node in removed | changed: self.hoverTexts.pop(node, None)
+        
+        #Close the description windows of removed nodes and update the changed ones
+        for descWindow in self.Canvas.GetChildren():
+            nodeName = descWindow.GetLabel()
+            if (nodeName in removed):
+                descWindow.Destroy()
+            elif (nodeName in changed):
+                descWindow.titleText.SetLabel(descriptions[nodeName]['description'])
+                descWindow.Fit()
+        
+        self.Canvas.Draw(Force=True)
+
+    def Restyle(self, changed):
+        """
+        Draws the graph again with the new settings, without running the query again. The view is kept
+
+        Args:
+            changed (set): The (lower case) names of the settings that changed
+        """
+        if (not self): return #The window was closed
+        loadConfig()
+        self.LoadStyle()
+        self.titleText.SetFont(wx.Font(wx.FontInfo(self.titleTextSize).Bold()))
+        self.Canvas.BackgroundBrush = wx.Brush("background", wx.SOLID)
+        self.Layout()
+        
+        #A new layout only if its settings changed
+        if (changed & LAYOUT_SETTINGS):
+            self.positions = layout_pos(self.graph[0], config)
+        
+        selectedNode = self.selectedNode
+        self.Canvas.ClearAll(ResetBB=False)
+        self.DrawGraph()
+        if (selectedNode in self.positions):
+            self.selectedNode = selectedNode
+            self.selectionRing.SetPoint(tuple(self.positions[selectedNode]))
+            self.selectionRing.Show()
+        self.Canvas.Draw(Force=True)
+
+    def SetResults(self):
+        #Every window keeps its own results, so it can page through them in multiWindow mode
+        self.results = results
+        self.query = resultQuery
+        self.resultIndex = len(results)-1 if results is not None else 0
+        #The shown graph is the last result that could be translated
+        while (self.resultIndex > 0 and results[self.resultIndex] is None): self.resultIndex -= 1
+        if (results is not None and self.resultIndex != len(results)-1):
+            self.SetStatusText(f"Result {len(results)} could not be translated",1)
+        self.UpdateNavigation()
+
+    def UpdateNavigation(self):
+        count = len(self.results) if self.results is not None else 0
+        for item in (self.prevButton, self.resultText, self.nextButton): item.Show(count > 1)
+        if (count > 1):
+            self.resultText.SetLabel(f"Result {self.resultIndex+1}/{count}")
+            self.prevButton.Enable(self.resultIndex > 0)
+            self.nextButton.Enable(self.resultIndex < count-1)
+
+    def ShowResult(self, index):
+        """
+        Shows another result of the query. The result is translated to a graph the first time it's shown
+
+        Args:
+            index (int): The index of the result
+        """
+        self.resultIndex = index
+        result = self.results[index]
+        if (result is None):
+            #Keep the previous graph
+            self.UpdateNavigation()
+            self.SetStatusText(f"Result {index+1} could not be translated",1)
+            return
+        setGraph(*result, self.query)
+        self.UpdateData()
+
+    def ShowTiming(self, timer):
+        """
+        Shows the stages of the query in the status bar and appends them to the timing log if enabled
+
+        Args:
+            timer (stageTimer.StageTimer): The timing of the query
+        """
+        self.SetStatusText(timer.summary(),2)
+        if (config.getboolean('TimingLog', fallback=False)):
+            try:
+                timer.write(path+'/timings.jsonl')
+            except OSError as e:
+                print("Error: Could not write the timing log.",e,file=sys.stderr)
+
+    def SaveGraph(self, filename):
+        """
+        Saves the drawn graph with its layout. It can be opened again without running the query
+
+        Args:
+            filename (str): The path of the file. Gzipped if it ends with .gz
+        """
+        DG, query, holds, isFact = self.graph
+        try:
+            graphBuilder.saveGraph(filename, DG, query, holds, isFact, self.positions)
+        except OSError as e:
+            print("Error: Could not save the graph.",e,file=sys.stderr)
+            return
+        self.SetStatusText("Saved "+filename,1)
+
     # ---------------------------------------------------------------------------- #
     #                                Event Functions                               #
     # ---------------------------------------------------------------------------- #
 
-    def OnOverPoints(self, obj):
-        #Find out which point
+    def OnPrevResult(self, event):
+        if (self.resultIndex > 0): self.ShowResult(self.resultIndex-1)
+
+    def OnNextResult(self, event):
+        if (self.resultIndex < len(self.results)-1): self.ShowResult(self.resultIndex+1)
+
+    def OnSaveClick(self, event):
+        dlg = wx.FileDialog(self, "Save graph", "", "graph.jsonl.gz", GRAPH_WILDCARD, 
+                            wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+        if dlg.ShowModal() == wx.ID_OK:
+            self.SaveGraph(dlg.GetPath())
+        dlg.Destroy()
+
+    def FindNodeAt(self, xy):
+        """
+        Finds the node drawn at a point, e.g. under the cursor
+
+        Args:
+            xy (tuple): The (x, y) world coordinates of the point
+
+        Returns:
+            int: The index of the node in self.nodes/self.nodeNames or None if there is no node there
+        """
+        radius = abs(self.Canvas.ScalePixelToWorld((self.nodeSize/2, self.nodeSize/2))[0])
+        return self.nodeIndex.nearest(xy, radius)
+
+    def OnEnterNode(self, nodeID):
         self.overPoints = True
-        nodeID = obj.FindClosestPoint(obj.HitCoords)
         if (debugPrint): print("Mouse over point: %s" % nodeID)
         
-        # --------------------------- Create hover elements -------------------------- #
-        #Label Highlight
+        # --------------------------- Show hover elements ---------------------------- #
         self.lastHighlight = nodeID
-        oldLabel = self.nodeLabels[nodeID]
-        self.highlightedLabel = Text(" "+oldLabel.String+" ", 
-                                     tuple(self.nodes[int(nodeID)]), 
-                                     Size=self.nodeTextSize, 
-                                     Position="cc", Color="background", BackgroundColor="nodeText", 
-                                     Weight=wx.FONTWEIGHT_BOLD, InForeground=True)
-        self.Canvas.AddObject(self.highlightedLabel)
-        self.hoverName = oldLabel.String
+        nodeName = self.nodeNames[nodeID]
+        nodeXY = tuple(self.nodes[nodeID])
+        self.hoverName = nodeName
         #Ring Highlight
-        self.hoverRing = Point(tuple(self.nodes[int(nodeID)]), 
-                               Diameter=self.nodeSize+self.selectionRingSize, Color="hoverNodeRing")
-        self.NodeRing = self.Canvas.AddObject(self.hoverRing)
-        
-        self.Canvas.Draw(Force=True)
+        self.hoverRing.SetPoint(nodeXY)
+        self.hoverNode.SetPoint(nodeXY)
+        if (nodeID == 0): self.hoverNode.SetColor("acceptNode" if self.graph[2] else "rejectNode")
+        else: self.hoverNode.SetColor("node")
+        #Label Highlight
+        self.highlightedLabel.SetText(" "+nodeName+" ")
+        self.highlightedLabel.TextWidth = self.highlightedLabel.TextHeight = None #Measured again on draw
+        self.highlightedLabel.SetPoint(nodeXY)
+        for hoverObj in (self.hoverRing, self.hoverNode, self.highlightedLabel): hoverObj.Show()
 
-    def OnLeavePoints(self, obj):
-        #Find out which point
+    def OnLeaveNode(self):
         self.overPoints = False
-        nodeID = obj.FindClosestPoint(obj.HitCoords)
-        if (debugPrint): print("Mouse left point: %s" % nodeID)
+        if (debugPrint): print("Mouse left point: %s" % self.lastHighlight)
 
         # ---------------------------- Hide hover elements --------------------------- #
         self.hoverName = ""
-        self.hoverDescriptionBox.Hide()
-        self.hoverDescription.Hide()
-        try:
-            self.Canvas.RemoveObject(self.highlightedLabel)
-        except Exception: pass
-        try:
-            self.Canvas.RemoveObject(self.hoverRing)
-        except Exception: pass
-        
-        
-        self.Canvas.Draw() 
+        for hoverObj in (self.hoverRing, self.hoverNode, self.highlightedLabel, 
+                         self.hoverDescriptionBox, self.hoverDescription):
+            hoverObj.Hide()
 
-    def OnClickPoints(self, obj):
-        #Find out which point
-        nodeID = obj.FindClosestPoint(obj.HitCoords)
+    def OnClickNode(self, nodeID, pixel):
         if (debugPrint): print("Mouse left down on point: %s" % nodeID)
         
-        # --------------------------- Create selection ring -------------------------- #
-        try:
-            self.Canvas.RemoveObject(self.thering)
-        except Exception: pass
-        self.thering = Point(tuple(self.nodes[int(nodeID)]), 
-                             Diameter=self.nodeSize+self.selectionRingSize, 
-                             Color="selectedNodeRing")
-        self.NodeRing = self.Canvas.AddObject(self.thering)
-        
+        # --------------------------- Move selection ring ---------------------------- #
+        self.selectedNode = self.nodeNames[nodeID]
+        self.selectionRing.SetPoint(tuple(self.nodes[nodeID]))
+        self.selectionRing.Show()
+        #The ring is in the background
         self.Canvas.Draw(Force=True)
         
         # --------------------------- Open Node Description -------------------------- #
-        nodeName = self.nodeLabels[nodeID].String
+        nodeName = self.nodeNames[nodeID]
         #Check if description window exists
         windowExists = False
         for descWindow in self.Canvas.GetChildren():
@@ -328,11 +574,17 @@ class FloatCanvasFrame(wx.Frame):
             DescriptionFrame(parent=self.Canvas,
                             title=nodeName,
                             text=desc,
-                            pos=self.ClientToScreen(obj.HitCoordsPixel))       
+                            pos=self.ClientToScreen(pixel))       
             
             
          
     def OnMouseDown(self, event):
+        #Click on a node
+        nodeID = self.FindNodeAt(event.Coords)
+        if (nodeID is not None):
+            self.OnClickNode(nodeID, event.GetPosition())
+            return
+        
         self.mouseDown=True
         self.x, self.y = self.lastx, self.lasty = event.Coords
         if (debugPrint): print(event.Coords)
@@ -341,57 +593,67 @@ class FloatCanvasFrame(wx.Frame):
         self.mouseDown=False
 
     def OnMouseMotion(self, event):
-        # ----------------------------- Status Bar Update ---------------------------- #
-        self.SetStatusText(f"{event.Coords[0]:.3f}, {event.Coords[1]:.3f}",0)
-        self.SetStatusText(f"{self.hoverName}",1)
-        
-        if (self.overPoints):
-            # --------------------------- Create hover Description -------------------------- #
-            textDesc = self.descriptions[self.nodeLabels[self.lastHighlight].String]['description']
-            textDescList = textDesc.split("\n")
-            offset = len(textDescList)
-            if (self.compactHoverDesc):
-                if (len(textDescList)>1):
-                    textDesc = textDescList[0]+"\n..."
-                    offset = 2
-                else:
-                    textDesc = textDescList[0]
-                    offset = 1
-            self.hoverDescription.SetText(textDesc)
-            
-            #Center Text
-            te = wx.DC.GetMultiLineTextExtent(self.dc,textDesc)
-            teWorld = self.Canvas.ScalePixelToWorld(te)
-            
-            newX , newY = (event.Coords[0] - teWorld[0]/2, event.Coords[1] - teWorld[1]-(teWorld[1]/offset)*2 )
-            if (debugPrint): print(newX,newY,te,teWorld)
-            self.hoverDescription.SetPoint((newX,newY))
-            
-            padding = 0.05
-            if (debugPrint): print("Before",newX,newY,teWorld)
-            boxX = (newX-padding)
-            boxY = (newY+padding)
-            boxH = (teWorld[0]+(padding*2))
-            boxW = (teWorld[1]-(padding*2))
-            if (debugPrint): print("After",boxX,boxY,(boxH,boxW))
-            
-            self.hoverDescriptionBox.SetShape((boxX,boxY),(boxH,boxW))
-            self.hoverDescriptionBox.SetFillColor("background")
-            self.hoverDescriptionBox.PutInBackground()
-            self.hoverDescriptionBox.PutInForeground()
-            self.hoverDescriptionBox.Show()
-            
-            self.hoverDescription.PutInBackground()
-            self.hoverDescription.PutInForeground()
-            self.hoverDescription.Show()
-            
-            self.Canvas.Draw()
+        # ------------------------------- Hover Update ------------------------------- #
+        #Motion events are coalesced. The hover is updated at most once per screen refresh
+        self.hoverCoords = event.Coords
+        if (not self.hoverPending):
+            self.hoverPending = True
+            wx.CallLater(self.hoverInterval, self.UpdateHover)
         
         # --------------------------------- Move View -------------------------------- #
         if event.Dragging() and self.mouseDown:
             self.x, self.y = event.Coords
             self.Canvas.MoveImage((self.lastx-self.x,self.lasty-self.y),"World")
 
+    def UpdateHover(self):
+        """
+        Updates the status bar and the hover elements for the last mouse position
+        """
+        self.hoverPending = False
+        if (not self): return #The window was closed
+        coords = self.hoverCoords
+        
+        # ------------------------------- Node hover -------------------------------- #
+        nodeID = self.FindNodeAt(coords)
+        changed = nodeID != (self.lastHighlight if self.overPoints else None)
+        if (changed):
+            if (self.overPoints): self.OnLeaveNode()
+            if (nodeID is not None): self.OnEnterNode(nodeID)
+        
+        # ----------------------------- Status Bar Update ---------------------------- #
+        self.SetStatusText(f"{coords[0]:.3f}, {coords[1]:.3f}",0)
+        self.SetStatusText(f"{self.hoverName}",1)
+        
+        if (self.overPoints): self.PlaceHoverDescription(coords)
+        #Only the foreground (hover elements) is drawn again
+        if (self.overPoints or changed): self.Canvas.Draw()
+
+    def PlaceHoverDescription(self, coords):
+        """
+        Shows the description of the hovered node above the cursor
+
+        Args:
+            coords (tuple): The world coordinates of the cursor
+        """
+        # --------------------------- Get hover Description -------------------------- #
+        #The text and its size are computed once per node
+        nodeName = self.nodeNames[self.lastHighlight]
+        if (nodeName not in self.hoverTexts):
+            textDesc, offset = hoverText(self.descriptions[nodeName]['description'], self.compactHoverDesc)
+            te = wx.DC.GetMultiLineTextExtent(self.dc,textDesc)
+            self.hoverTexts[nodeName] = (textDesc, te, offset)
+        textDesc, te, offset = self.hoverTexts[nodeName]
+        if (self.hoverDescription.String != textDesc): self.hoverDescription.SetText(textDesc)
+        
+        #Center Text
+        teWorld = self.Canvas.ScalePixelToWorld(te)
+        textXY, boxXY, boxWH = hoverPlacement(coords, teWorld, offset)
+        if (debugPrint): print(textXY,te,teWorld,boxXY,boxWH)
+        self.hoverDescription.SetPoint(textXY)
+        self.hoverDescriptionBox.SetShape(boxXY,boxWH)
+        self.hoverDescriptionBox.Show()
+        self.hoverDescription.Show()
+
     def OnMouseWheel(self, event):
         canvasA = self.Canvas.ViewPortBB[0]
         canvasB = self.Canvas.ViewPortBB[1] 
@@ -425,82 +687,19 @@ class FloatCanvasFrame(wx.Frame):
         self.hoverDescription.Hide()
         self.Canvas.ZoomToBB(NewBB=asBBox([canvasA,canvasB]))
         
+    def OnSettingsTimer(self, event):
+        #Notifies the listeners (Restyle) if settings.ini changed
+        config.reload()
+
     def OnClose(self, event):
+        self.settingsTimer.Stop()
+        config.unsubscribe(self.settingsListener)
         global CanvasFrame
         if (not isinstance(CanvasFrame,list)): CanvasFrame = None
         self.Destroy()
 
 
-def hierarchy_pos(G, root=None, width=1.0, vert_gap=1.0, root_y=0.0, root_x=0.0, downDirection=True):
-    """
-    Recursive function that calculates the node positions of a tree DiGraph
-
-    Args:
-        G (networkx.DiGraph): The Directed Graph from networkx
-        root (str, optional): The root of the tree Graph. Defaults to None.
-        width (float, optional): The amount of space the Graph will take horizontally. Defaults to 1.0.
-        vert_gap (float, optional): The vertical spaceing of the levels of the tree. Defaults to 1.0.
-        root_y (float, optional): vertical location of root. Defaults to 0.
-        root_x (float, optional): horizontal location of root. Defaults to 0.
-        downDirection (bool, optional): The Direction of the tree. Defaults to True.
-
-    Raises:
-        TypeError: If the graph is not a tree
-
-    Returns:
-        dict: The dict of node positions
-    """    
-    
-    #Checks if the graph is actually a tree
-    if not nx.is_tree(G):
-        raise TypeError('cannot use hierarchy_pos on a graph that is not a tree')
-
-    #Finds root if not provided
-    if root is None:
-        if isinstance(G, nx.DiGraph):
-            root = next(iter(nx.topological_sort(G)))  #allows back compatibility with nx version 1.11
-        else:
-            root = random.choice(list(G.nodes))
-
-    #The actual recursive function
-    def _hierarchy_pos(G, root, width=1.0, vert_gap=1.0, 
-                       root_y=0.0, root_x=0.0, 
-                       downDirection=True, pos=None, parent=None):
-        """
-        Internal recursive function
-
-        Extra Args:
-            pos (dict, optional): The dict of node positions. Defaults to None.
-            parent (str, optional): The parent of this branch. Defaults to None.
-
-        Returns:
-            dict: The dict of node positions
-        """        
-
-        if pos is None:
-            pos = {root:(root_x,root_y)}
-        else:
-            pos[root] = (root_x,root_y)
-        children = list(G.neighbors(root))
-        if not isinstance(G, nx.DiGraph) and parent is not None:
-            children.remove(parent)  
-        if len(children)!=0:
-            dx = width/len(children) 
-            next_x = root_x - width/2 - dx/2
-            for child in children:
-                next_x += dx
-                if (downDirection):
-                    new_root_y = root_y-vert_gap
-                else:
-                    new_root_y = root_y+vert_gap
-                pos = _hierarchy_pos(G, child, width=dx, vert_gap=vert_gap, 
-                                    root_y=new_root_y, root_x=next_x, 
-                                    downDirection=downDirection, pos=pos, parent=root)
-        return pos
-    return _hierarchy_pos(G, root, width, vert_gap, root_y, root_x, downDirection)
-
-
-def ShowUI(DG,query,argumentHolds,argumentIsFact,windowTitle,parent=None):
+def ShowUI(DG,query,argumentHolds,argumentIsFact,windowTitle,parent=None,results=None,positions=None,update=False,timer=None):
     """
     Opens/Updates the UI
 
@@ -511,20 +710,67 @@ def ShowUI(DG,query,argumentHolds,argumentIsFact,windowTitle,parent=None):
         argumentIsFact (bool): if the query/argument is a fact
         windowTitle (str): The title of the window
         parent (object, optional): The parent window of the windows that will open
+        results (graphBuilder.ResultList, optional): All the results of the query. 
+            If given, the window can page between them. The given graph should be the last one that could be translated.
+        positions (dict, optional): The (x, y) of every node, e.g. of a saved graph. Computed if not given.
+        update (bool, optional): In multiWindow mode, update the open window of the same query 
+            instead of opening a new one. Defaults to False.
+        timer (stageTimer.StageTimer, optional): The timing of the query. The layout and drawing stages 
+            are added to it and it's shown in the status bar. Defaults to a new timer.
     """    
     loadConfig()
+    if (timer is None): timer = StageTimer(query)
+    
+    with timer.stage("layout"):
+        setGraph(DG,argumentHolds,argumentIsFact,query,positions)
+    setResults(results,query)
     
+    global CanvasFrame      
+    with timer.stage("draw"):
+        if (config.getboolean('multiWindow')):
+            if (CanvasFrame is None): CanvasFrame = []
+            #Closed windows are false
+            frames = [frame for frame in CanvasFrame if frame and frame.graph[1] == query] if update else []
+            if (frames):
+                frame = frames[-1]
+                frame.SetResults()
+                frame.UpdateData()
+            else:
+                frame = FloatCanvasFrame(parent, title=windowTitle, size=(1280,720))
+                CanvasFrame.append(frame)
+        else:
+            if (CanvasFrame is None):
+                CanvasFrame = FloatCanvasFrame(parent, title=windowTitle, size=(1280,720))
+            else:
+                CanvasFrame.SetResults()
+                CanvasFrame.UpdateData()
+            frame = CanvasFrame
+    timer.addMemory("gui", peakMemory())
+    frame.ShowTiming(timer)
+
+def setGraph(DG,argumentHolds,argumentIsFact,query,nodePositions=None):
+    """
+    Sets the graph that the UI will draw
+
+    Args:
+        DG (networkx.DiGraph): The Graph
+        argumentHolds (bool): if the query/argument holds
+        argumentIsFact (bool): if the query/argument is a fact
+        query (str): The query
+        nodePositions (dict, optional): The (x, y) of every node. Computed if not given.
+    """    
     #Get Node Positions
     global positions, descriptions, edges
-    positions = hierarchy_pos(DG.reverse(), 
-                              width=config.getfloat('TreeWidth'), 
-                              vert_gap=config.getfloat('VerticalNodeDist'), 
-                              downDirection=config.getboolean('TreeGrowDirectionDown') )
+    if (nodePositions is not None):
+        positions = nodePositions
+    else:
+        positions = layout_pos(DG, config)
     descriptions = DG.nodes
     edges = DG.edges
     
     #Set Argument truth
-    global holds, resultTitle
+    global holds, resultTitle, graph
+    graph = (DG, query, argumentHolds, argumentIsFact)
     holds = argumentHolds
     if (argumentIsFact):
         resultTitle = "Argument "+query+" is a Fact"
@@ -532,16 +778,50 @@ def ShowUI(DG,query,argumentHolds,argumentIsFact,windowTitle,parent=None):
         resultTitle = "Argument "+query+" Holds"
     else:
         resultTitle = "Argument "+query+" does not Hold"
-    
-    global CanvasFrame      
-    if (config.getboolean('multiWindow')):
-        if (CanvasFrame is None): CanvasFrame = []
-        CanvasFrame.append(FloatCanvasFrame(parent, title=windowTitle, size=(1280,720)))
-    else:
-        if (CanvasFrame is None):
-            CanvasFrame = FloatCanvasFrame(parent, title=windowTitle, size=(1280,720))
-        else:
-            CanvasFrame.UpdateData()
+
+def setResults(queryResults,query):
+    """
+    Sets the results that the next window (or the updated window) will page through
+
+    Args:
+        queryResults (graphBuilder.ResultList): All the results of the query, or None
+        query (str): The query
+    """    
+    global results, resultQuery
+    results = queryResults
+    resultQuery = query
+
+def hoverText(description, compact):
+    """
+    The text of the hover description of a node
+
+    Args:
+        description (str): The description of the node
+        compact (bool): Only the first line, followed by "..." if there are more
+
+    Returns:
+        tuple: The text and its number of lines
+    """
+    lines = description.split("\n")
+    if (not compact): return description, len(lines)
+    if (len(lines) > 1): return lines[0]+"\n...", 2
+    return lines[0], 1
+
+def hoverPlacement(coords, textSize, lines, padding=0.05):
+    """
+    Places the hover description centered above the cursor
+
+    Args:
+        coords (tuple): The world coordinates of the cursor
+        textSize (tuple): The (width, height) of the text in world coordinates
+        lines (int): The number of lines of the text
+        padding (float, optional): The space around the text in its box. Defaults to 0.05.
+
+    Returns:
+        tuple: The (x, y) of the text, and the (x, y) and (width, height) of its box
+    """
+    x, y = coords[0] - textSize[0]/2, coords[1] - textSize[1] - (textSize[1]/lines)*2
+    return (x, y), (x-padding, y+padding), (textSize[0]+padding*2, textSize[1]-padding*2)
 
 def ShowUIDemo(id=1, DiGraph=None, windowTitle="Graph UI"):
     """
@@ -616,17 +896,16 @@ def ShowUIDemo(id=1, DiGraph=None, windowTitle="Graph UI"):
     
     #Get Node Positions
     global positions, descriptions, edges
-    positions = hierarchy_pos(DG.reverse(),"D", 
-                              width=config.getfloat('TreeWidth'), 
-                              vert_gap=config.getfloat('VerticalNodeDist'), 
-                              downDirection=config.getboolean('TreeGrowDirectionDown'))
+    positions = layout_pos(DG, config, "D")
     descriptions = DG.nodes
     edges = DG.edges
     
     #Set Argument truth
-    global holds, resultTitle
+    global holds, resultTitle, graph
     holds = True
     resultTitle = "This is a Demo!"
+    graph = (DG, "demo", True, False)
+    setResults(None,"")
     
     app = wx.App(False)
     CanvasFrame = FloatCanvasFrame(None, title=windowTitle, size=(1280,720) )
@@ -634,13 +913,11 @@ def ShowUIDemo(id=1, DiGraph=None, windowTitle="Graph UI"):
 
 def loadConfig():
     """
-    Loads the config from the disk to the global variable config
+    Sets the global variable config to the shared settings. settings.ini is only parsed again if it changed
     """     
     #Set global config
     global config
-    config = configparser.ConfigParser()
-    config.read(path+'/settings.ini')
-    config = config['UserSettings']
+    config = settings.load()
     #Set global debugPrint
     global debugPrint
     debugPrint = config.getboolean('printDebug')
@@ -1,39 +1,319 @@
+import os, json, time, hashlib, pathlib
+started = time.perf_counter()
 from argparse import ArgumentParser
 from pyswip import Prolog
-from sys import stderr
+from sys import stderr, stdin
+
+import settings
+from stageTimer import peakMemory
+from prologWorker import END_MARKER, QUERY_MARKER, parseQueries
+from resultCache import theoryHash
 
 # Defaults
 resultVariable = "A"
 queryFunction = "extended_prove_with_tree"
 
-# Create interaction object 
+# Create interaction object
 prolog = Prolog()
 
+# Seconds to import pyswip and start SWI-Prolog. Sent with the first query of the worker
+startup = time.perf_counter() - started
+
+# The .pl file that is currently consulted (Used by the worker mode).
+# hash is the resultCache.theoryHash of the .pl file and the files it loads when it was loaded.
+# path is the file that was loaded: The .pl file or its .qlf. load is the timing of the last load
+loaded = {"filename":None, "hash":None, "path":None, "load":None}
+
+# Quick load files (QuickLoad in settings.ini), named by the hash of the theory. The newest qlfKeep are kept
+qlfPath = str( pathlib.Path(__file__).parent.absolute() )+'/cache/qlf'
+qlfKeep = 16
+# Seconds a .pl file that couldn't be compiled (e.g. in a read-only folder) is consulted before it's compiled again
+qlfRetry = 24*3600
+
 def main():
 
     parser = ArgumentParser()
-    parser.add_argument("-f", "--filename", required=True)
+    parser.add_argument("-f", "--filename", required=False)
 
-    parser.add_argument("-q", "--query", required=True)
+    parser.add_argument("-q", "--query", required=False)
     parser.add_argument("-r", "--resultVariable", required=False, default=resultVariable)
     parser.add_argument("-x", "--queryFunction", required=False, default=queryFunction)
+    parser.add_argument("-w", "--worker", action="store_true",
+                        help="Keep running and read JSON queries from stdin, one per line")
+    parser.add_argument("-b", "--queries-file", required=False, dest="queriesFile",
+                        help="Run every query of the file (one per line) with a single consult")
     args = parser.parse_args()
-    
-    #Build query
-    query = args.queryFunction+"(["+args.query+"],"+args.resultVariable+")"
+
+    if (args.worker):
+        runWorker()
+        return
+    if (args.filename is None):
+        parser.error("the following arguments are required: -f/--filename")
+    if (args.query is None and args.queriesFile is None):
+        parser.error("one of the arguments -q/--query -b/--queries-file is required")
 
     #Consult pl file
-    prolog.consult(args.filename.replace("\\","/"))
+    loadTheory(args.filename.replace("\\","/"))
+
+    #Batch mode. Every output starts with a QUERY_MARKER line
+    if (args.queriesFile is not None):
+        with open(args.queriesFile) as f:
+            queries = parseQueries(f.read())
+        for q in queries:
+            print("\n"+QUERY_MARKER+q, flush=True)
+            try:
+                runQuery(q, args.queryFunction, args.resultVariable)
+            except Exception as e:
+                print(e,file=stderr)
+            flushOutput()
+        return
 
     #Run it and get all results
     try:
-        for next in prolog.query(query):
-            pass #Simply running the query sends the output to stdout. No need to print
-
+        runQuery(args.query, args.queryFunction, args.resultVariable)
     except Exception as e:
         print(e,file=stderr)
         pass
 
 
+def runQuery(q, function=queryFunction, variable=resultVariable):
+    """
+    Builds and runs a Gorgias query on the consulted file
+
+    Args:
+        q (str): The query
+        function (str, optional): The Gorgias predicate to call. Defaults to queryFunction.
+        variable (str, optional): The result variable. Defaults to resultVariable.
+    """
+    #Build query
+    query = function+"(["+q+"],"+variable+")"
+
+    for next in prolog.query(query):
+        pass #Simply running the query sends the output to stdout. No need to print
+
+
+def runWorker():
+    """
+    Serves queries until stdin is closed. Every line of stdin is a JSON object with the keys
+    "filename", "query" and optionally "queryFunction", "resultVariable" and "reload".
+    Without a "query" the file is only consulted.
+    The output of each query is followed by a line with the END_MARKER and a JSON status.
+    When the file was (re)loaded the status has the "load" timing (see loadTheory).
+    The status has the "theory" hash of the loaded files (see consultFile), so the caller knows which
+    version of the theory answered.
+    The status also has the "timings" (seconds) of the stages and the "peakMB" memory of the worker.
+    """
+    global startup
+    while True:
+        request = stdin.readline()
+        if (request == ""): break #stdin closed
+        if (request.isspace()): continue
+
+        status = {"error":None}
+        timings = status["timings"] = {}
+        if (startup is not None):
+            timings["startup"], startup = startup, None
+        try:
+            request = json.loads(request)
+            if consultFile(request["filename"], request.get("reload",False)):
+                status["load"] = loaded["load"]
+                timings["load"] = loaded["load"]["seconds"]
+            status["theory"] = loaded["hash"]
+            start = time.perf_counter()
+            if ("query" in request):
+                runQuery(request["query"],
+                         request.get("queryFunction",queryFunction),
+                         request.get("resultVariable",resultVariable))
+                timings["query"] = time.perf_counter() - start
+        except Exception as e:
+            status["error"] = str(e)
+
+        flushOutput()
+        status["peakMB"] = peakMemory()
+        print("\n"+END_MARKER+json.dumps(status), flush=True)
+
+
+def flushOutput():
+    """
+    Flushes the output of Prolog. Prolog and python buffer stdout separately,
+    so Prolog must be flushed before python prints to keep the order
+    """
+    try:
+        for next in prolog.query("flush_output(user_output)"): pass
+    except Exception: pass
+
+
+def consultFile(filename, reload=False):
+    """
+    Consults a .pl file unless it's already loaded and unchanged. The file changed if it or any file
+    it loads (consult/include/ensure_loaded, see resultCache.theoryFiles) changed since it was loaded.
+    A previously loaded different file is unloaded first.
+
+    Args:
+        filename (str): The path to the .pl file
+        reload (bool, optional): Reload the files that were modified even if the theory looks unchanged. Defaults to False.
+
+    Returns:
+        bool: If the file was (re)consulted
+    """
+    filename = filename.replace("\\","/")
+    #The files are only read again when their modified time or size changed
+    digest = theoryHash(filename)
+    if (filename == loaded["filename"]):
+        if (digest == loaded["hash"] and not reload): return False
+        if (loaded["path"] == filename):
+            #make reloads every loaded source file that was modified, the .pl file and the files it loads
+            start = time.perf_counter()
+            for next in prolog.query("make"): pass
+            loaded.update(hash=digest, load={"mode":"make", "seconds":time.perf_counter()-start})
+            return True
+
+    #A source file is reloaded in place by consult. A different file or a .qlf is unloaded first
+    if (loaded["filename"] is not None and (filename != loaded["filename"] or loaded["path"] != filename)):
+        for next in prolog.query("unload_file("+quoteAtom(loaded["filename"])+")"): pass
+        if (loaded["path"] != loaded["filename"]):
+            for next in prolog.query("unload_file("+quoteAtom(loaded["path"])+")"): pass
+
+    path, load = loadTheory(filename)
+    loaded.update(filename=filename, hash=digest, path=path, load=load)
+    return True
+
+
+def loadTheory(filename):
+    """
+    Loads a .pl file. With QuickLoad in settings.ini the file is compiled once (qcompile) to a quick load file
+    in qlfPath, named by the hash of the file and the files it loads. The next times the .qlf is loaded,
+    which skips the compilation. If there is no usable .qlf the file is consulted, and a file that couldn't be
+    compiled is consulted for qlfRetry seconds.
+    The hash covers the files named in consult/include/ensure_loaded/compile/load_files directives of the .pl file
+    (resultCache.theoryFiles). Files loaded otherwise (use_module, path aliases, goals that consult at run time)
+    are not covered: A change in them doesn't compile the .qlf again, unless the .pl file changes too
+
+    Args:
+        filename (str): The path to the .pl file
+
+    Returns:
+        str: The path of the loaded file (the .pl or the .qlf)
+        dict: The "mode" (consult, compile or qlf) and the "seconds" it took
+    """
+    start = time.perf_counter()
+    if (settings.load().getboolean('QuickLoad', fallback=False)):
+        qlf = os.path.join(qlfPath, theoryHash(filename)+".qlf")
+        try:
+            if (not os.path.exists(qlf) and not compileFailed(filename) and compileTheory(filename, qlf)):
+                #qcompile also loads the file
+                return filename, {"mode":"compile", "seconds":time.perf_counter()-start}
+            if (waitForFile(qlf)):
+                for next in prolog.query("load_files("+quoteAtom(qlf)+",[])"): pass
+                os.utime(qlf) #Mark as recently used
+                return qlf, {"mode":"qlf", "seconds":time.perf_counter()-start}
+        except Exception as e:
+            #E.g. a .qlf of another version of SWI-Prolog. It's compiled again next time
+            print("Quick load failed:",e,file=stderr)
+            try:
+                os.remove(qlf)
+            except OSError: pass
+        start = time.perf_counter()
+
+    prolog.consult(filename)
+    return filename, {"mode":"consult", "seconds":time.perf_counter()-start}
+
+
+def compileTheory(filename, qlf):
+    """
+    Compiles a .pl file to a quick load file. Only one process compiles a theory at a time (lock file)
+
+    Args:
+        filename (str): The path to the .pl file
+        qlf (str): The path of the .qlf
+
+    Returns:
+        bool: If the file was compiled (and loaded). False if another process is compiling it
+    """
+    os.makedirs(qlfPath, exist_ok=True)
+    lock = qlf+".lock"
+    try:
+        os.close(os.open(lock, os.O_CREAT|os.O_EXCL|os.O_WRONLY))
+    except FileExistsError:
+        #A lock older than 10 minutes was left by a process that died
+        try:
+            if (time.time()-os.path.getmtime(lock) > 600): os.remove(lock)
+        except OSError: pass
+        return False
+    try:
+        #qcompile writes the .qlf next to the .pl file
+        for next in prolog.query("qcompile("+quoteAtom(filename)+")"): pass
+        os.replace(os.path.splitext(filename)[0]+".qlf", qlf)
+    except Exception:
+        #E.g. the folder of the .pl file is read-only. Don't try on every load
+        with open(failedMarker(filename), "w") as f:
+            f.write(filename)
+        raise
+    finally:
+        os.remove(lock)
+
+    #Delete the oldest .qlf files
+    files = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(qlfPath) if entry.name.endswith(".qlf"))
+    for mtime, path in files[:-qlfKeep]:
+        try:
+            os.remove(path)
+        except OSError: pass
+    return True
+
+
+def failedMarker(filename):
+    """
+    Args:
+        filename (str): The path to the .pl file
+
+    Returns:
+        str: The path of the file that records that the .pl file couldn't be compiled
+    """
+    name = hashlib.sha1(os.path.normcase(os.path.abspath(filename)).encode()).hexdigest()
+    return os.path.join(qlfPath, name+".failed")
+
+
+def compileFailed(filename):
+    """
+    Args:
+        filename (str): The path to the .pl file
+
+    Returns:
+        bool: If compiling the .pl file failed in the last qlfRetry seconds
+    """
+    try:
+        return time.time()-os.path.getmtime(failedMarker(filename)) < qlfRetry
+    except OSError:
+        return False
+
+
+def waitForFile(filename, timeout=60):
+    """
+    Waits while another process compiles a .qlf
+
+    Args:
+        filename (str): The path of the .qlf
+        timeout (float, optional): Seconds to wait. Defaults to 60.
+
+    Returns:
+        bool: If the file exists
+    """
+    deadline = time.monotonic() + timeout
+    while (not os.path.exists(filename) and os.path.exists(filename+".lock") and time.monotonic() < deadline):
+        time.sleep(0.1)
+    return os.path.exists(filename)
+
+
+def quoteAtom(text):
+    """
+    Args:
+        text (str): Any text
+
+    Returns:
+        str: The text as a quoted Prolog atom
+    """
+    return "'"+text.replace("\\","\\\\").replace("'","\\'")+"'"
+
+
 if __name__ == "__main__":
-	main()        
\ No newline at end of file
+	main()
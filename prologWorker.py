@@ -0,0 +1,414 @@
+import sys, os, subprocess, threading, queue, json, time, pathlib
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# ---------------------------------- Globals --------------------------------- #
+#Local path
+path = str( pathlib.Path(__file__).parent.absolute() )
+
+#Line printed by prolog.py (worker mode) after the output of every query.
+#It is followed by a JSON object with the status of the query
+END_MARKER = "@@GORGIAS-VISUAL-END@@"
+
+#Line printed by prolog.py (batch mode, -b) before the output of every query, so a script
+#reading the output can split it. It is followed by the query. The GUI batches use the workers instead
+QUERY_MARKER = "@@GORGIAS-VISUAL-QUERY@@"
+
+class QueryCancelled(Exception):
+    """
+    Raised by PrologWorker.query when the query is cancelled with PrologWorker.cancel
+    """
+    pass
+
+
+class PrologWorker(object):
+    """
+    A long-lived prolog.py subprocess (worker mode) that keeps SWI-Prolog and the consulted
+    .pl file loaded between queries. The process is started on the first query and restarted
+    automatically if it dies or times out.
+    """
+
+    def __init__(self, script=None):
+        self.script = script if script is not None else path+'/prolog.py'
+        self.proc = None
+        self.lines = None
+        self.errors = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+        #The "mode" (consult, compile, qlf or make) and "seconds" of the load of the .pl file by the last query.
+        #None if the file was already loaded
+        self.lastLoad = None
+        #The seconds of the stages of the last query (spawn, startup, load, query, transfer) and the peak memory
+        #of the worker in MB
+        self.lastTimings = {}
+        self.lastPeak = None
+        #The resultCache.theoryHash of the theory that answered the last query. None if it's not known
+        self.lastTheory = None
+
+    def start(self):
+        """
+        Starts the worker process and the threads that read its output
+        """
+        self.proc = subprocess.Popen([sys.executable or 'python', self.script, '--worker'],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                     encoding='utf-8', errors='replace')
+        self.lines = queue.Queue()
+        self.errors = queue.Queue()
+        threading.Thread(target=_readLines, args=(self.proc.stdout, self.lines), daemon=True).start()
+        threading.Thread(target=_readLines, args=(self.proc.stderr, self.errors), daemon=True).start()
+
+    def isAlive(self):
+        """
+        Returns:
+            bool: If the worker process is running
+        """
+        return self.proc is not None and self.proc.poll() is None
+
+    def query(self, file, query, timeout=15, queryFunction=None, resultVariable=None, reload=False):
+        """
+        Runs a query on the worker. The .pl file is consulted only if it's not already loaded
+        or if it changed since the last query. Changes of the files it loads are only seen with reload.
+
+        Args:
+            file (str): The path to the .pl file
+            query (str): The query to run. If None the file is only consulted
+            timeout (float, optional): Seconds to wait for the result. Defaults to 15.
+            queryFunction (str, optional): The Gorgias predicate to call. Defaults to the one of prolog.py.
+            resultVariable (str, optional): The result variable. Defaults to the one of prolog.py.
+            reload (bool, optional): Reload every loaded file that changed (make) before the query. Defaults to False.
+
+        Raises:
+            subprocess.TimeoutExpired: If the query didn't finish in time. The worker is killed.
+            QueryCancelled: If cancel was called while the query was running.
+
+        Returns:
+            str: The output of the query
+            str: The errors of the query
+        """
+        request = {"filename":file.replace("\\","/")}
+        if query is not None: request["query"] = query
+        if queryFunction is not None: request["queryFunction"] = queryFunction
+        if resultVariable is not None: request["resultVariable"] = resultVariable
+        if reload: request["reload"] = True
+        out, err, status = self.request(request, timeout)
+        return out, err
+
+    def request(self, request, timeout=15):
+        """
+        Sends a request to the worker and waits for its output
+
+        Args:
+            request (dict): The request (see prolog.runWorker)
+            timeout (float, optional): Seconds to wait for the result. Defaults to 15.
+
+        Raises:
+            subprocess.TimeoutExpired: If the query didn't finish in time. The worker is killed.
+            QueryCancelled: If cancel was called while the query was running.
+
+        Returns:
+            str: The output of the query
+            str: The errors of the query
+            dict: The status the worker printed after the end marker
+        """
+        query = request.get("query")
+        with self.lock:
+            self.cancelled = False
+            self.lastLoad = None
+            self.lastTimings = {}
+            self.lastPeak = None
+            self.lastTheory = None
+            start = time.perf_counter()
+            if not self.isAlive():
+                self.start()
+                self.lastTimings["spawn"] = time.perf_counter() - start
+            requestStart = time.perf_counter()
+
+            try:
+                self.proc.stdin.write(json.dumps(request)+"\n")
+                self.proc.stdin.flush()
+            except (OSError, AttributeError):
+                #The worker died (or was cancelled) before receiving the query
+                self.kill()
+                if (self.cancelled): raise QueryCancelled(query)
+                return "", self.readErrors(), {}
+
+            #Collect lines until the end marker
+            out = []
+            status = {}
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    line = self.lines.get(timeout=max(0, deadline-time.monotonic()))
+                except queue.Empty:
+                    self.kill()
+                    raise subprocess.TimeoutExpired(self.script, timeout)
+                if line is None: #Worker exited
+                    self.kill()
+                    if (self.cancelled): raise QueryCancelled(query)
+                    break
+                if line.startswith(END_MARKER):
+                    status = json.loads(line[len(END_MARKER):])
+                    break
+                out.append(line)
+
+            err = self.readErrors()
+            if status.get("error"): err = err + status["error"] + "\n"
+            self.lastLoad = status.get("load")
+            #The rest of the time is spent sending the request and reading the output
+            timings = status.get("timings") or {}
+            self.lastTimings.update(timings)
+            self.lastTimings["transfer"] = max(0, time.perf_counter() - requestStart - sum(timings.values()))
+            self.lastPeak = status.get("peakMB")
+            self.lastTheory = status.get("theory")
+            return ''.join(out), err, status
+
+    def consult(self, file, timeout=15, reload=False):
+        """
+        Loads the .pl file in the worker without running a query
+
+        Args:
+            file (str): The path to the .pl file
+            timeout (float, optional): Seconds to wait. Defaults to 15.
+            reload (bool, optional): Reload every loaded file that changed. Defaults to False.
+
+        Returns:
+            str: The errors of the consult
+        """
+        return self.query(file, None, timeout, reload=reload)[1]
+
+    def readErrors(self):
+        """
+        Returns:
+            str: All the error output the worker printed since the last call
+        """
+        err = []
+        while True:
+            try:
+                line = self.errors.get_nowait()
+            except queue.Empty:
+                break
+            if line is not None: err.append(line)
+        return ''.join(err)
+
+    def cancel(self):
+        """
+        Cancels the running query by killing the worker. Can be called from any thread
+        """
+        self.cancelled = True
+        self.kill()
+
+    def kill(self):
+        """
+        Stops the worker process. It will be restarted by the next query
+        """
+        proc, self.proc = self.proc, None
+        if proc is not None:
+            try:
+                proc.kill()
+                proc.wait()
+            except Exception: pass
+
+
+class PrologPool(object):
+    """
+    A pool of PrologWorkers that runs a list of queries in parallel. Every worker has
+    its own SWI-Prolog engine with the .pl file consulted, so the queries are spread over the CPU cores
+    """
+
+    def __init__(self, size=0, script=None):
+        """
+        Args:
+            size (int, optional): The number of workers. 0 uses one worker per CPU core. Defaults to 0.
+            script (str, optional): The path to prolog.py. Defaults to the one next to this file.
+        """
+        self.size = poolSize(size)
+        self.script = script
+        self.workers = [PrologWorker(script) for i in range(self.size)]
+        self.idle = queue.Queue()
+        for worker in self.workers: self.idle.put(worker)
+        self.executor = ThreadPoolExecutor(max_workers=self.size)
+        self.futures = [] #The queries of the last map
+        self.cancelled = False
+
+    def warm(self, file, timeout=15):
+        """
+        Consults the .pl file in all workers in parallel. A worker that times out is killed and 
+        restarted (and consults the file again) by its next query
+
+        Args:
+            file (str): The path to the .pl file
+            timeout (float, optional): Seconds to wait for each worker. Defaults to 15.
+
+        Raises:
+            QueryCancelled: If the pool was cancelled
+        """
+        self.cancelled = False
+        def consult(worker):
+            if (self.cancelled): raise QueryCancelled(file)
+            try:
+                worker.consult(file, timeout)
+            except subprocess.TimeoutExpired:
+                print("Warning: A worker timed out while consulting "+os.path.basename(file),file=sys.stderr)
+        list(self.executor.map(consult, self.workers))
+
+    def map(self, file, queries, timeout=15, process=None):
+        """
+        Runs the queries on the workers. A worker that times out is restarted for the next query
+
+        Args:
+            file (str): The path to the .pl file
+            queries (list): The queries to run
+            timeout (float, optional): Seconds to wait for each query. Defaults to 15.
+            process (function, optional): Called with the query and its output, in the thread of the query
+                after its worker is free. Its result replaces the output. Not called for empty outputs. Defaults to None.
+
+        Raises:
+            QueryCancelled: If the pool was cancelled
+
+        Returns:
+            iterator: The (output, errors) of every query, in the order of the queries.
+            output is None if the query timed out
+        """
+        def run(query):
+            #Queries that already left the queue when the pool was cancelled
+            if (self.cancelled): raise QueryCancelled(query)
+            worker = self.idle.get()
+            try:
+                out, err = worker.query(file, query, timeout)
+            except subprocess.TimeoutExpired:
+                return None, "Error: Subprocess Timeout Expired\n"
+            finally:
+                self.idle.put(worker)
+            if (process is not None and out != "" and not out.isspace()): out = process(query, out)
+            return out, err
+
+        def results(futures):
+            for future in futures:
+                try:
+                    yield future.result()
+                except CancelledError:
+                    raise QueryCancelled("The batch was cancelled")
+        self.futures = [self.executor.submit(run, query) for query in queries]
+        return results(self.futures)
+
+    def cancel(self):
+        """
+        Cancels the batch: The queued queries don't start and the running queries of all workers are killed
+        """
+        self.cancelled = True
+        for future in self.futures: future.cancel()
+        for worker in self.workers: worker.cancel()
+
+    def close(self):
+        """
+        Stops all workers
+        """
+        self.executor.shutdown(wait=False)
+        for worker in self.workers: worker.kill()
+
+
+def evaluate(pool, file, queries, timeout=15, export=None):
+    """
+    Runs the queries on a PrologPool and parses the outputs with graphBuilder in the threads of the pool.
+    Each output is parsed as soon as it arrives, while the other workers keep running their queries.
+    Parsing in other processes was slower: Sending the outputs to them took about a third of the parse time
+
+    Args:
+        pool (PrologPool): The pool that runs the queries
+        file (str): The path to the .pl file
+        queries (list): The queries to run
+        timeout (float, optional): Seconds to wait for each query. Defaults to 15.
+        export (function, optional): Called with the query and the output of every query that returned one,
+            e.g. graphBuilder.exportResult. Defaults to None.
+
+    Raises:
+        QueryCancelled: If the pool was cancelled
+
+    Returns:
+        list: A list of (query, result, errors) tuples in the order of the queries.
+        result is the (DiGraph, holds, isFact) or None
+    """
+    from graphBuilder import parseResult
+
+    def process(query, out):
+        if (export is not None): export(query, out)
+        return parseResult(query, out)
+
+    pool.warm(file, timeout)
+    rows = []
+    for query, (result, err) in zip(queries, pool.map(file, queries, timeout, process)):
+        #Empty outputs are not parsed
+        rows.append((query, result if isinstance(result, tuple) else None, err))
+    return rows
+
+
+def poolSize(size):
+    """
+    Args:
+        size (int): The PoolWorkers setting. 0 uses one worker per CPU core
+
+    Returns:
+        int: The number of workers of a PrologPool
+    """
+    return size if size > 0 else (os.cpu_count() or 1)
+
+
+def _readLines(stream, lineQueue):
+    """
+    Moves every line of a stream to a queue. None is put when the stream closes
+
+    Args:
+        stream (file): The stream to read
+        lineQueue (queue.Queue): The queue that receives the lines
+    """
+    try:
+        for line in iter(stream.readline, ''):
+            lineQueue.put(line)
+    except (OSError, ValueError): pass
+    lineQueue.put(None)
+
+
+def parseQueries(text):
+    """
+    Splits a batch of queries, one per line. Empty lines and lines starting with % are skipped
+
+    Args:
+        text (str): The queries
+
+    Returns:
+        list: The list of queries
+    """
+    queries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if (line != "" and not line.startswith("%")): queries.append(line)
+    return queries
+
+
+def prologScript(config=None):
+    """
+    Args:
+        config (settings.Settings, optional): The settings. PrologScript replaces prolog.py 
+            (e.g. with benchmarks/mockProlog.py). Defaults to None.
+
+    Returns:
+        str: The path of the script the workers run. A relative PrologScript is relative to this folder
+    """
+    script = config.get('PrologScript', fallback='').strip() if config is not None else ''
+    if (script == ''): return path+'/prolog.py'
+    return os.path.join(path, script)
+
+
+def loadSummary(file, load):
+    """
+    Args:
+        file (str): The path to the .pl file
+        load (dict): The "mode" and "seconds" of a load (PrologWorker.lastLoad)
+
+    Returns:
+        str: A line that says how the file was loaded and how long it took
+    """
+    name = os.path.basename(file)
+    text = {"consult":"Consulted "+name, "compile":"Compiled and loaded "+name+" (qlf)",
+            "qlf":"Loaded "+name+" from qlf", "make":"Reloaded the changed files of "+name}.get(load["mode"], name)
+    return "%s in %.3fs" % (text, load["seconds"])
+
@@ -0,0 +1,214 @@
+import os, re, json, hashlib, threading, pathlib
+from collections import OrderedDict
+
+# ---------------------------------- Globals --------------------------------- #
+#Local path
+path = str( pathlib.Path(__file__).parent.absolute() )
+
+#Directives that load other files into the theory
+includePattern = re.compile(r":-\s*(?:(?:consult|include|ensure_loaded|compile|load_files)\s*\(|\[)(.*?)\.(?:\s|$)", re.DOTALL)
+filePattern = re.compile(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"|([A-Za-z0-9_./\\-]+)")
+
+#(mtime, size, SHA-1, includes) of every file read so far
+fileInfo = {}
+
+
+class ResultCache(object):
+    """
+    Cache of query outputs, in memory (LRU) and on disk.
+    The key contains the hash of the .pl file and of the files it loads,
+    so the entries of a theory are not used again after it changes.
+
+    The memory entries keep the parsed results (graphBuilder.ResultList),
+    the disk entries keep the raw output of SWI-Prolog.
+    """
+
+    def __init__(self, directory=None, memoryEntries=32, memoryBytes=64*1024*1024, diskBytes=256*1024*1024):
+        """
+        Args:
+            directory (str, optional): The directory of the disk cache. None disables the disk cache.
+            memoryEntries (int, optional): The max number of queries kept in memory. Defaults to 32.
+            memoryBytes (int, optional): The max size of the outputs kept in memory. Defaults to 64MB.
+            diskBytes (int, optional): The max size of the disk cache. Defaults to 256MB.
+        """
+        self.directory = directory
+        self.memoryEntries = memoryEntries
+        self.memoryBytes = memoryBytes
+        self.diskBytes = diskBytes
+        self.memory = OrderedDict()
+        self.memorySize = 0
+        self.lock = threading.Lock()
+        if (directory is not None): os.makedirs(directory, exist_ok=True)
+
+    def key(self, file, query, queryFunction=None, resultVariable=None, script=None, theory=None):
+        """
+        Args:
+            file (str): The path to the .pl file
+            query (str): The query
+            queryFunction (str, optional): The Gorgias predicate. None for the default of prolog.py.
+            resultVariable (str, optional): The result variable. None for the default of prolog.py.
+            script (str, optional): The script that runs the query (PrologScript), so the outputs of 
+                another backend (e.g. benchmarks/mockProlog.py) are never used for prolog.py. Defaults to None.
+            theory (str, optional): The theoryHash of the theory, e.g. the one the worker reported for its output
+                (PrologWorker.lastTheory). Defaults to the current content of the theory.
+
+        Returns:
+            str: The key of the query on the theory
+        """
+        key = [theoryHash(file) if theory is None else theory, query, queryFunction, resultVariable]
+        if (script is not None): key.append(os.path.normcase(os.path.abspath(script)))
+        return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Args:
+            key (str): The key of the query
+
+        Returns:
+            str: The raw output of the query or None if it's not cached
+            ResultList: The parsed results or None if only the raw output is cached (on disk)
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+
+        if (self.directory is None): return None, None
+        filename = os.path.join(self.directory, key+".txt")
+        try:
+            with open(filename, encoding="utf-8") as f:
+                out = f.read()
+            os.utime(filename) #Mark as recently used for the eviction
+        except OSError:
+            return None, None
+        return out, None
+
+    def put(self, key, out, results=None):
+        """
+        Stores the output of a query
+
+        Args:
+            key (str): The key of the query
+            out (str): The raw output of the query
+            results (ResultList, optional): The parsed results. Only kept in memory.
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memorySize -= len(self.memory.pop(key)[0])
+            self.memory[key] = (out, results)
+            self.memorySize += len(out)
+            #Evict the least recently used entries
+            while len(self.memory) > 1 and (len(self.memory) > self.memoryEntries or self.memorySize > self.memoryBytes):
+                self.memorySize -= len(self.memory.popitem(last=False)[1][0])
+
+        if (self.directory is None): return
+        filename = os.path.join(self.directory, key+".txt")
+        if not os.path.exists(filename):
+            try:
+                with open(filename+".tmp", "w", encoding="utf-8") as f:
+                    f.write(out)
+                os.replace(filename+".tmp", filename)
+            except OSError: return
+        self.evictDisk()
+
+    def evictDisk(self):
+        """
+        Deletes the least recently used files of the disk cache until it fits in diskBytes
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".txt")]
+        except OSError: return
+        stats = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries]
+        total = sum(size for mtime, size, filename in stats)
+        for mtime, size, filename in sorted(stats):
+            if (total <= self.diskBytes): break
+            try:
+                os.remove(filename)
+                total -= size
+            except OSError: pass
+
+    def clear(self):
+        """
+        Removes all the entries, in memory and on disk
+        """
+        with self.lock:
+            self.memory.clear()
+            self.memorySize = 0
+        if (self.directory is None): return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".txt"):
+                try:
+                    os.remove(entry.path)
+                except OSError: pass
+
+
+def theoryFiles(file):
+    """
+    Finds the files of a theory: The .pl file and the files it loads with consult/include/ensure_loaded/compile
+    directives, recursively. Library files and files that don't exist are skipped
+
+    Args:
+        file (str): The path to the .pl file
+
+    Returns:
+        list: The paths of the files
+    """
+    files = []
+    pending = [os.path.abspath(file)]
+    while pending:
+        current = pending.pop(0)
+        if current in files: continue
+        files.append(current)
+        pending.extend(_fileInfo(current)[1])
+    return files
+
+
+def theoryHash(file):
+    """
+    Args:
+        file (str): The path to the .pl file
+
+    Returns:
+        str: The SHA-1 of the content of the .pl file and of the files it loads
+    """
+    digest = hashlib.sha1()
+    for filename in theoryFiles(file):
+        digest.update(filename.encode())
+        digest.update(_fileInfo(filename)[0].encode())
+    return digest.hexdigest()
+
+
+def _fileInfo(filename):
+    """
+    Reads a file of the theory. The result is reused while the modified time and size of the file don't change
+
+    Args:
+        filename (str): The absolute path of the file
+
+    Returns:
+        str: The SHA-1 of the file content. Empty if the file can't be read
+        list: The absolute paths of the files it loads
+    """
+    try:
+        stat = os.stat(filename)
+        known = fileInfo.get(filename)
+        if (known is not None and known[0] == stat.st_mtime_ns and known[1] == stat.st_size): return known[2:]
+        with open(filename, "rb") as f:
+            content = f.read()
+    except OSError: return "", []
+
+    includes = []
+    folder = os.path.dirname(filename)
+    for directive in includePattern.finditer(content.decode("utf-8", errors="replace")):
+        for match in filePattern.finditer(directive.group(1)):
+            name = next(group for group in match.groups() if group is not None)
+            if (name == "library"): continue
+            name = os.path.join(folder, name)
+            for candidate in (name, name+".pl"):
+                if os.path.isfile(candidate):
+                    includes.append(os.path.abspath(candidate))
+                    break
+
+    digest = hashlib.sha1(content).hexdigest()
+    fileInfo[filename] = (stat.st_mtime_ns, stat.st_size, digest, includes)
+    return digest, includes
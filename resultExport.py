@@ -0,0 +1,147 @@
+import sys, os, re, time, gzip, queue, atexit, threading, traceback
+from datetime import datetime
+
+#Optional. Only needed for the zstd compression
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+#File extension of every compression
+EXTENSIONS = {"none":".txt", "gzip":".txt.gz", "zstd":".txt.zst"}
+
+
+class ResultExporter(object):
+    """
+    Writes the exported results (output.txt, outputRAW.txt) in a background thread, so the query
+    doesn't wait for the disk. The files are written in the order they were queued.
+
+    Without timestamps every export overwrites the previous one (output.txt).
+    With timestamps every export gets its own file (output-20240101-120000-000000-query.txt) and the
+    oldest ones are deleted by the retention policy (keepFiles, keepDays).
+    """
+
+    def __init__(self, directory, timestamped=False, compression="none", keepFiles=0, keepDays=0):
+        """
+        Args:
+            directory (str): The folder of the files
+            timestamped (bool, optional): A new file for every export. Defaults to False.
+            compression (str, optional): "none", "gzip" or "zstd". Defaults to "none".
+            keepFiles (int, optional): The timestamped files kept of every kind (0: all). Defaults to 0.
+            keepDays (float, optional): Days the timestamped files are kept (0: forever). Defaults to 0.
+        """
+        compression = compression.strip().lower() or "none"
+        if (compression not in EXTENSIONS):
+            print("Unknown ExportCompression "+compression+". Using none",file=sys.stderr)
+            compression = "none"
+        if (compression == "zstd" and zstandard is None):
+            print("ExportCompression zstd needs the zstandard package. Using gzip",file=sys.stderr)
+            compression = "gzip"
+
+        self.directory = directory
+        self.timestamped = timestamped
+        self.compression = compression
+        self.keepFiles = keepFiles
+        self.keepDays = keepDays
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        #Write the queued files before the program exits
+        atexit.register(self.close)
+
+    def export(self, name, text, q=""):
+        """
+        Queues a file. Can be called from any thread
+
+        Args:
+            name (str): The kind of the file, e.g. "output" or "outputRAW"
+            text (str or function): The content, or a function that returns it (called in the background)
+            q (str, optional): The query. Part of the name of timestamped files. Defaults to "".
+        """
+        self.queue.put((name, text, q, datetime.now()))
+
+    def filename(self, name, q, date):
+        """
+        Args:
+            name (str): The kind of the file
+            q (str): The query
+            date (datetime.datetime): When the file was queued
+
+        Returns:
+            str: The path of the file
+        """
+        extension = EXTENSIONS[self.compression]
+        if (not self.timestamped): return os.path.join(self.directory, name+extension)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", q).strip("_.")[:40]
+        return os.path.join(self.directory, name+"-"+date.strftime("%Y%m%d-%H%M%S-%f")+("-"+slug if slug else "")+extension)
+
+    def write(self, filename, text):
+        """
+        Writes a file with the compression of the exporter. The file is replaced only when it's complete
+
+        Args:
+            filename (str): The path of the file
+            text (str): The content
+        """
+        data = text.encode("utf-8")
+        if (self.compression == "gzip"): data = gzip.compress(data, compresslevel=6)
+        elif (self.compression == "zstd"): data = zstandard.ZstdCompressor().compress(data)
+        with open(filename+".tmp", "wb") as f:
+            f.write(data)
+        os.replace(filename+".tmp", filename)
+
+    def clean(self, name):
+        """
+        Deletes the timestamped files of a kind that the retention policy doesn't keep
+
+        Args:
+            name (str): The kind of the files
+        """
+        if (not self.timestamped or (self.keepFiles <= 0 and self.keepDays <= 0)): return
+        pattern = re.compile(re.escape(name)+r"-\d{8}-\d{6}-\d{6}")
+        try:
+            files = sorted(entry.path for entry in os.scandir(self.directory) if pattern.match(entry.name))
+        except OSError: return
+        #The names start with the timestamp, so the oldest are first
+        old = files[:-self.keepFiles] if self.keepFiles > 0 else []
+        if (self.keepDays > 0):
+            limit = time.time() - self.keepDays*24*60*60
+            for filename in files[len(old):]:
+                try:
+                    if (os.path.getmtime(filename) < limit): old.append(filename)
+                except OSError: pass
+        for filename in old:
+            try:
+                os.remove(filename)
+            except OSError: pass
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None: return
+                name, text, q, date = item
+                if callable(text): text = text()
+                os.makedirs(self.directory, exist_ok=True)
+                self.write(self.filename(name, q, date), text)
+                self.clean(name)
+            except Exception:
+                print("Error: Could not export the result.",file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """
+        Waits until all the queued files are written
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Writes the queued files and stops the background thread
+        """
+        atexit.unregister(self.close)
+        if (not self.thread.is_alive()): return
+        self.queue.put(None)
+        self.thread.join()
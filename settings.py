@@ -0,0 +1,169 @@
+import os, pathlib, threading, traceback, configparser
+
+# ---------------------------------- Globals --------------------------------- #
+#Local path
+path = str( pathlib.Path(__file__).parent.absolute() )
+
+#The settings shared by all the modules. Created by load
+shared = None
+
+#Marks a missing fallback (None is a valid fallback)
+_unset = object()
+
+
+class Settings(object):
+    """
+    The UserSettings of settings.ini, with the DEFAULT values for the missing ones.
+    The file is parsed once and again only when its modified time changes (reload).
+    The typed values (getint, getfloat, getboolean) are converted once and cached until the next change.
+    Has the same getters as configparser.SectionProxy, so it can be used in its place.
+    """
+
+    def __init__(self, filename=None, section='UserSettings'):
+        """
+        Args:
+            filename (str, optional): The path of the .ini file. Defaults to settings.ini next to this file.
+            section (str, optional): The section of the settings. Defaults to 'UserSettings'.
+        """
+        self.filename = filename if filename is not None else path+'/settings.ini'
+        self.section = section
+        self.mtime = None
+        self.values = {}
+        self.typed = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.reload()
+
+    def reload(self, force=False):
+        """
+        Parses the file again if it changed since it was last parsed. The listeners are notified
+        (in the calling thread) when a value changed
+
+        Args:
+            force (bool, optional): Parse the file even if it didn't change. Defaults to False.
+
+        Returns:
+            set: The (lower case) names of the settings that changed
+        """
+        try:
+            mtime = os.stat(self.filename).st_mtime_ns
+        except OSError:
+            mtime = None
+        if (not force and mtime == self.mtime): return set()
+
+        try:
+            parser = configparser.ConfigParser()
+            parser.read(self.filename)
+            values = dict(parser[self.section])
+        except Exception:
+            #Keep the previous settings. The file may be half written
+            traceback.print_exc()
+            return set()
+
+        with self.lock:
+            first = self.mtime is None and not self.values
+            changed = {key for key in set(values) | set(self.values) if values.get(key) != self.values.get(key)}
+            self.values = values
+            self.typed = {}
+            self.mtime = mtime
+            listeners = list(self.listeners)
+        if (changed and not first):
+            for listener in listeners:
+                try:
+                    listener(self, changed)
+                except Exception:
+                    traceback.print_exc()
+        return changed
+
+    def subscribe(self, listener):
+        """
+        Args:
+            listener (function): Called with (settings, changed) after a reload changed any value
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """
+        Args:
+            listener (function): A listener added with subscribe
+        """
+        with self.lock:
+            if listener in self.listeners: self.listeners.remove(listener)
+
+    def get(self, option, fallback=None):
+        """
+        Args:
+            option (str): The name of the setting (not case sensitive)
+            fallback (str, optional): Returned if the setting is missing. Defaults to None.
+
+        Returns:
+            str: The value of the setting
+        """
+        return self.values.get(option.lower(), fallback)
+
+    def getint(self, option, fallback=None):
+        return self._typed(int, option, fallback)
+
+    def getfloat(self, option, fallback=None):
+        return self._typed(float, option, fallback)
+
+    def getboolean(self, option, fallback=None):
+        return self._typed(_boolean, option, fallback)
+
+    def _typed(self, convert, option, fallback):
+        """
+        Args:
+            convert (function): Converts the text of the setting
+            option (str): The name of the setting
+            fallback (object): Returned if the setting is missing
+
+        Raises:
+            ValueError: If the setting can't be converted
+
+        Returns:
+            object: The converted value. Cached until the next change of the file
+        """
+        key = (convert, option.lower())
+        typed = self.typed
+        if key in typed: return typed[key]
+        text = self.values.get(key[1])
+        if (text is None): return fallback
+        value = typed[key] = convert(text)
+        return value
+
+    def __getitem__(self, option):
+        if option.lower() not in self.values: raise KeyError(option)
+        return self.values[option.lower()]
+
+    def __contains__(self, option):
+        return option.lower() in self.values
+
+
+def _boolean(text):
+    """
+    Args:
+        text (str): yes/no, true/false, on/off or 1/0
+
+    Raises:
+        ValueError: If the text isn't a boolean
+
+    Returns:
+        bool: The value
+    """
+    if text.lower() not in configparser.ConfigParser.BOOLEAN_STATES:
+        raise ValueError('Not a boolean: %s' % text)
+    return configparser.ConfigParser.BOOLEAN_STATES[text.lower()]
+
+
+def load():
+    """
+    Loads the shared settings on the first call. Later calls only parse the file again if it changed
+
+    Returns:
+        Settings: The shared settings
+    """
+    global shared
+    if (shared is None): shared = Settings()
+    else: shared.reload()
+    return shared
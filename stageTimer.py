@@ -0,0 +1,122 @@
+import os, json, time, threading
+from contextlib import contextmanager
+
+#Optional. Not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#Only one thread appends to the log at a time
+logLock = threading.Lock()
+
+
+class StageTimer(object):
+    """
+    Records how long every stage of a query takes, from pressing Run to the drawn graph.
+    The stages are recorded in the order they finish. A stage recorded again adds to its time
+    """
+
+    def __init__(self, query, file=None):
+        """
+        Args:
+            query (str): The query
+            file (str, optional): The path to the .pl file. Defaults to None.
+        """
+        self.query = query
+        self.file = file
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.memory = {}
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Records the time of the with block as a stage
+
+        Args:
+            name (str): The name of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter()-start)
+
+    def add(self, name, seconds):
+        """
+        Args:
+            name (str): The name of the stage
+            seconds (float): Its duration
+        """
+        self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def addMemory(self, name, megabytes):
+        """
+        Args:
+            name (str): The process, e.g. "gui" or "worker"
+            megabytes (float): Its peak memory
+        """
+        if (megabytes is not None): self.memory[name] = megabytes
+
+    def total(self):
+        """
+        Returns:
+            float: Seconds since the timer was created
+        """
+        return time.perf_counter()-self.start
+
+    def summary(self):
+        """
+        Returns:
+            str: The stages in one line, e.g. "Total 120ms: load 30ms, query 50ms, parse 10ms | Peak gui 80MB"
+        """
+        text = "Total %s: " % _duration(self.total()) + ", ".join(name+" "+_duration(seconds)
+                                                                 for name, seconds in self.stages.items())
+        if (self.memory):
+            text += " | Peak " + ", ".join("%s %.0fMB" % (name, megabytes) for name, megabytes in self.memory.items())
+        return text
+
+    def record(self):
+        """
+        Returns:
+            dict: The timing as a JSON object
+        """
+        return {"time":self.started, "query":self.query, "file":self.file, "total":round(self.total(), 6),
+                "stages":{name:round(seconds, 6) for name, seconds in self.stages.items()},
+                "peakMB":self.memory}
+
+    def write(self, filename):
+        """
+        Appends the record to a JSON lines file
+
+        Args:
+            filename (str): The path of the log
+        """
+        line = json.dumps(self.record())
+        with logLock:
+            with open(filename, "a", encoding="utf-8") as f:
+                f.write(line+"\n")
+
+
+def peakMemory():
+    """
+    Returns:
+        float: The peak memory (resident set size) of this process in MB. None if it's not known
+    """
+    if (resource is None): return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #Bytes on macOS, kilobytes on Linux
+    return peak/(1024*1024) if os.uname().sysname == "Darwin" else peak/1024
+
+
+def _duration(seconds):
+    """
+    Args:
+        seconds (float): A duration
+
+    Returns:
+        str: The duration in ms, or in s if it's longer than 10 seconds
+    """
+    return "%.1fs" % seconds if seconds >= 10 else "%.0fms" % (seconds*1000)
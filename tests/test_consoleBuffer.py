@@ -0,0 +1,122 @@
+import os, sys, time, pathlib, threading, importlib.util, unittest
+
+#The modules of the program are in the parent folder
+root = pathlib.Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(root))
+from consoleBuffer import ConsoleBuffer, trimEnd
+
+try:
+    import wx
+except ImportError:
+    wx = None
+
+#The console needs a display. On a headless machine run the tests with xvfb-run
+headless = sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+class ConsoleBufferTest(unittest.TestCase):
+
+    def test_joinsStreams(self):
+        buffer = ConsoleBuffer()
+        self.assertTrue(buffer.write("a"))
+        #The update is already scheduled
+        self.assertFalse(buffer.write("b"))
+        self.assertFalse(buffer.write("error", error=True))
+        self.assertFalse(buffer.write("c"))
+        self.assertFalse(buffer.write(""))
+        self.assertEqual(buffer.take(), [(False, "ab"), (True, "error"), (False, "c")])
+        self.assertEqual(buffer.take(), [])
+        self.assertTrue(buffer.write("d"))
+
+    def test_dropsOldest(self):
+        buffer = ConsoleBuffer(maxChars=10)
+        buffer.write("12345")
+        buffer.write("error", error=True)
+        buffer.write("67890")
+        #The first block would be removed from the console anyway
+        self.assertEqual(buffer.take(), [(True, "error"), (False, "67890")])
+        #The last block is kept even if it's longer
+        buffer.write("x"*20, error=True)
+        self.assertEqual(buffer.take(), [(True, "x"*20)])
+
+    def test_threads(self):
+        buffer = ConsoleBuffer()
+        def write(name):
+            for i in range(1000): buffer.write(name+str(i)+"\n")
+        threads = [threading.Thread(target=write, args=(name,)) for name in "abcd"]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        lines = "".join(text for error, text in buffer.take()).splitlines()
+        self.assertEqual(len(lines), 4000)
+        for name in "abcd":
+            self.assertEqual([line for line in lines if line[0] == name], [name+str(i) for i in range(1000)])
+
+
+class TrimEndTest(unittest.TestCase):
+
+    def trim(self, text, maxChars):
+        return trimEnd(len(text), maxChars, lambda start, end: text[start:end])
+
+    def test_short(self):
+        self.assertEqual(self.trim("line\n"*10, 50), 0)
+
+    def test_lineEnd(self):
+        text = "".join("line %04d\n" % i for i in range(100))
+        end = self.trim(text, 500)
+        #A tenth more than needed, up to the end of the line
+        self.assertGreaterEqual(end, len(text)-500+50)
+        self.assertEqual(text[end-1], "\n")
+        self.assertEqual(text[end:end+5], "line ")
+
+    def test_longLine(self):
+        text = "x"*5000
+        self.assertEqual(self.trim(text, 1000), 5000-1000+100)
+
+
+@unittest.skipIf(wx is None or headless, "needs wxPython and a display (xvfb-run)")
+class ConsoleSinkTest(unittest.TestCase):
+    """
+    ConsoleSink of the GUI on a real console
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = wx.App(False)
+        spec = importlib.util.spec_from_file_location("gorgiasVisual", str(root / "Gorgias-Visual.py"))
+        cls.gui = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.gui)
+
+    def setUp(self):
+        self.frame = wx.Frame(None)
+        self.console = wx.TextCtrl(self.frame, style=wx.TE_MULTILINE|wx.TE_READONLY|wx.TE_RICH2)
+
+    def tearDown(self):
+        self.frame.Destroy()
+        wx.Yield()
+
+    def waitFlush(self, sink):
+        deadline = time.monotonic()+5
+        while (sink.buffer.scheduled and time.monotonic() < deadline):
+            wx.Yield()
+            time.sleep(0.005)
+        self.assertFalse(sink.buffer.scheduled)
+
+    def test_threadsAndScrollback(self):
+        sink = self.gui.ConsoleSink(self.console, interval=1, maxChars=2000)
+        def write(name):
+            for i in range(500): sink.write(name+" %04d\n" % i, error=name == "b")
+        threads = [threading.Thread(target=write, args=(name,)) for name in "ab"]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.waitFlush(sink)
+
+        text = self.console.GetValue()
+        self.assertLessEqual(len(text), 2000)
+        #Only whole lines are removed
+        self.assertTrue(all(len(line) == 6 for line in text.splitlines()))
+        self.assertIn("a 0499", text)
+        self.assertIn("b 0499", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
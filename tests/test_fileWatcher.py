@@ -0,0 +1,58 @@
+import os, sys, time, pathlib, tempfile, threading, unittest
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+from fileWatcher import FileWatcher
+
+
+class FileWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "theory.pl")
+        self.included = os.path.join(self.directory.name, "rules.pl")
+        with open(self.file, "w") as f:
+            f.write(":- consult('rules.pl').\n")
+        with open(self.included, "w") as f:
+            f.write("rule(r1, fly(X), [bird(X)]).\n")
+        self.calls = []
+        self.called = threading.Event()
+        self.watcher = FileWatcher(self.file, self.callback, interval=0.02, debounce=0.05)
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.directory.cleanup()
+
+    def callback(self, files):
+        self.calls.append(files)
+        self.called.set()
+
+    def touch(self, filename):
+        with open(filename, "a") as f:
+            f.write("% changed\n")
+
+    def test_includedFileChange(self):
+        self.watcher.start()
+        time.sleep(0.1)
+        self.touch(self.included)
+        self.assertTrue(self.called.wait(5))
+        self.assertEqual(self.calls, [[os.path.abspath(self.included)]])
+
+    def test_restartStopsTheOldThread(self):
+        self.watcher.start()
+        old = self.watcher.thread
+        self.watcher.stop()
+        self.watcher.start()
+        old.join(1)
+        self.assertFalse(old.is_alive())
+        self.assertTrue(self.watcher.isAlive())
+        time.sleep(0.1)
+        self.touch(self.file)
+        self.assertTrue(self.called.wait(5))
+        time.sleep(0.3)
+        #One poller, one call
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
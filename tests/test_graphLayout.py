@@ -0,0 +1,306 @@
+import sys, random, pathlib, unittest
+import networkx as nx
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+from graphLayout import tree_pos, tidy_pos, hierarchy_pos, graph_diff, NodeIndex
+
+
+def randomTree(seed, nodes, maxChildren=None):
+    """
+    Returns:
+        networkx.DiGraph: A random tree with the edges from the child to the parent, like the graphs of graphBuilder.
+            The nodes and edges are added in a random order
+    """
+    rnd = random.Random(seed)
+    count = {0:0}
+    edges = []
+    for child in range(1, nodes):
+        candidates = [node for node in count if maxChildren is None or count[node] < maxChildren]
+        #Recent nodes are more likely, so there are deep and wide trees
+        parent = rnd.choice(candidates[-rnd.randint(1, len(candidates)):])
+        count[parent] += 1
+        count[child] = 0
+        edges.append(("n%d" % child, "n%d" % parent))
+    names = ["n%d" % node for node in count]
+    rnd.shuffle(names)
+    rnd.shuffle(edges)
+    DG = nx.DiGraph()
+    DG.add_nodes_from(names)
+    DG.add_edges_from(edges)
+    return DG
+
+
+def children(DG):
+    """
+    Returns:
+        dict: The children of every node, in the order the layouts place them (left to right)
+        str: The root
+    """
+    kids = {node:[] for node in DG}
+    for node, parents in DG.adjacency():
+        for parent in parents: kids[parent].append(node)
+    return kids, next(node for node in DG if DG.out_degree(node) == 0)
+
+
+def preorder(kids, root):
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(reversed(kids[node]))
+    return order
+
+
+# ---------------------------------------------------------------------------- #
+#                                  References                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def referenceHierarchyPos(G, root, width=1.0, vert_gap=1.0, root_y=0.0, root_x=0.0, downDirection=True, pos=None):
+    """
+    hierarchy_pos as it was before tree_pos: recursive, on the graph with the edges from the parent to the children
+    """
+    if pos is None: pos = {}
+    pos[root] = (root_x, root_y)
+    children = list(G.neighbors(root))
+    if len(children) != 0:
+        dx = width/len(children)
+        next_x = root_x - width/2 - dx/2
+        for child in children:
+            next_x += dx
+            new_root_y = root_y-vert_gap if downDirection else root_y+vert_gap
+            referenceHierarchyPos(G, child, dx, vert_gap, new_root_y, next_x, downDirection, pos)
+    return pos
+
+
+def referenceTidyX(kids, root, node_dist=1.0):
+    """
+    A simple Reingold-Tilford layout: every subtree is pushed left against the contour of its left siblings
+    and the parent is centered over its first and last children. Quadratic and recursive.
+    Buchheim-Walker places the first and last children the same, and also spreads the subtrees between them
+
+    Returns:
+        dict: The x of every node relative to the root
+    """
+    def layout(node):
+        if not kids[node]: return {node:0.0}, [0.0], [0.0]
+        left, right, shifts, subtrees = [], [], [], []
+        for child in kids[node]:
+            x, childLeft, childRight = layout(child)
+            shift = max([right[depth]-childLeft[depth]+node_dist for depth in range(min(len(right), len(childLeft)))],
+                        default=0.0)
+            for depth in range(len(childLeft)):
+                if (depth < len(right)):
+                    left[depth] = min(left[depth], childLeft[depth]+shift)
+                    right[depth] = max(right[depth], childRight[depth]+shift)
+                else:
+                    left.append(childLeft[depth]+shift)
+                    right.append(childRight[depth]+shift)
+            shifts.append(shift)
+            subtrees.append(x)
+        middle = (shifts[0]+shifts[-1])/2
+        x = {node:0.0}
+        for shift, subtree in zip(shifts, subtrees):
+            for descendant, dx in subtree.items(): x[descendant] = dx+shift-middle
+        return x, [0.0]+[dx-middle for dx in left], [0.0]+[dx-middle for dx in right]
+    return layout(root)[0]
+
+
+class TreePosTest(unittest.TestCase):
+    """
+    tree_pos gives the same positions as the recursive hierarchy_pos it replaced
+    """
+
+    def test_randomTrees(self):
+        for seed in range(100):
+            DG = randomTree(seed, random.Random(seed).randint(1, 300))
+            root = children(DG)[1]
+            with self.subTest(seed=seed):
+                expected = referenceHierarchyPos(DG.reverse(copy=True), root, 2.0, 0.5, 1.0, -3.0)
+                self.assertEqual(tree_pos(DG, None, 2.0, 0.5, 1.0, -3.0), expected)
+                self.assertEqual(tree_pos(DG, root, 2.0, 0.5, 1.0, -3.0), expected)
+                self.assertEqual(hierarchy_pos(DG.reverse(copy=True), root, 2.0, 0.5, 1.0, -3.0), expected)
+                self.assertEqual(tree_pos(DG, downDirection=False), referenceHierarchyPos(DG.reverse(copy=True), root,
+                                                                                          downDirection=False))
+
+    def test_undirected(self):
+        DG = randomTree(1, 200)
+        root = children(DG)[1]
+        positions = hierarchy_pos(DG.to_undirected(), root)
+        self.assertEqual(set(positions), set(DG))
+        for node, parents in DG.adjacency():
+            for parent in parents: self.assertEqual(positions[node][1], positions[parent][1]-1.0)
+
+    def test_deep(self):
+        #Deeper than the recursion limit
+        DG = nx.DiGraph([(i+1, i) for i in range(20000)])
+        positions = tree_pos(DG)
+        self.assertEqual(positions[20000], (0.0, -20000.0))
+        positions = tidy_pos(DG)
+        self.assertEqual(positions[20000], (0.0, -20000.0))
+
+    def test_notATree(self):
+        graphs = {"twoParents":nx.DiGraph([(1, 0), (2, 0), (2, 1)]), "cycle":nx.DiGraph([(1, 0), (2, 1), (0, 2)]),
+                  "twoRoots":nx.DiGraph([(1, 0), (3, 2)]), "cycleAndRoot":nx.DiGraph([(1, 0), (2, 3), (3, 2)])}
+        for name, DG in graphs.items():
+            for layout in (tree_pos, tidy_pos):
+                with self.subTest(name, layout=layout.__name__):
+                    with self.assertRaises(TypeError):
+                        layout(DG)
+
+
+class TidyPosTest(unittest.TestCase):
+
+    def assertTidy(self, DG, positions, node_dist, vert_gap):
+        kids, root = children(DG)
+        #Levels
+        for node, parents in DG.adjacency():
+            for parent in parents: self.assertAlmostEqual(positions[node][1], positions[parent][1]-vert_gap)
+        #No overlaps and the order of the children is kept on every level
+        levels = {}
+        for node in preorder(kids, root): levels.setdefault(positions[node][1], []).append(positions[node][0])
+        for xs in levels.values():
+            for left, right in zip(xs, xs[1:]): self.assertGreaterEqual(right-left, node_dist-1e-9)
+        #Centered over the children, which are as close as the reference packs them
+        expected = referenceTidyX(kids, root, node_dist)
+        for node in DG:
+            if (kids[node]):
+                first, last = positions[kids[node][0]][0], positions[kids[node][-1]][0]
+                self.assertAlmostEqual(positions[node][0], (first+last)/2)
+                self.assertAlmostEqual(last-first, expected[kids[node][-1]]-expected[kids[node][0]])
+
+    def test_randomTrees(self):
+        for seed in range(100):
+            DG = randomTree(seed, random.Random(seed).randint(1, 300))
+            with self.subTest(seed=seed):
+                positions = tidy_pos(DG, node_dist=1.5, vert_gap=2.0, root_x=4.0, root_y=1.0)
+                self.assertEqual(positions[children(DG)[1]], (4.0, 1.0))
+                self.assertTidy(DG, positions, 1.5, 2.0)
+
+    def test_binaryTrees(self):
+        #Without subtrees between the first and last children, the positions are the ones of the reference
+        for seed in range(100):
+            DG = randomTree(seed, random.Random(seed).randint(1, 300), maxChildren=2)
+            kids, root = children(DG)
+            with self.subTest(seed=seed):
+                positions = tidy_pos(DG)
+                expected = referenceTidyX(kids, root)
+                for node in DG: self.assertAlmostEqual(positions[node][0], expected[node])
+
+    def test_mirrored(self):
+        #The mirrored tree is drawn mirrored
+        for seed in range(50):
+            DG = randomTree(seed, random.Random(seed).randint(1, 300))
+            mirroredDG = nx.DiGraph()
+            mirroredDG.add_nodes_from(reversed(list(DG)))
+            mirroredDG.add_edges_from(DG.edges)
+            with self.subTest(seed=seed):
+                positions = tidy_pos(DG)
+                mirrored = tidy_pos(mirroredDG)
+                for node in DG: self.assertAlmostEqual(mirrored[node][0], -positions[node][0])
+
+
+class GraphDiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.positions = {"r1":(0.0, 0.0), "nr1":(0.0, -1.0), "pr1":(0.0, -2.0)}
+        self.descriptions = {"r1":{"description":"fly(tweety)"}, "nr1":{"description":"penguin(tweety)"},
+                             "pr1":{"description":"prefer(r1,nr1)"}}
+        self.edges = [("nr1", "r1"), ("pr1", "nr1")]
+
+    def test_same(self):
+        self.assertEqual(graph_diff(self.positions, self.descriptions, self.edges,
+                                    dict(self.positions), dict(self.descriptions), list(self.edges)),
+                         ([], set(), set(), set(), set()))
+
+    def test_changes(self):
+        positions = {"r1":(0.0, 0.0), "nr1":(-0.5, -1.0), "nr2":(0.5, -1.0)}
+        descriptions = {"r1":{"description":"fly(tweety)"}, "nr1":{"description":"penguin(tweety), not healthy"},
+                        "nr2":{"description":"broken_wing(tweety)"}}
+        edges = [("nr1", "r1"), ("nr2", "r1")]
+        moved, removed, changed, addedEdges, removedEdges = graph_diff(self.positions, self.descriptions, self.edges,
+                                                                       positions, descriptions, edges)
+        #The new nodes are in the moved ones, in the order of the new positions
+        self.assertEqual(moved, ["nr1", "nr2"])
+        self.assertEqual(removed, {"pr1"})
+        #Only the nodes that were drawn can change
+        self.assertEqual(changed, {"nr1"})
+        self.assertEqual(addedEdges, {("nr2", "r1")})
+        self.assertEqual(removedEdges, {("pr1", "nr1")})
+
+    def test_listPositions(self):
+        #Saved graphs have lists instead of tuples
+        positions = {node:list(xy) for node, xy in self.positions.items()}
+        self.assertEqual(graph_diff(self.positions, self.descriptions, self.edges,
+                                    positions, self.descriptions, self.edges)[0], [])
+
+
+class NodeIndexTest(unittest.TestCase):
+    """
+    NodeIndex.nearest finds the same node as checking every node
+    """
+
+    def bruteForce(self, points, xy, maxDistance=None):
+        best, bestDistance = None, None
+        for index, (x, y) in enumerate(points):
+            distance = (x-xy[0])**2 + (y-xy[1])**2
+            if (maxDistance is not None and distance > maxDistance**2): continue
+            #The first of equally close nodes
+            if (best is None or distance < bestDistance): best, bestDistance = index, distance
+        return best
+
+    def assertNearest(self, points, queries, maxDistance=None, cellSize=None):
+        index = NodeIndex(points, cellSize)
+        for xy in queries:
+            self.assertEqual(index.nearest(xy, maxDistance), self.bruteForce(points, xy, maxDistance), xy)
+
+    def test_random(self):
+        for seed in range(10):
+            rnd = random.Random(seed)
+            points = [(rnd.uniform(-50, 50), rnd.uniform(-20, 20)) for i in range(rnd.randint(1, 500))]
+            queries = [(rnd.uniform(-80, 80), rnd.uniform(-40, 40)) for i in range(100)]
+            with self.subTest(seed=seed):
+                self.assertNearest(points, queries)
+                self.assertNearest(points, queries, maxDistance=1.5)
+                self.assertNearest(points, queries, cellSize=7.0)
+                self.assertNearest(points, queries, maxDistance=0.3, cellSize=0.05)
+
+    def test_layouts(self):
+        #The positions of the Graph UI: rows of nodes, many on the same y
+        DG = randomTree(3, 2000)
+        for positions in (tree_pos(DG), tidy_pos(DG)):
+            points = list(positions.values())
+            rnd = random.Random(1)
+            queries = [(x+rnd.uniform(-0.3, 0.3), y+rnd.uniform(-0.3, 0.3)) for x, y in rnd.sample(points, 200)]
+            self.assertNearest(points, queries, maxDistance=0.25)
+            self.assertNearest(points, queries)
+
+    def test_ties(self):
+        #Equally close and duplicate nodes: the first one
+        points = [(1.0, 0.0), (-1.0, 0.0), (0.0, 1.0), (1.0, 0.0)]
+        index = NodeIndex(points)
+        self.assertEqual(index.nearest((0.0, 0.0)), 0)
+        self.assertEqual(index.nearest((1.0, 0.0)), 0)
+        self.assertEqual(index.nearest((-0.9, 0.0)), 1)
+
+    def test_edgeCases(self):
+        self.assertIsNone(NodeIndex([]).nearest((0.0, 0.0)))
+        self.assertEqual(NodeIndex([(5.0, 5.0)]).nearest((-100.0, 100.0)), 0)
+        self.assertIsNone(NodeIndex([(5.0, 5.0)]).nearest((0.0, 0.0), maxDistance=1.0))
+        #All on a line, far from the query
+        self.assertNearest([(float(i), 0.0) for i in range(100)], [(50.2, 1000.0), (-1000.0, 0.0), (37.5, 0.1)])
+        self.assertNearest([(0.0, float(i)) for i in range(100)], [(3.0, 49.6)], maxDistance=3.1)
+
+    def test_farAway(self):
+        #Only the rings that reach the grid are searched, so this doesn't visit millions of empty cells
+        points = [(float(i), 0.0) for i in range(10000)]
+        index = NodeIndex(points)
+        self.assertEqual(index.nearest((5000.2, 1e6)), 5000)
+        self.assertEqual(index.nearest((-1e6, -1e6)), 0)
+        self.assertIsNone(index.nearest((5000.2, 1e6), maxDistance=1e5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+import os, sys, time, pathlib, unittest
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+sys.path.insert(1, str( pathlib.Path(__file__).parent.parent.absolute() / "benchmarks" ))
+import graphBuilder
+from graphBuilder import ResultList, formatLines
+
+from gorgiasOutput import generate
+
+try:
+    import wx
+    import graphUI
+    from graphObjects import EdgeSet
+except ImportError:
+    wx = None
+
+#The Graph UI needs a display. On a headless machine run the tests with xvfb-run:
+#   xvfb-run python -m pytest tests
+headless = sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+#The query of the graphs
+QUERY = "fly(tweety)"
+
+
+def resultGraph(nodes):
+    """
+    Returns:
+        networkx.DiGraph: The graph of a synthetic result (gorgiasOutput.py), as the Graph UI gets it
+    """
+    text = generate(QUERY, nodes=nodes, branching=3)
+    return ResultList(QUERY, list(formatLines(text.splitlines())))[-1][0]
+
+
+class MouseEvent(object):
+    """
+    The parts of a FloatCanvas mouse event that the Graph UI uses
+    """
+
+    def __init__(self, coords, rotation=0, dragging=False):
+        self.Coords = coords
+        self.rotation = rotation
+        self.dragging = dragging
+
+    def GetWheelRotation(self):
+        return self.rotation
+
+    def Dragging(self):
+        return self.dragging
+
+    def GetPosition(self):
+        return wx.Point(0, 0)
+
+
+@unittest.skipIf(wx is None, "needs wxPython")
+class EdgeSetTest(unittest.TestCase):
+
+    def test_arrowHeads(self):
+        #An edge to the right. The head is a triangle at its end, pointing back along it
+        edges = EdgeSet([((0.0, 0.0), (100.0, 0.0))], ArrowHeadSize=10, ArrowHeadAngle=60)
+        heads = EdgeSet.ArrowHeads(edges.Points, edges.ArrowPoints)
+        self.assertEqual(heads.shape, (1, 3, 2))
+        tip, wing1, wing2 = heads[0].tolist()
+        self.assertEqual(tip, [100, 0])
+        self.assertEqual(wing1[0], wing2[0])
+        self.assertLess(wing1[0], 100)
+        self.assertEqual(wing1[1], -wing2[1])
+        self.assertNotEqual(wing1[1], 0)
+
+
+@unittest.skipIf(wx is None, "needs wxPython")
+class HoverDescriptionTest(unittest.TestCase):
+
+    def test_hoverText(self):
+        description = "r1(tweety): fly(tweety)\nbird(tweety)\nr1(tweety) is a rule"
+        self.assertEqual(graphUI.hoverText(description, False), (description, 3))
+        self.assertEqual(graphUI.hoverText(description, True), ("r1(tweety): fly(tweety)\n...", 2))
+        self.assertEqual(graphUI.hoverText("bird(tweety)", True), ("bird(tweety)", 1))
+
+    def test_hoverPlacement(self):
+        textXY, boxXY, boxWH = graphUI.hoverPlacement((10.0, 20.0), (4.0, 2.0), 2, padding=0.5)
+        #Centered on the cursor and above it by the text and two lines
+        self.assertEqual(textXY, (8.0, 16.0))
+        self.assertEqual(boxXY, (7.5, 16.5))
+        self.assertEqual(boxWH, (5.0, 1.0))
+
+
+@unittest.skipIf(wx is None or headless, "needs wxPython and a display (xvfb-run)")
+class CanvasFrameTest(unittest.TestCase):
+    """
+    Opens the Graph UI on a 10k node graph and zooms, pans and hovers like the mouse does
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = wx.App(False)
+        graphBuilder.loadConfig()
+        cls.DG = resultGraph(10000)
+
+    def setUp(self):
+        graphUI.loadConfig()
+        graphUI.setGraph(self.DG, True, False, QUERY)
+        graphUI.setResults(None, QUERY)
+        self.frame = graphUI.FloatCanvasFrame(None, title="Graph UI test", size=(1280,720))
+        wx.Yield()
+
+    def tearDown(self):
+        if (self.frame): self.frame.Close()
+        wx.Yield()
+
+    def emptyPoint(self):
+        #World coordinates away from every node
+        xs, ys = zip(*self.frame.nodes)
+        return (min(xs)-1000.0, min(ys)-1000.0)
+
+    def test_open(self):
+        frame = self.frame
+        self.assertEqual(len(frame.nodes), len(self.DG))
+        self.assertEqual(frame.nodeNames[0], next(iter(self.DG)))
+        frame.Canvas.Draw(Force=True)
+
+    def test_zoom(self):
+        frame = self.frame
+        scale = frame.Canvas.Scale
+        center = tuple(frame.Canvas.ViewPortCenter)
+        frame.OnMouseWheel(MouseEvent(center, rotation=120))
+        self.assertGreater(frame.Canvas.Scale, scale)
+        frame.OnMouseWheel(MouseEvent(center, rotation=-120))
+        frame.OnMouseWheel(MouseEvent(center, rotation=-120))
+        self.assertLess(frame.Canvas.Scale, scale)
+
+    def test_pan(self):
+        frame = self.frame
+        x, y = self.emptyPoint()
+        center = tuple(frame.Canvas.ViewPortCenter)
+        frame.OnMouseDown(MouseEvent((x, y)))
+        self.assertTrue(frame.mouseDown)
+        frame.OnMouseMotion(MouseEvent((x+5.0, y), dragging=True))
+        frame.OnMouseUp(MouseEvent((x+5.0, y)))
+        self.assertFalse(frame.mouseDown)
+        self.assertAlmostEqual(abs(frame.Canvas.ViewPortCenter[0]-center[0]), 5.0, places=6)
+        self.assertAlmostEqual(frame.Canvas.ViewPortCenter[1], center[1], places=6)
+
+    def test_hover(self):
+        frame = self.frame
+        nodeID = len(frame.nodes)//2
+        frame.hoverCoords = tuple(frame.nodes[nodeID])
+        frame.UpdateHover()
+        self.assertTrue(frame.overPoints)
+        self.assertEqual(frame.hoverName, frame.nodeNames[nodeID])
+        self.assertTrue(frame.hoverDescription.Visible)
+        self.assertEqual(frame.GetStatusBar().GetStatusText(1), frame.nodeNames[nodeID])
+
+        frame.hoverCoords = self.emptyPoint()
+        frame.UpdateHover()
+        self.assertFalse(frame.overPoints)
+        self.assertFalse(frame.hoverDescription.Visible)
+        self.assertEqual(frame.GetStatusBar().GetStatusText(1), "")
+
+    def test_patch(self):
+        frame = self.frame
+        frame.OnMouseWheel(MouseEvent(tuple(frame.Canvas.ViewPortCenter), rotation=120))
+        scale, center = frame.Canvas.Scale, tuple(frame.Canvas.ViewPortCenter)
+        frame.OnClickNode(1, wx.Point(0, 0))
+        selected = frame.nodeNames[1]
+
+        #A new leaf and an edited description, like after an edit of the theory
+        DG = self.DG.copy()
+        leaf = frame.nodeNames[-1]
+        DG.add_node("new(leaf)", description="new(leaf) is a fact")
+        DG.add_edge("new(leaf)", leaf)
+        DG.nodes[selected]["description"] = "edited"
+        graphUI.setGraph(DG, False, False, QUERY)
+        graphUI.setResults(None, QUERY)
+        frame.SetResults()
+        frame.UpdateData()
+
+        #Patched in place: the view and the selection are kept
+        self.assertIs(frame.graph[0], DG)
+        self.assertEqual(frame.Canvas.Scale, scale)
+        self.assertEqual(tuple(frame.Canvas.ViewPortCenter), center)
+        self.assertEqual(frame.nodeNames, list(DG))
+        self.assertEqual(len(frame.edgesObj.Points), DG.number_of_edges())
+        self.assertEqual(frame.selectedNode, selected)
+        self.assertEqual([window.titleText.GetLabel() for window in frame.Canvas.GetChildren()], ["edited"])
+        self.assertEqual(frame.nodeIndex.nearest(frame.positions["new(leaf)"]), frame.nodeNames.index("new(leaf)"))
+
+    def test_hoverIsThrottled(self):
+        frame = self.frame
+        calls = []
+        updateHover = frame.UpdateHover
+        def countedUpdate():
+            calls.append(frame.hoverCoords)
+            updateHover()
+        frame.UpdateHover = countedUpdate
+        #Many motion events before the next refresh are one hover update, for the last position
+        for nodeID in range(50):
+            frame.OnMouseMotion(MouseEvent(tuple(frame.nodes[nodeID])))
+        deadline = time.monotonic()+5
+        while (frame.hoverPending and time.monotonic() < deadline):
+            wx.Yield()
+            time.sleep(0.005)
+        self.assertEqual(calls, [tuple(frame.nodes[49])])
+        self.assertEqual(frame.hoverName, frame.nodeNames[49])
+
+    def test_hoverTextIsCached(self):
+        frame = self.frame
+        frame.compactHoverDesc = True
+        nodeID = 1
+        for offset in (0.0, 0.01):
+            x, y = frame.nodes[nodeID]
+            frame.hoverCoords = (x+offset, y)
+            frame.UpdateHover()
+        name = frame.nodeNames[nodeID]
+        self.assertEqual(list(frame.hoverTexts), [name])
+        text, extent, lines = frame.hoverTexts[name]
+        self.assertEqual((text, lines), graphUI.hoverText(frame.descriptions[name]['description'], True))
+        self.assertEqual(frame.hoverDescription.String, text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os, sys, time, pathlib, tempfile, threading, unittest
+
+#The modules of the program are in the parent folder
+root = pathlib.Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(root))
+from prologWorker import PrologPool, QueryCancelled, evaluate
+
+#The mock backend (benchmarks/mockProlog.py) answers every query after its latency
+MOCK = str(root / "benchmarks" / "mockProlog.py")
+
+
+class PrologPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.environ = dict(os.environ)
+        os.environ.update(MOCK_PROLOG_STARTUP="0.05", MOCK_PROLOG_LOAD="0", MOCK_PROLOG_LATENCY="0.3",
+                          MOCK_PROLOG_JITTER="0", MOCK_PROLOG_NODES="10")
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "theory.pl").replace("\\", "/")
+        with open(self.file, "w") as f:
+            f.write("% mock\n")
+        self.pool = PrologPool(1, MOCK)
+
+    def tearDown(self):
+        self.pool.close()
+        self.directory.cleanup()
+        os.environ.clear()
+        os.environ.update(self.environ)
+
+    def test_batch(self):
+        rows = evaluate(self.pool, self.file, ["fly(a)", "fly(b)"], timeout=10)
+        self.assertEqual([query for query, result, err in rows], ["fly(a)", "fly(b)"])
+        self.assertTrue(all(result is not None for query, result, err in rows))
+
+    def test_cancelStopsTheQueuedQueries(self):
+        queries = ["fly(%d)" % i for i in range(10)]
+        started = time.perf_counter()
+        threading.Timer(0.5, self.pool.cancel).start()
+        with self.assertRaises(QueryCancelled):
+            evaluate(self.pool, self.file, queries, timeout=10)
+        #10 queries of 0.3s would take 3s
+        self.assertLess(time.perf_counter()-started, 2)
+        self.assertTrue(all(future.done() for future in self.pool.futures))
+
+
+if __name__ == "__main__":
+    unittest.main()
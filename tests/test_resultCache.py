@@ -0,0 +1,186 @@
+import os, sys, time, pathlib, tempfile, importlib.util, unittest
+
+#The modules of the program are in the parent folder
+root = pathlib.Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(root))
+sys.path.insert(1, str(root / "benchmarks"))
+import settings
+from resultCache import ResultCache, theoryFiles, theoryHash
+from prologWorker import PrologWorker
+
+from loadTest import writeSettings
+
+#The mock backend (benchmarks/mockProlog.py) reloads the theory like prolog.py
+MOCK = str(root / "benchmarks" / "mockProlog.py")
+
+try:
+    import wx
+except ImportError:
+    wx = None
+
+
+class TheoryTest(unittest.TestCase):
+    """
+    A theory in a temporary folder: theory.pl loads rules.pl
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = self.path("theory.pl")
+        self.write("theory.pl", ":- consult('rules.pl').\nbird(tweety).\n")
+        self.write("rules.pl", "rule(r1(X), fly(X), [bird(X)]).\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name).replace("\\", "/")
+
+    def write(self, name, text):
+        with open(self.path(name), "w") as f:
+            f.write(text)
+        #A new modified time, also on file systems with a coarse one
+        stat = os.stat(self.path(name))
+        os.utime(self.path(name), ns=(stat.st_atime_ns, stat.st_mtime_ns+1000000000))
+
+
+class TheoryFilesTest(TheoryTest):
+
+    def test_directives(self):
+        self.write("theory.pl", ":- consult('rules.pl').\n:- include(facts).\n:- ensure_loaded(\"more.pl\").\n"
+                                ":- [list1, 'list2.pl'].\n:- use_module(library(lists)).\n:- consult(missing).\n")
+        for name in ("facts.pl", "more.pl", "list1.pl", "list2.pl"): self.write(name, "% empty\n")
+        files = [os.path.basename(filename) for filename in theoryFiles(self.file)]
+        self.assertEqual(files, ["theory.pl", "rules.pl", "facts.pl", "more.pl", "list1.pl", "list2.pl"])
+
+    def test_recursiveAndCyclic(self):
+        self.write("rules.pl", ":- include('facts.pl').\n")
+        self.write("facts.pl", ":- consult('theory.pl').\n")
+        files = [os.path.basename(filename) for filename in theoryFiles(self.file)]
+        self.assertEqual(files, ["theory.pl", "rules.pl", "facts.pl"])
+
+    def test_hashOfIncludedFile(self):
+        before = theoryHash(self.file)
+        self.assertEqual(theoryHash(self.file), before)
+        self.write("rules.pl", "rule(r1(X), fly(X), [bird(X), healthy(X)]).\n")
+        self.assertNotEqual(theoryHash(self.file), before)
+
+
+class ResultCacheTest(TheoryTest):
+
+    def test_memoryLRU(self):
+        cache = ResultCache(None, memoryEntries=2)
+        cache.put("a", "output a")
+        cache.put("b", "output b")
+        cache.get("a") #a is now the most recently used
+        cache.put("c", "output c")
+        self.assertEqual(cache.get("a"), ("output a", None))
+        self.assertEqual(cache.get("b"), (None, None))
+        self.assertEqual(cache.get("c"), ("output c", None))
+
+    def test_memoryBytes(self):
+        cache = ResultCache(None, memoryEntries=10, memoryBytes=25)
+        for key in "abc": cache.put(key, key*10)
+        self.assertEqual(list(cache.memory), ["b", "c"])
+        self.assertEqual(cache.memorySize, 20)
+
+    def test_diskEviction(self):
+        cache = ResultCache(self.path("cache"), memoryEntries=1, diskBytes=250)
+        for index, key in enumerate("abc"):
+            cache.put(key, key*100)
+            #The oldest files are evicted first
+            os.utime(os.path.join(cache.directory, key+".txt"), (1000+index, 1000+index))
+        cache.evictDisk()
+        self.assertEqual(sorted(os.listdir(cache.directory)), ["b.txt", "c.txt"])
+        #Not in memory (1 entry), read from the disk
+        self.assertEqual(cache.get("b"), ("b"*100, None))
+        self.assertEqual(cache.get("a"), (None, None))
+
+    def test_keyOfEditedInclude(self):
+        cache = ResultCache(None)
+        key = cache.key(self.file, "fly(tweety)")
+        cache.put(key, "RESULT: fly(tweety) holds.\n")
+        self.write("rules.pl", "rule(r1(X), fly(X), [bird(X), healthy(X)]).\n")
+        self.assertNotEqual(cache.key(self.file, "fly(tweety)"), key)
+        self.assertEqual(cache.get(cache.key(self.file, "fly(tweety)")), (None, None))
+
+
+class WorkerTheoryTest(TheoryTest):
+    """
+    The worker reports the theory that answered, so the caller doesn't cache the output of an old theory
+    """
+
+    def setUp(self):
+        TheoryTest.setUp(self)
+        self.environ = dict(os.environ)
+        os.environ.update(MOCK_PROLOG_STARTUP="0", MOCK_PROLOG_LOAD="0", MOCK_PROLOG_LATENCY="0",
+                          MOCK_PROLOG_JITTER="0", MOCK_PROLOG_NODES="10")
+        self.worker = PrologWorker(MOCK)
+
+    def tearDown(self):
+        self.worker.kill()
+        os.environ.clear()
+        os.environ.update(self.environ)
+        TheoryTest.tearDown(self)
+
+    def test_editedIncludeIsReloaded(self):
+        self.worker.query(self.file, "fly(tweety)")
+        self.assertEqual(self.worker.lastTheory, theoryHash(self.file))
+        self.worker.query(self.file, "fly(tweety)")
+        self.assertIsNone(self.worker.lastLoad)
+
+        self.write("rules.pl", "rule(r1(X), fly(X), [bird(X), healthy(X)]).\n")
+        self.worker.query(self.file, "fly(tweety)")
+        self.assertIsNotNone(self.worker.lastLoad)
+        self.assertEqual(self.worker.lastTheory, theoryHash(self.file))
+
+
+@unittest.skipIf(wx is None, "needs wxPython")
+class RunPrologCacheTest(TheoryTest):
+    """
+    runProlog of the GUI on the mock backend
+    """
+
+    def setUp(self):
+        TheoryTest.setUp(self)
+        self.shared = settings.shared
+        writeSettings(self.directory.name, {"PrologScript":MOCK, "ResultCache":"yes", "CacheDiskMB":"0",
+                                            "printRawResult":"no",
+                                            "printCompactResult":"no", "Export":"no", "ExportRAW":"no"})
+        self.environ = dict(os.environ)
+        os.environ.update(MOCK_PROLOG_STARTUP="0", MOCK_PROLOG_LOAD="0", MOCK_PROLOG_LATENCY="0",
+                          MOCK_PROLOG_JITTER="0", MOCK_PROLOG_NODES="10")
+        spec = importlib.util.spec_from_file_location("gorgiasVisual", str(root / "Gorgias-Visual.py"))
+        self.gui = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.gui)
+
+    def tearDown(self):
+        if (self.gui.worker is not None): self.gui.worker.kill()
+        settings.shared = self.shared
+        os.environ.clear()
+        os.environ.update(self.environ)
+        TheoryTest.tearDown(self)
+
+    def test_editedIncludeIsNotServedFromTheCache(self):
+        first = self.gui.runProlog(self.file, "fly(tweety)", verbose=False)
+        self.assertIs(self.gui.runProlog(self.file, "fly(tweety)", verbose=False), first)
+
+        self.write("rules.pl", "rule(r1(X), fly(X), [bird(X), healthy(X)]).\n")
+        second = self.gui.runProlog(self.file, "fly(tweety)", verbose=False)
+        self.assertIsNot(second, first)
+        self.assertIsNotNone(self.gui.worker.lastLoad)
+
+    def test_outputOfAnOldTheoryIsNotCached(self):
+        #A worker that answers with an older theory than the one of the key
+        query = self.gui.getWorker().query
+        def staleQuery(*args, **kwargs):
+            result = query(*args, **kwargs)
+            self.gui.worker.lastTheory = "old theory"
+            return result
+        self.gui.worker.query = staleQuery
+        self.gui.runProlog(self.file, "fly(tweety)", verbose=False)
+        self.assertEqual(len(self.gui.cache.memory), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
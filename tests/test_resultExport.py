@@ -0,0 +1,135 @@
+import os, sys, io, gzip, time, pathlib, tempfile, contextlib, unittest
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+from resultExport import ResultExporter, zstandard
+
+
+class ResultExporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.exporters = []
+
+    def tearDown(self):
+        for exporter in self.exporters: exporter.close()
+        self.directory.cleanup()
+
+    def exporter(self, *args, **kwargs):
+        exporter = ResultExporter(self.directory.name, *args, **kwargs)
+        self.exporters.append(exporter)
+        return exporter
+
+    def files(self, prefix=""):
+        return sorted(name for name in os.listdir(self.directory.name) if name.startswith(prefix))
+
+    def read(self, name):
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(os.path.join(self.directory.name, name), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def test_overwrite(self):
+        exporter = self.exporter()
+        for i in range(5): exporter.export("output", "result %d" % i, "fly(tweety)")
+        exporter.export("outputRAW", lambda: "raw", "fly(tweety)")
+        exporter.flush()
+        #Written in order, the last one stays
+        self.assertEqual(self.files(), ["output.txt", "outputRAW.txt"])
+        self.assertEqual(self.read("output.txt"), "result 4")
+        self.assertEqual(self.read("outputRAW.txt"), "raw")
+
+    def test_timestamped(self):
+        exporter = self.exporter(timestamped=True)
+        exporter.export("output", "first", "fly(tweety)")
+        exporter.export("output", "second", "")
+        exporter.flush()
+        first, second = self.files()
+        self.assertRegex(first, r"^output-\d{8}-\d{6}-\d{6}-fly_tweety.txt$")
+        self.assertRegex(second, r"^output-\d{8}-\d{6}-\d{6}.txt$")
+        self.assertEqual((self.read(first), self.read(second)), ("first", "second"))
+
+    def test_keepFiles(self):
+        exporter = self.exporter(timestamped=True, keepFiles=3)
+        for i in range(6):
+            exporter.export("output", "result %d" % i, "fly(tweety)")
+            exporter.export("outputRAW", "raw %d" % i, "fly(tweety)")
+        exporter.flush()
+        #The newest files of every kind
+        self.assertEqual([self.read(name) for name in self.files("output-")], ["result 3", "result 4", "result 5"])
+        self.assertEqual([self.read(name) for name in self.files("outputRAW-")], ["raw 3", "raw 4", "raw 5"])
+
+    def test_keepDays(self):
+        old = os.path.join(self.directory.name, "output-20200101-120000-000000-fly_tweety.txt")
+        recent = os.path.join(self.directory.name, "output-20200102-120000-000000-fly_tweety.txt")
+        other = os.path.join(self.directory.name, "notes.txt")
+        for filename in (old, recent, other):
+            with open(filename, "w") as f: f.write("old")
+        os.utime(old, (time.time()-3*24*60*60,)*2)
+        os.utime(recent, (time.time()-12*60*60,)*2)
+        os.utime(other, (time.time()-3*24*60*60,)*2)
+
+        exporter = self.exporter(timestamped=True, keepDays=1)
+        exporter.export("output", "new", "fly(tweety)")
+        exporter.flush()
+        names = self.files()
+        self.assertNotIn(os.path.basename(old), names)
+        self.assertIn(os.path.basename(recent), names)
+        self.assertIn("notes.txt", names)
+        self.assertEqual(len(names), 3)
+
+    def test_keepFilesAndDays(self):
+        exporter = self.exporter(timestamped=True, keepFiles=2, keepDays=1)
+        for i in range(3): exporter.export("output", "result %d" % i)
+        exporter.flush()
+        self.assertEqual([self.read(name) for name in self.files()], ["result 1", "result 2"])
+        os.utime(os.path.join(self.directory.name, self.files()[-1]), (time.time()-2*24*60*60,)*2)
+        exporter.export("output", "result 3")
+        exporter.flush()
+        #result 2 is one of the last 2 files, but older than a day
+        self.assertEqual([self.read(name) for name in self.files()], ["result 3"])
+
+    def test_withoutRetention(self):
+        #Not timestamped: nothing is deleted
+        exporter = self.exporter(keepFiles=1)
+        timestamped = os.path.join(self.directory.name, "output-20200101-120000-000000.txt")
+        with open(timestamped, "w") as f: f.write("old")
+        exporter.export("output", "new")
+        exporter.flush()
+        self.assertEqual(self.files(), ["output-20200101-120000-000000.txt", "output.txt"])
+
+    def test_compression(self):
+        exporter = self.exporter(compression=" GZIP ")
+        exporter.export("output", "λ result\n"*100)
+        exporter.flush()
+        self.assertEqual(self.files(), ["output.txt.gz"])
+        self.assertEqual(self.read("output.txt.gz"), "λ result\n"*100)
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(self.exporter(compression="lzma").compression, "none")
+            self.assertEqual(self.exporter(compression="zstd").compression, "zstd" if zstandard is not None else "gzip")
+        self.assertIn("Unknown ExportCompression lzma", stderr.getvalue())
+
+    def test_failedExport(self):
+        exporter = self.exporter()
+        def failing(): raise RuntimeError("no result")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            exporter.export("output", failing)
+            exporter.export("outputRAW", "raw")
+            exporter.flush()
+        #The next files are still written
+        self.assertIn("Could not export the result", stderr.getvalue())
+        self.assertEqual(self.files(), ["outputRAW.txt"])
+
+    def test_close(self):
+        exporter = self.exporter()
+        exporter.export("output", lambda: time.sleep(0.1) or "slow")
+        exporter.close()
+        self.assertFalse(exporter.thread.is_alive())
+        self.assertEqual(self.read("output.txt"), "slow")
+        exporter.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os, sys, gzip, json, pathlib, tempfile, unittest
+import networkx as nx
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+sys.path.insert(1, str( pathlib.Path(__file__).parent.parent.absolute() / "benchmarks" ))
+from graphBuilder import saveGraph, loadGraph, ResultList, formatLines, GRAPH_FORMAT, GRAPH_VERSION
+from graphLayout import tidy_pos
+
+from gorgiasOutput import generate
+
+
+class SaveGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        text = generate("fly(tweety)", nodes=500, branching=3, seed=2)
+        self.DG = ResultList("fly(tweety)", list(formatLines(text.splitlines())))[-1][0]
+        #Descriptions with more than ASCII and node names that need quoting in JSON
+        self.DG.add_node('quote"d', description="línea 1\nλ 2")
+        self.DG.add_edge('quote"d', next(iter(self.DG)))
+        self.positions = tidy_pos(self.DG)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertSameGraph(self, loadedDG, DG):
+        self.assertEqual(list(loadedDG.nodes(data=True)), [(node, {"description":data.get("description","")})
+                                                           for node, data in DG.nodes(data=True)])
+        self.assertEqual(list(loadedDG.edges), list(DG.edges))
+
+    def test_roundTrip(self):
+        for name in ("graph.jsonl", "graph.jsonl.gz"):
+            with self.subTest(name):
+                saveGraph(self.path(name), self.DG, "fly(tweety)", True, False, self.positions)
+                DG, q, holds, isFact, positions = loadGraph(self.path(name))
+                self.assertSameGraph(DG, self.DG)
+                self.assertEqual((q, holds, isFact), ("fly(tweety)", True, False))
+                self.assertEqual(positions, {node:tuple(xy) for node, xy in self.positions.items()})
+                self.assertFalse(os.path.exists(self.path(name)+".tmp"))
+
+    def test_withoutPositions(self):
+        saveGraph(self.path("graph.jsonl"), self.DG, "fly(tweety)", False, True)
+        DG, q, holds, isFact, positions = loadGraph(self.path("graph.jsonl"))
+        self.assertSameGraph(DG, self.DG)
+        self.assertEqual((holds, isFact, positions), (False, True, None))
+
+    def test_gzip(self):
+        saveGraph(self.path("graph.jsonl.gz"), self.DG, "fly(tweety)", True, False, self.positions)
+        saveGraph(self.path("graph.jsonl"), self.DG, "fly(tweety)", True, False, self.positions)
+        with open(self.path("graph.jsonl.gz"), "rb") as f:
+            self.assertEqual(f.read(2), b"\x1f\x8b")
+        with gzip.open(self.path("graph.jsonl.gz"), "rt", encoding="utf-8") as f:
+            with open(self.path("graph.jsonl"), encoding="utf-8") as plain:
+                self.assertEqual(f.read(), plain.read())
+        self.assertLess(os.path.getsize(self.path("graph.jsonl.gz")), os.path.getsize(self.path("graph.jsonl")))
+
+    def test_failedSaveKeepsTheFile(self):
+        saveGraph(self.path("graph.jsonl"), self.DG, "fly(tweety)", True, False, self.positions)
+        positions = dict(self.positions)
+        positions.pop('quote"d')
+        with self.assertRaises(KeyError):
+            saveGraph(self.path("graph.jsonl"), self.DG, "bird(tweety)", True, False, positions)
+        self.assertEqual(loadGraph(self.path("graph.jsonl"))[1], "fly(tweety)")
+        self.assertFalse(os.path.exists(self.path("graph.jsonl.tmp")))
+
+    def test_damaged(self):
+        for name in ("graph.jsonl", "graph.jsonl.gz"):
+            saveGraph(self.path(name), self.DG, "fly(tweety)", True, False, self.positions)
+            opener = gzip.open if name.endswith(".gz") else open
+            with opener(self.path(name), "rt", encoding="utf-8") as f:
+                lines = f.read().splitlines(True)
+            header = json.loads(lines[0])
+            damaged = {"truncated":lines[:len(lines)//2], "truncatedEdges":lines[:-1],
+                       "notAGraph":["hello\n"]+lines[1:], "otherFormat":[json.dumps(dict(header, format="x"))+"\n"]+lines[1:],
+                       "newer":[json.dumps(dict(header, version=GRAPH_VERSION+1))+"\n"]+lines[1:],
+                       "textVersion":[json.dumps(dict(header, version="1"))+"\n"]+lines[1:],
+                       "badEdge":lines+["[0,100000]\n"]}
+            for case, content in damaged.items():
+                with self.subTest(name, case=case):
+                    with opener(self.path(name), "wt", encoding="utf-8") as f:
+                        f.writelines(content)
+                    with self.assertRaises(ValueError):
+                        loadGraph(self.path(name))
+        #Not gzipped
+        with open(self.path("plain.jsonl.gz"), "w") as f:
+            f.write(json.dumps({"format":GRAPH_FORMAT})+"\n")
+        with self.assertRaises(ValueError):
+            loadGraph(self.path("plain.jsonl.gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
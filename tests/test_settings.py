@@ -0,0 +1,131 @@
+import os, sys, io, pathlib, tempfile, contextlib, unittest
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+import settings
+from settings import Settings
+
+SETTINGS = """[DEFAULT]
+NodeSize = 40
+ZoomSpeed = 1.1
+multiWindow = no
+
+[UserSettings]
+NodeSize = 60
+"""
+
+
+class SettingsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "settings.ini")
+        self.write(SETTINGS)
+        self.settings = Settings(self.file)
+        self.calls = []
+        self.listener = lambda settings, changed: self.calls.append((settings, changed))
+        self.settings.subscribe(self.listener)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, text):
+        with open(self.file, "w") as f:
+            f.write(text)
+        #A new modified time, also on file systems with a coarse one
+        stat = os.stat(self.file)
+        os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns+1000000000))
+
+    def test_values(self):
+        self.assertEqual(self.settings.getint("NodeSize"), 60)
+        #The DEFAULT values of the missing settings, not case sensitive
+        self.assertEqual(self.settings.getfloat("zoomspeed"), 1.1)
+        self.assertIs(self.settings.getboolean("MultiWindow"), False)
+        self.assertEqual(self.settings["nodesize"], "60")
+        self.assertIn("ZoomSpeed", self.settings)
+        self.assertNotIn("Missing", self.settings)
+        self.assertIsNone(self.settings.getint("Missing"))
+        self.assertEqual(self.settings.getint("Missing", fallback=3), 3)
+        self.assertEqual(self.settings.get("Missing", "text"), "text")
+        with self.assertRaises(KeyError):
+            self.settings["Missing"]
+        with self.assertRaises(ValueError):
+            self.settings.getint("ZoomSpeed")
+        with self.assertRaises(ValueError):
+            self.settings.getboolean("NodeSize")
+
+    def test_typedValuesAreCached(self):
+        self.settings.getint("NodeSize")
+        self.assertEqual(self.settings.typed[(int, "nodesize")], 60)
+        self.write(SETTINGS.replace("NodeSize = 60", "NodeSize = 70"))
+        self.settings.reload()
+        self.assertEqual(self.settings.typed, {})
+        self.assertEqual(self.settings.getint("NodeSize"), 70)
+
+    def test_reloadOnlyWhenChanged(self):
+        self.assertEqual(self.settings.reload(), set())
+        #Parsed again, but nothing changed
+        self.assertEqual(self.settings.reload(force=True), set())
+        self.write(SETTINGS)
+        self.assertEqual(self.settings.reload(), set())
+        self.assertEqual(self.calls, [])
+
+    def test_listeners(self):
+        self.write(SETTINGS.replace("NodeSize = 60", "NodeSize = 70").replace("ZoomSpeed = 1.1", "ZoomSpeed = 1.2"))
+        self.assertEqual(self.settings.reload(), {"nodesize", "zoomspeed"})
+        self.assertEqual(self.calls, [(self.settings, {"nodesize", "zoomspeed"})])
+
+        #A removed setting is a change too
+        self.write(SETTINGS.replace("multiWindow = no\n", ""))
+        self.assertEqual(self.settings.reload(), {"nodesize", "zoomspeed", "multiwindow"})
+        self.assertEqual(len(self.calls), 2)
+
+        self.settings.unsubscribe(self.listener)
+        self.settings.unsubscribe(self.listener)
+        self.write(SETTINGS)
+        self.settings.reload()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_failingListener(self):
+        def failing(settings, changed): raise RuntimeError("listener failed")
+        self.settings.listeners.insert(0, failing)
+        self.write(SETTINGS.replace("NodeSize = 60", "NodeSize = 70"))
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.settings.reload()
+        #The other listeners are still notified
+        self.assertIn("listener failed", stderr.getvalue())
+        self.assertEqual(len(self.calls), 1)
+
+    def test_brokenFileKeepsTheSettings(self):
+        for text in ("NodeSize = 70\n", "[Other]\nNodeSize = 70\n", None):
+            with self.subTest(text=text):
+                if (text is None): os.remove(self.file)
+                else: self.write(text)
+                with contextlib.redirect_stderr(io.StringIO()):
+                    self.assertEqual(self.settings.reload(), set())
+                self.assertEqual(self.settings.getint("NodeSize"), 60)
+        self.assertEqual(self.calls, [])
+        #Fixed again
+        self.write(SETTINGS.replace("NodeSize = 60", "NodeSize = 70"))
+        self.assertEqual(self.settings.reload(), {"nodesize"})
+
+    def test_shared(self):
+        shared = settings.shared
+        try:
+            settings.shared = None
+            loaded = settings.load()
+            self.assertIs(settings.load(), loaded)
+            self.assertEqual(loaded.filename, settings.path+"/settings.ini")
+            #Every module reads the same settings
+            settings.shared = self.settings
+            self.write(SETTINGS.replace("NodeSize = 60", "NodeSize = 70"))
+            self.assertIs(settings.load(), self.settings)
+            self.assertEqual(self.settings.getint("NodeSize"), 70)
+            self.assertEqual(len(self.calls), 1)
+        finally:
+            settings.shared = shared
+
+
+if __name__ == "__main__":
+    unittest.main()
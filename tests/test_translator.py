@@ -0,0 +1,193 @@
+import sys, pathlib, traceback, unittest
+import networkx as nx
+
+#The modules of the program are in the parent folder
+sys.path.insert(0, str( pathlib.Path(__file__).parent.parent.absolute() ))
+sys.path.insert(1, str( pathlib.Path(__file__).parent.parent.absolute() / "benchmarks" ))
+import graphBuilder
+from graphBuilder import ResultList, formatLines
+
+from gorgiasOutput import generate
+
+# ---------------------------------------------------------------------------- #
+#                         The translator before streaming                      #
+# ---------------------------------------------------------------------------- #
+# resultFormatter and translator as they were before the single pass parser
+# (ResultList/_ResultBlock). The globals are returned instead, and nothing is printed.
+
+
+def baselineFormatter(result):
+    list2 = result.splitlines()
+    list3 = []
+    for item in list2:
+        if not item.isspace():
+            if (item.find("RESULT:") != -1): #sometimes the RESULT: line has unwanted spaces on its left
+                list3.append(item.lstrip())
+            else:
+                list3.append(item)
+    return list3
+
+
+def baselineTranslator(query, textList, namedNodes):
+    """
+    Returns:
+        tuple: The (DiGraph, holds, isFact) of the last result or None if the translation failed
+    """
+    results = 0
+    startLine = 0
+    for line in range(len(textList)) :
+        if (textList[line].find("RESULT") != -1):
+            startLine = line
+            results = results + 1
+    line = startLine + 2 if results > 1 else 2
+
+    argumentHolds = textList[startLine].endswith('holds.')
+    DG = nx.DiGraph()
+
+    if (textList[startLine+1].rstrip().endswith("by")):
+        DG.add_nodes_from([(query,{"description":textList[startLine+1].lstrip().rstrip()})])
+        return DG, argumentHolds, True
+
+    if (argumentHolds and len(textList[startLine:]) == 3 ):
+        DG.add_nodes_from([(query, {"description":textList[startLine+1].split('|',1)[-1].lstrip().rstrip()+"\n"
+                                   + textList[startLine+2].split('|',1)[-1].lstrip().rstrip()})])
+        return DG, True, False
+
+    root = textList[startLine + 1].split(':',1)[0].split('(',1)[0].lstrip()
+    DG.add_nodes_from([(query if namedNodes else root,{"description":textList[startLine + 1].lstrip().rstrip()})])
+
+    nodeList = [query if namedNodes else root]
+    nodeDepth = 0
+    indexDict = {0:0}
+    try:
+        listlength = len(textList)
+        while (line <  listlength):
+            nextIndex = textList[line].find("|")
+            if (nextIndex == -1): break
+
+            if (nextIndex < indexDict[nodeDepth]):
+                while ( textList[line][indexDict[nodeDepth]]  != "|" ):
+                    nodeDepth -= 1
+                    nodeList.pop()
+
+            if (nextIndex > indexDict[nodeDepth] or nextIndex == indexDict[nodeDepth]):
+                if (nextIndex > indexDict[nodeDepth]):
+                    nodeDepth += 1
+                    indexDict[nodeDepth]=nextIndex
+                    nodeList.append(None)
+                if (namedNodes):
+                    nodeTitle = ("not "+textList[line].split(" ")[-1][:-1] if textList[line].split(" ")[-2]=="not"
+                                 else textList[line].split(" ")[-1][:-1])
+                else:
+                    nodeTitle = textList[line].split(':',1)[0].split('(',1)[0].lstrip()[1:]
+                nodeList[nodeDepth] = nodeTitle
+
+                nodeDescription = ""
+                i = 0
+                while (True):
+                    if (line+i >= listlength or i == 3 or (not textList[line].find("|") == nextIndex)): break
+                    nodeDescription = nodeDescription + textList[line+i].split('|',1)[-1].lstrip().rstrip()+"\n"
+                    i = i + 1
+                nodeDescription = nodeDescription[0:-1]
+
+                if (nodeList[nodeDepth] not in DG.nodes):
+                    DG.add_nodes_from([ ( nodeList[nodeDepth], {"description":nodeDescription} ) ])
+                DG.add_edge(nodeList[nodeDepth], nodeList[nodeDepth-1])
+
+            line += 3
+        return DG, argumentHolds, False
+    except Exception:
+        traceback.print_exc()
+        return None
+
+
+# ---------------------------------------------------------------------------- #
+#                                Sample outputs                                #
+# ---------------------------------------------------------------------------- #
+
+#Printed by extended_prove_with_tree for fly(tweety) on the bird/penguin theory
+ATTACKED = """RESULT: fly(tweety) holds.
+r1(tweety): fly(tweety) supported by bird(tweety)
+  |nr1(tweety): attacks with penguin(tweety) neg(fly(tweety)).
+  |   penguin(tweety)
+  |   nr1(tweety) is a defeasible rule
+     |pr1(tweety): defends with r1(tweety) stronger than nr1(tweety) fly(tweety).
+     |   prefer(r1(tweety),nr1(tweety))
+     |   pr1(tweety) is a priority rule
+"""
+
+#A fact
+FACT = """
+RESULT: bird(tweety) holds.
+bird(tweety) is a fact and it is supported by
+"""
+
+#Directly supported by a fact, without attacks
+SUPPORTED = """   RESULT: fly(tweety) holds.
+r1(tweety): fly(tweety) supported by
+  |bird(tweety) is a fact
+"""
+
+#Doesn't hold, with a "not" conclusion and siblings that go back to a lower depth
+NOT_HOLDS = """RESULT: fly(tux) does not hold.
+r1(tux): fly(tux) supported by bird(tux)
+  |nr1(tux): attacks with penguin(tux) not fly(tux).
+  |   penguin(tux)
+  |   nr1(tux) is a defeasible rule
+     |pr2(tux): defends with nr1(tux) stronger than r1(tux) not fly(tux).
+     |   prefer(nr1(tux),r1(tux))
+     |   pr2(tux) is a priority rule
+  |nr2(tux): attacks with broken_wing(tux) neg(fly(tux)).
+  |   broken_wing(tux)
+  |   nr2(tux) is a defeasible rule
+
+"""
+
+#Two results. The last one is used
+MULTIPLE = ATTACKED + "\n" + SUPPORTED
+
+#The last node has less than 3 lines
+SHORT_NODE = """RESULT: fly(tweety) holds.
+r1(tweety): fly(tweety) supported by bird(tweety)
+  |nr1(tweety): attacks with penguin(tweety) neg(fly(tweety)).
+  |   penguin(tweety)
+"""
+
+SAMPLES = {"attacked":("fly(tweety)", ATTACKED), "fact":("bird(tweety)", FACT), "supported":("fly(tweety)", SUPPORTED),
+           "notHolds":("fly(tux)", NOT_HOLDS), "multiple":("fly(tweety)", MULTIPLE), "shortNode":("fly(tweety)", SHORT_NODE),
+           "binary":("fly(tweety)", generate("fly(tweety)", depth=4, branching=2)),
+           "wide":("fly(tweety)", generate("fly(tweety)", nodes=200, branching=5, seed=1))}
+
+
+class TranslatorTest(unittest.TestCase):
+    """
+    The single pass parser gives the same graphs as the translator before it
+    """
+
+    def setUp(self):
+        graphBuilder.loadConfig()
+
+    def assertSameResult(self, q, text, namedNodes):
+        expected = baselineTranslator(q, baselineFormatter(text.strip()), namedNodes)
+        results = ResultList(q, list(formatLines(text.splitlines())), namedNodes)
+        result = results[-1] if len(results) > 0 else None
+        self.assertIsNotNone(expected)
+        self.assertIsNotNone(result)
+        DG, holds, isFact = result
+        self.assertEqual((holds, isFact), expected[1:])
+        self.assertEqual(dict(DG.nodes(data=True)), dict(expected[0].nodes(data=True)))
+        self.assertEqual(sorted(DG.edges), sorted(expected[0].edges))
+
+    def test_samples(self):
+        for name, (q, text) in SAMPLES.items():
+            for namedNodes in (False, True):
+                with self.subTest(name, namedNodes=namedNodes):
+                    self.assertSameResult(q, text, namedNodes)
+
+    def test_lineEndings(self):
+        q, text = SAMPLES["notHolds"]
+        self.assertSameResult(q, text.replace("\n", "\r\n"), False)
+
+
+if __name__ == "__main__":
+    unittest.main()